@@ -1,25 +1,125 @@
 from fastapi import FastAPI
 import uvicorn
+import asyncio
+import json
 import os 
 import sys 
 from fastapi.templating import Jinja2Templates 
 from starlette.responses import RedirectResponse
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
 from text_summarizer.pipeline.prediction import PredictionPipeline 
+from text_summarizer.pipeline.serving import MicroBatcher, ServiceBusyError
+from text_summarizer.pipeline.serving import ModelLoader, ModelNotReadyError
+from text_summarizer.pipeline.cache import SummaryCache
+from text_summarizer.pipeline.long_document import LongDocumentSummarizer
+from text_summarizer.pipeline.metrics import REGISTRY, Gauge, RequestMetricsMiddleware
+from text_summarizer.utils.common import memory_usage
+from text_summarizer.config.configuration import ConfigurationManager
 
 
 text: str = "what is Text Summarization? Give me a detailed explanation"
 app = FastAPI()
 
-# Load model ONCE at startup (reuses saved weights, no training)
-print("Loading trained model at startup...")
-prediction_pipeline = PredictionPipeline()
-print("Model ready for predictions!")
+config_manager = ConfigurationManager()
+serving_config = config_manager.get_serving_config()
+
+# Request id, latency metrics and one log line per request; an X-Profile
+# header profiles the request's model call (rate limited)
+app.add_middleware(RequestMetricsMiddleware, profiling=config_manager.get_profiling_config())
+
+# Load model ONCE per worker (reuses saved weights, no training), in the
+# background: the server accepts connections at once and reports readiness
+# on /readyz; model routes answer 503 until it is loaded and warm
+def warm_up(pipeline):
+    pipeline.warm_up(serving_config.warmup_runs, serving_config.max_batch_size)
+
+model_loader = ModelLoader(PredictionPipeline, warm_up if serving_config.warmup_runs else None)
+
+def predict_batch(texts, gen_kwargs, adapter):
+    return model_loader.get().predict_batch(texts, gen_kwargs, adapter)
+
+# Concurrent /predict calls are grouped into one padded generate() call,
+# run on a bounded thread pool so the event loop keeps serving health checks
+batcher = MicroBatcher(predict_batch, serving_config)
+
+# Repeated inputs are answered from the cache instead of a new beam search
+summary_cache = SummaryCache(config_manager.get_summary_cache_config())
+long_document_config = config_manager.get_long_document_config()
+
+# Gauges are read when /metrics is scraped
+REGISTRY.register(Gauge("summarizer_process_memory_bytes", "Memory of this worker process by kind",
+                        lambda: {kind: mb * 1024 * 1024 for kind, mb in memory_usage().items()}, "kind"))
+REGISTRY.register(Gauge("summarizer_model_bytes", "Bytes of the loaded model's parameters and buffers",
+                        lambda: model_loader.get().model_bytes() if model_loader.ready else None))
+REGISTRY.register(Gauge("summarizer_queue_pending", "Requests admitted and not completed yet",
+                        lambda: batcher.pending))
+REGISTRY.register(Gauge("summarizer_model_ready", "1 once the model is loaded and warmed up",
+                        lambda: int(model_loader.ready)))
+
+
+class BatchDocument(BaseModel):
+    text: str
+    preset: Optional[str] = None
+    params: Optional[Dict[str, Any]] = None
+    adapter: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    documents: List[BatchDocument]
+    # Defaults applied to every document; per-document values take precedence
+    preset: Optional[str] = None
+    params: Optional[Dict[str, Any]] = None
+    adapter: Optional[str] = None
+    # Skip the cache lookup (fresh summaries are still written back)
+    no_cache: bool = False
+
+
+class LongDocumentRequest(BaseModel):
+    text: str
+    preset: Optional[str] = None
+    params: Optional[Dict[str, Any]] = None
+    adapter: Optional[str] = None
+
+
+def not_ready_response(e):
+    return Response(content=str(e), status_code=503, headers={"Retry-After": "5"},
+                    media_type="text/plain")
+
+
+@app.on_event("startup")
+async def start_batcher():
+    print("Loading trained model in the background...")
+    model_loader.start()
+    await batcher.start()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
 
 @app.get("/", tags=["authentication"])
 async def index():
     return RedirectResponse(url="/docs")
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the worker is serving requests (the model may still be loading)."""
+    if model_loader.status == "failed":
+        return JSONResponse(model_loader.describe(), status_code=500)
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the model is loaded and warmed up."""
+    status_code = 200 if model_loader.ready else 503
+    return JSONResponse(model_loader.describe(), status_code=status_code)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of this worker process."""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/train")
 async def training(): 
     try: 
@@ -29,13 +129,168 @@ async def training():
         return Response(content=f"Error Occurred! {e}", media_type="text/plain")
 
 @app.get("/predict")
-async def predict_route(text: str): 
+async def predict_route(text: str, preset: Optional[str] = None, adapter: Optional[str] = None,
+                        no_cache: bool = False): 
     try:
-        # Use pre-loaded pipeline (fast, no reloading)
-        summary = prediction_pipeline.predict(text)
+        prediction_pipeline = model_loader.get()
+        gen_kwargs = prediction_pipeline.resolve_gen_kwargs(preset=preset)
+        adapter = prediction_pipeline.resolve_adapter(adapter)
+        key = summary_cache.make_key(text, prediction_pipeline.model_id_for(adapter), gen_kwargs)
+        summary = None if no_cache else await summary_cache.get(key)
+        if summary is None:
+            # Queued with other concurrent requests and summarized as one batch
+            summary = await batcher.submit(text, gen_kwargs, adapter)
+            await summary_cache.put(key, summary)
         return {"input_text": text, "summary": summary}
+    except ModelNotReadyError as e:
+        return not_ready_response(e)
+    except ValueError as e:
+        return Response(content=str(e), status_code=422, media_type="text/plain")
+    except ServiceBusyError as e:
+        return Response(content=f"Server busy: {e}", status_code=503,
+                        headers={"Retry-After": "1"}, media_type="text/plain")
+    except asyncio.TimeoutError:
+        return Response(content="Summarization timed out", status_code=504, media_type="text/plain")
     except Exception as e:
         return Response(content=f"Error Occurred! {e}", media_type="text/plain")
+
+
+@app.post("/predict/batch")
+async def predict_batch_route(request: BatchRequest):
+    if len(request.documents) > serving_config.max_batch_documents:
+        return Response(content=f"Too many documents: {len(request.documents)} > "
+                                f"{serving_config.max_batch_documents}",
+                        status_code=413, media_type="text/plain")
+    texts = [doc.text for doc in request.documents]
+    try:
+        prediction_pipeline = model_loader.get()
+        gen_kwargs_list = [prediction_pipeline.resolve_gen_kwargs(
+                               params={**(request.params or {}), **(doc.params or {})},
+                               preset=doc.preset or request.preset)
+                           for doc in request.documents]
+        adapters = [prediction_pipeline.resolve_adapter(doc.adapter or request.adapter)
+                    for doc in request.documents]
+        keys = [summary_cache.make_key(text, prediction_pipeline.model_id_for(adapter), gen_kwargs)
+                for text, gen_kwargs, adapter in zip(texts, gen_kwargs_list, adapters)]
+        summaries = [None if request.no_cache else await summary_cache.get(key) for key in keys]
+        # Only documents missing from the cache go to the model, one run per adapter
+        missing = {}
+        for i, summary in enumerate(summaries):
+            if summary is None:
+                missing.setdefault(adapters[i], []).append(i)
+        for adapter, indices in missing.items():
+            generated = await batcher.run(prediction_pipeline.summarize_many,
+                                          [texts[i] for i in indices],
+                                          [gen_kwargs_list[i] for i in indices],
+                                          serving_config.predict_batch_size, adapter)
+            for i, summary in zip(indices, generated):
+                summaries[i] = summary
+                await summary_cache.put(keys[i], summary)
+        return {"summaries": summaries}
+    except ModelNotReadyError as e:
+        return not_ready_response(e)
+    except ValueError as e:
+        return Response(content=str(e), status_code=422, media_type="text/plain")
+    except ServiceBusyError as e:
+        return Response(content=f"Server busy: {e}", status_code=503,
+                        headers={"Retry-After": "1"}, media_type="text/plain")
+    except asyncio.TimeoutError:
+        return Response(content="Summarization timed out", status_code=504, media_type="text/plain")
+    except Exception as e:
+        return Response(content=f"Error Occurred! {e}", media_type="text/plain")
+
+
+@app.post("/predict/long")
+async def predict_long_route(request: LongDocumentRequest):
+    """Summarize a text longer than the model window by chunked map-reduce.
+
+    The response has the `summary` plus, per stage, the chunk boundaries
+    (character offsets into that stage's input) and the time it took.
+    """
+    try:
+        prediction_pipeline = model_loader.get()
+        gen_kwargs = prediction_pipeline.resolve_gen_kwargs(params=request.params, preset=request.preset)
+        adapter = prediction_pipeline.resolve_adapter(request.adapter)
+        summarizer = LongDocumentSummarizer(prediction_pipeline, long_document_config)
+        return await batcher.run(summarizer.summarize, request.text, gen_kwargs, adapter)
+    except ModelNotReadyError as e:
+        return not_ready_response(e)
+    except ValueError as e:
+        return Response(content=str(e), status_code=422, media_type="text/plain")
+    except ServiceBusyError as e:
+        return Response(content=f"Server busy: {e}", status_code=503,
+                        headers={"Retry-After": "1"}, media_type="text/plain")
+    except asyncio.TimeoutError:
+        return Response(content="Summarization timed out", status_code=504, media_type="text/plain")
+    except Exception as e:
+        return Response(content=f"Error Occurred! {e}", media_type="text/plain")
+
+
+@app.get("/cache/stats")
+async def cache_stats_route():
+    return summary_cache.stats()
+
+@app.get("/adapters")
+async def adapters_route():
+    """Registered LoRA adapters, which are resident, and load/eviction counts."""
+    try:
+        prediction_pipeline = model_loader.get()
+    except ModelNotReadyError as e:
+        return not_ready_response(e)
+    if prediction_pipeline.adapters is None:
+        return {"enabled": False}
+    return {"enabled": True, "registered": sorted(prediction_pipeline.adapter_config.registry),
+            **prediction_pipeline.adapters.stats()}
+
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.get("/predict/stream")
+async def predict_stream_route(text: str, preset: str = "greedy", adapter: Optional[str] = None):
+    """Stream the summary as server-sent events.
+
+    Each `data:` event carries a `delta` of newly decoded text; a final
+    `done` event carries the full summary. Greedy/sampling presets
+    (`num_beams=1`) stream token by token. With a beam preset, beam search
+    can only emit the finished summary, so a single delta arrives at the end.
+    """
+    # Wait for the first piece before responding so errors still get a status code
+    try:
+        prediction_pipeline = model_loader.get()
+        gen_kwargs = prediction_pipeline.resolve_gen_kwargs(preset=preset)
+        adapter = prediction_pipeline.resolve_adapter(adapter)
+        pieces = batcher.stream(prediction_pipeline.stream, text, gen_kwargs, adapter)
+        first = await pieces.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except ModelNotReadyError as e:
+        return not_ready_response(e)
+    except ValueError as e:
+        return Response(content=str(e), status_code=422, media_type="text/plain")
+    except ServiceBusyError as e:
+        return Response(content=f"Server busy: {e}", status_code=503,
+                        headers={"Retry-After": "1"}, media_type="text/plain")
+    except Exception as e:
+        return Response(content=f"Error Occurred! {e}", media_type="text/plain")
+
+    async def events():
+        summary = ""
+        if first is not None:
+            summary += first
+            yield sse_event({"delta": first})
+            try:
+                async for piece in pieces:
+                    summary += piece
+                    yield sse_event({"delta": piece})
+            except Exception as e:
+                yield sse_event({"error": str(e)}, event="error")
+                return
+        yield sse_event({"summary": summary}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
     
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
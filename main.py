@@ -1,73 +1,37 @@
+import os
 import sys
-import shutil
+import argparse
 from pathlib import Path
 
 # Ensure local src/ is on the path before importing pipelines (when package isn't installed)
 sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
 
-# Optional: Clean artifacts folder for fresh run (comment out to keep old artifacts)
-artifacts_dir = Path(__file__).resolve().parent / "artifacts"
-if artifacts_dir.exists():
-    shutil.rmtree(artifacts_dir)
-
-from text_summarizer.pipeline.stage_01_data_ingestion import DataIngestionTrainPipeline
-from text_summarizer.pipeline.stage_02_data_validation import DataValidationTrainPipeline
-from text_summarizer.pipeline.stage_03_data_transformation import DataTransformationTrainPipeline
-from text_summarizer.pipeline.stage_04_model_trainer import ModelTrainerTrainingPipeline
-from text_summarizer.pipeline.stage_05_model_evaluation import ModelEvaluationTrainPipeline
-from text_summarizer.logging import logger
-
-STAGE_NAME = "Data Ingestion Stage"
-try: 
-    logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-    data_ingestion = DataIngestionTrainPipeline()
-    data_ingestion.main()
-    logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e: 
-    logger.exception(f"Error in stage {STAGE_NAME}")
-    raise e
-
-
-STAGE_NAME = "Data Validation Stage"
-try: 
-    logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-    data_validation = DataValidationTrainPipeline()
-    data_validation.main()
-    logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e: 
-    logger.exception(f"Error in stage {STAGE_NAME}")
-    raise e
-
-
-STAGE_NAME = "Data Transformation Stage"
-try: 
-    logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-    from text_summarizer.pipeline.stage_03_data_transformation import DataTransformationTrainPipeline
-    data_transformation = DataTransformationTrainPipeline()
-    data_transformation.main()
-    logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e: 
-    logger.exception(f"Error in stage {STAGE_NAME}")
-    raise e
-
-stage_name = "Model Training Stage"
-try:
-    logger.info(f">>>>>> stage {stage_name} started <<<<<<")
-    from text_summarizer.pipeline.stage_04_model_trainer import ModelTrainerTrainingPipeline
-    model_trainer = ModelTrainerTrainingPipeline()
-    model_trainer.main()
-    logger.info(f">>>>>> stage {stage_name} completed <<<<<<\n\nx==========x")
-except Exception as e:
-    logger.exception(f"Error in stage {stage_name}")
-    raise e 
-
-stage_name = "Model Evaluation Stage"
-
-try:
-    logger.info(f">>>>>> stage {stage_name} started <<<<<<")
-    model_evaluation = ModelEvaluationTrainPipeline()
-    model_evaluation.main()
-    logger.info(f">>>>>> stage {stage_name} completed <<<<<<\n\nx==========x")
-except Exception as e:
-    logger.exception(f"Error in stage {stage_name}")
-    raise e
\ No newline at end of file
+from text_summarizer.pipeline.stage_runner import StageRunner, STAGE_KEYS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the training pipeline. Stages whose config, params and "
+                    "input artifacts are unchanged since their last run are skipped.")
+    parser.add_argument("--from-stage", choices=STAGE_KEYS,
+                        help="rerun this stage, then the later stages whose inputs changed")
+    parser.add_argument("--only", nargs="+", choices=STAGE_KEYS, metavar="STAGE",
+                        help=f"run just these stages ({', '.join(STAGE_KEYS)})")
+    parser.add_argument("--force", action="store_true",
+                        help="rerun every selected stage even if its inputs are unchanged")
+    parser.add_argument("--clean", action="store_true",
+                        help="delete the artifacts folder first (a fresh run)")
+    parser.add_argument("--profile", nargs="?", const="", default=os.environ.get("PROFILE"),
+                        metavar="torch|python|both",
+                        help="profile every stage that runs into artifacts/profiles/ (default mode: "
+                             "profiling.mode in config.yaml; also set by the PROFILE env var)")
+    args = parser.parse_args(argv)
+    if args.from_stage and args.only:
+        parser.error("--from-stage and --only are mutually exclusive")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    StageRunner().run(from_stage=args.from_stage, only=args.only, force=args.force, clean=args.clean,
+                      profile=args.profile)
@@ -0,0 +1,81 @@
+import argparse
+import dataclasses
+import time
+import pandas as pd
+from datasets import load_from_disk
+from text_summarizer.logging import logger
+from text_summarizer.entity import DecodingBenchmarkConfig
+from text_summarizer.components.model_scoring import ROUGE_NAMES, rouge_scores
+
+
+class DecodingBenchmark:
+    """Sweep decoding presets over the validation split.
+
+    Every example is summarized on its own, the way a `/predict` request
+    is served, so the latency percentiles are per-request latencies. For
+    each preset the report has p50/p95/mean latency, generated tokens per
+    second and mean ROUGE F-measures against the reference summaries.
+    """
+
+    def __init__(self, config: DecodingBenchmarkConfig, prediction_pipeline=None):
+        self.config = config
+        self.prediction_pipeline = prediction_pipeline
+
+    def benchmark_preset(self, preset, texts, references):
+        pipeline = self.prediction_pipeline
+        gen_kwargs = pipeline.resolve_gen_kwargs(preset=preset)
+        # Warm-up so one-off allocations don't land in the first sample
+        pipeline.predict_batch(texts[:1], gen_kwargs)
+
+        latencies, predictions, generated_tokens = [], [], 0
+        for text in texts:
+            started = time.perf_counter()
+            summary = pipeline.predict_batch([text], gen_kwargs)[0]
+            latencies.append(time.perf_counter() - started)
+            predictions.append(summary)
+            generated_tokens += len(pipeline.tokenizer(summary, add_special_tokens=False)["input_ids"])
+
+        latencies = pd.Series(latencies) * 1000
+        rouge = pd.DataFrame(rouge_scores(predictions, references))[ROUGE_NAMES].mean()
+        return {
+            "preset": preset,
+            "samples": len(texts),
+            "p50_ms": latencies.quantile(0.5),
+            "p95_ms": latencies.quantile(0.95),
+            "mean_ms": latencies.mean(),
+            "tokens_per_s": generated_tokens / (latencies.sum() / 1000),
+            **rouge.to_dict(),
+        }
+
+    def run(self):
+        if self.prediction_pipeline is None:
+            from text_summarizer.pipeline.prediction import PredictionPipeline
+            self.prediction_pipeline = PredictionPipeline()
+
+        validation = load_from_disk(self.config.data_path)["validation"]
+        rows = validation.select(range(min(self.config.num_samples, len(validation))))
+        texts, references = list(rows["dialogue"]), list(rows["summary"])
+
+        results = []
+        for preset in self.config.presets:
+            logger.info(f"Benchmarking decoding preset {preset!r} on {len(texts)} examples")
+            results.append(self.benchmark_preset(preset, texts, references))
+
+        report = pd.DataFrame(results)
+        report.to_csv(self.config.report_file, index=False)
+        logger.info(f"Decoding benchmark:\n{report.to_string(index=False, float_format='%.3f')}")
+        logger.info(f"Decoding benchmark saved to: {self.config.report_file}")
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency/quality sweep over decoding presets")
+    parser.add_argument("--presets", nargs="+", help="presets to sweep (default: config.yaml)")
+    parser.add_argument("--num-samples", type=int, help="validation examples per preset")
+    args = parser.parse_args()
+
+    from text_summarizer.config.configuration import ConfigurationManager
+    config = ConfigurationManager().get_decoding_benchmark_config()
+    overrides = {"presets": args.presets, "num_samples": args.num_samples}
+    config = dataclasses.replace(config, **{k: v for k, v in overrides.items() if v is not None})
+    DecodingBenchmark(config).run()
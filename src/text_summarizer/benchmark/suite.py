@@ -0,0 +1,381 @@
+import argparse
+import dataclasses
+import glob
+import json
+import math
+import multiprocessing
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import torch
+import transformers
+import yaml
+import datasets
+from datasets import Dataset, DatasetDict, load_from_disk
+import text_summarizer
+from text_summarizer.logging import logger
+from text_summarizer.constants import CONFIG_FILE_PATH, PARAMS_FILE_PATH
+from text_summarizer.entity import BenchmarkSuiteConfig
+from text_summarizer.config.configuration import ConfigurationManager
+from text_summarizer.components.data_transformation import DataTransformation
+from text_summarizer.components.model_trainer import ModelTrainer
+from text_summarizer.pipeline.prediction import PredictionPipeline
+from text_summarizer.benchmark.decoding import DecodingBenchmark
+from text_summarizer.benchmark.tiny_model import build_tiny_model
+
+
+BENCHMARKS = ("tokenization", "training", "generation", "http")
+
+
+def relocate(node, root):
+    """Copy of a config tree with every `artifacts/...` path moved under `root`."""
+    if isinstance(node, dict):
+        return {key: relocate(value, root) for key, value in node.items()}
+    if isinstance(node, list):
+        return [relocate(value, root) for value in node]
+    if isinstance(node, str) and (node == "artifacts" or node.startswith("artifacts/")):
+        return str(Path(root) / node)
+    return node
+
+
+def flatten(results, prefix=""):
+    """`{"http": {"p50_ms": 3}}` -> `{"http.p50_ms": 3}`"""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def worsening(name, value, baseline):
+    """Fraction by which `value` is worse than `baseline`, by the metric's suffix:
+    `_ms` is a latency (lower is better), `_per_s` a throughput (higher is
+    better). None for metrics that are not compared."""
+    if not baseline:
+        return None
+    if name.endswith("_ms"):
+        return (value - baseline) / baseline
+    if name.endswith("_per_s"):
+        return (baseline - value) / baseline
+    return None
+
+
+def median_of(samples):
+    """Per-metric median of repeated runs of one benchmark (nested dicts of numbers)."""
+    if isinstance(samples[0], dict):
+        return {key: median_of([sample[key] for sample in samples]) for key in samples[0]}
+    values = [value for value in samples if value is not None]
+    return float(np.median(values)) if values else None
+
+
+def spread(samples):
+    """`{"http.p50_ms": [min, max]}` over repeated runs of the benchmarks."""
+    values = {}
+    for sample in samples:
+        for name, value in flatten(sample).items():
+            if value is not None:
+                values.setdefault(name, []).append(value)
+    return {name: [min(found), max(found)] for name, found in values.items()}
+
+
+def percentiles_ms(seconds):
+    if not seconds:
+        return {"p50_ms": None, "p95_ms": None}
+    return {"p50_ms": float(np.percentile(seconds, 50) * 1000),
+            "p95_ms": float(np.percentile(seconds, 95) * 1000)}
+
+
+def run_benchmark(config, name):
+    """Run one benchmark in this process against the prepared workspace."""
+    suite = BenchmarkSuite(config)
+    return getattr(suite, f"bench_{name}")(suite.workspace_config())
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+class BenchmarkSuite:
+    """Offline benchmarks of the training, evaluation and serving code paths.
+
+    Every run rebuilds a workspace: a tiny seq2seq model whose tokenizer is
+    trained on the bundled SAMSum validation split, copies of the bundled
+    Arrow files, and a copy of config.yaml / params.yaml with every artifact
+    path moved into the workspace. The stages then run unmodified against
+    it, so the numbers track the repo's own code and settings. Each
+    benchmark runs in a fresh process, so its numbers don't depend on which
+    benchmarks ran before it:
+
+    - tokenization: rows and tokens per second of `DataTransformation`
+    - training: steps, samples and tokens per second of `ModelTrainer`
+    - generation: per-request latency of `PredictionPipeline` for each preset
+    - http: requests per second and latency of `app.py` under concurrent load
+
+    Each benchmark runs `repeats` times and its median is recorded, with
+    the min and max as the spread. Each run is appended to the JSON history
+    file. Latencies (`_ms`) and throughputs (`_per_s`) worse than the
+    baseline by more than `regression_threshold` are reported as
+    regressions. The baseline is the median of the last `baseline_runs`
+    comparable runs (same machine, library versions and suite settings)
+    that had no regressions, so a slow run never becomes the reference.
+    """
+
+    def __init__(self, config: BenchmarkSuiteConfig):
+        self.config = config
+        self.workspace = Path(config.workspace_dir).resolve()
+
+    def load_split(self, split):
+        files = sorted(glob.glob(os.path.join(self.config.data_path, split, "data-*.arrow")))
+        if not files:
+            raise FileNotFoundError(f"No Arrow files for the {split} split in {self.config.data_path}")
+        return datasets.concatenate_datasets([Dataset.from_file(path) for path in files])
+
+    def workspace_config(self):
+        return ConfigurationManager(self.workspace / CONFIG_FILE_PATH, self.workspace / PARAMS_FILE_PATH)
+
+    def prepare(self):
+        """Build the workspace, with the data already tokenized for the training benchmark."""
+        shutil.rmtree(self.workspace, ignore_errors=True)
+        (self.workspace / "config").mkdir(parents=True)
+        model_dir, data_dir = self.workspace / "model", self.workspace / "data"
+
+        validation, test = self.load_split("validation"), self.load_split("test")
+        build_tiny_model(list(validation["dialogue"]) + list(validation["summary"]), str(model_dir))
+        # Only validation and test ship with the repo; validation stands in for train
+        rows = validation.select(range(min(self.config.num_samples, len(validation))))
+        DatasetDict(train=rows, validation=rows,
+                    test=test.select(range(min(self.config.num_samples, len(test))))).save_to_disk(str(data_dir))
+
+        with open(CONFIG_FILE_PATH) as f:
+            config = relocate(yaml.safe_load(f), self.workspace)
+        config["data_transformation"].update(data_path=str(data_dir), tokenizer_name=str(model_dir))
+        config["model_trainer"]["model_ckpt"] = str(model_dir)
+        config["model_evaluation"].update(model_path=str(model_dir), tokenizer_path=str(model_dir))
+        # Every request reaches the model, served by the plain torch backend
+        config["summary_cache"]["enabled"] = False
+        config["serving"].update(backend="torch", quantization="none")
+        config["adapters"]["enabled"] = False
+        with open(self.workspace / CONFIG_FILE_PATH, "w") as f:
+            yaml.safe_dump(config, f, sort_keys=False)
+        shutil.copyfile(PARAMS_FILE_PATH, self.workspace / PARAMS_FILE_PATH)
+        DataTransformation(self.workspace_config().get_data_transformation_config()).convert()
+
+    def bench_tokenization(self, config_manager):
+        transformation_config = config_manager.get_data_transformation_config()
+        # Tokenized again from scratch: no manifest, and no cached map() results
+        os.remove(transformation_config.manifest_file)
+        datasets.disable_caching()
+        DataTransformation(transformation_config).convert()
+        with open(transformation_config.manifest_file) as f:
+            stats = json.load(f)["stats"].values()
+        seconds = sum(split["seconds"] for split in stats)
+        rows = sum(split["input_tokens"]["count"] for split in stats)
+        tokens = sum(split[column]["count"] * split[column].get("mean", 0)
+                     for split in stats for column in ("input_tokens", "label_tokens"))
+        return {"rows": rows, "seconds": seconds, "rows_per_s": rows / seconds, "tokens_per_s": tokens / seconds}
+
+    def bench_training(self, config_manager):
+        trainer_config = dataclasses.replace(
+            config_manager.get_model_trainer_config(), mode="config", num_train_epochs=1,
+            evaluation_strategy="no", max_train_samples=self.config.train_samples, max_eval_samples=8)
+        ModelTrainer(trainer_config).train()
+        with open(trainer_config.throughput_file) as f:
+            report = json.load(f)
+        batches = math.ceil(report["samples"] / trainer_config.per_device_train_batch_size)
+        steps = math.ceil(batches / trainer_config.gradient_accumulation_steps)
+        return {"steps": steps, "seconds": report["seconds"], "steps_per_s": steps / report["seconds"],
+                "samples_per_s": report["samples_per_sec"], "tokens_per_s": report["tokens_per_sec"],
+                "padding_ratio": report["padding_ratio"]}
+
+    def bench_generation(self, config_manager):
+        pipeline = PredictionPipeline(config_manager)
+        validation = load_from_disk(str(self.workspace / "data"))["validation"]
+        rows = validation.select(range(min(self.config.generation_samples, len(validation))))
+        decoding = DecodingBenchmark(config_manager.get_decoding_benchmark_config(), pipeline)
+        results = {}
+        for preset in self.config.presets:
+            result = decoding.benchmark_preset(preset, list(rows["dialogue"]), list(rows["summary"]))
+            results[preset] = {key: float(value) for key, value in result.items() if key != "preset"}
+        return results
+
+    def bench_http(self, config_manager):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}"
+        env = dict(os.environ)
+        source_dir = str(Path(text_summarizer.__file__).resolve().parents[1])
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [source_dir, env.get("PYTHONPATH")]))
+        log_file = self.workspace / "server.log"
+        # app.py reads config/config.yaml from its working directory: the workspace
+        with open(log_file, "w") as log:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", str(Path(self.config.app_dir).resolve()),
+                 "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+                cwd=self.workspace, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            self.wait_until_ready(server, base_url, log_file)
+            return self.load_test(base_url)
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    def wait_until_ready(self, server, base_url, log_file):
+        deadline = time.monotonic() + self.config.startup_timeout_s
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}, see {log_file}")
+            try:
+                with urllib.request.urlopen(f"{base_url}/readyz", timeout=5):
+                    return
+            except OSError:
+                # Not listening yet, or 503 while the model loads
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Server not ready after {self.config.startup_timeout_s}s, see {log_file}")
+            time.sleep(0.2)
+
+    def load_test(self, base_url):
+        validation = load_from_disk(str(self.workspace / "data"))["validation"]
+        dialogues = list(validation["dialogue"])
+        texts = [dialogues[i % len(dialogues)] for i in range(self.config.http_requests)]
+        preset = self.config.presets[0]
+
+        def call(text):
+            url = f"{base_url}/predict?" + urllib.parse.urlencode({"text": text, "preset": preset})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=120) as response:
+                    ok = "summary" in json.loads(response.read())
+            except (OSError, ValueError):
+                ok = False
+            return time.perf_counter() - started, ok
+
+        call(texts[0])
+        with ThreadPoolExecutor(self.config.http_concurrency) as pool:
+            started = time.perf_counter()
+            outcomes = list(pool.map(call, texts))
+            seconds = time.perf_counter() - started
+        latencies = [latency for latency, ok in outcomes if ok]
+        errors = len(outcomes) - len(latencies)
+        if errors:
+            logger.warning(f"{errors} of {len(outcomes)} HTTP requests failed")
+
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=10) as response:
+            samples = dict(line.rsplit(" ", 1) for line in response.read().decode().splitlines()
+                           if line and not line.startswith("#"))
+        batches = float(samples.get("summarizer_batch_size_count", 0))
+        return {"requests": len(outcomes), "errors": errors, "concurrency": self.config.http_concurrency,
+                "requests_per_s": len(latencies) / seconds, **percentiles_ms(latencies),
+                "mean_batch_size": float(samples["summarizer_batch_size_sum"]) / batches if batches else None}
+
+    def environment(self):
+        return {"python": platform.python_version(), "torch": torch.__version__,
+                "transformers": transformers.__version__, "platform": platform.platform(),
+                "cpus": os.cpu_count(), "torch_threads": torch.get_num_threads()}
+
+    def settings(self):
+        """Suite settings that change the numbers; runs are only compared when they match."""
+        return {key: value for key, value in dataclasses.asdict(self.config).items()
+                if key in ("num_samples", "train_samples", "presets", "generation_samples",
+                           "http_requests", "http_concurrency", "repeats")}
+
+    def load_history(self):
+        if not os.path.exists(self.config.history_file):
+            return []
+        with open(self.config.history_file) as f:
+            return json.load(f)
+
+    def baseline(self, history, environment, settings):
+        """Each metric's median over the latest `baseline_runs` comparable runs
+        that measured it, skipping runs that reported regressions."""
+        values = {}
+        for run in reversed(history):
+            if run["environment"] != environment or run["settings"] != settings or run["regressions"]:
+                continue
+            for name, value in flatten(run["results"]).items():
+                if value is not None and len(values.setdefault(name, [])) < self.config.baseline_runs:
+                    values[name].append(value)
+        return {name: float(np.median(found)) for name, found in values.items() if found}
+
+    def compare(self, results, baseline, threshold, spreads=None):
+        rows, regressions = [], []
+        spreads = spreads or {}
+        for name, value in flatten(results).items():
+            before = baseline.get(name)
+            change = worsening(name, value, before) if value is not None and before is not None else None
+            low, high = spreads.get(name, (None, None))
+            rows.append({"metric": name, "value": value, "min": low, "max": high,
+                         "baseline": before, "worse_by": change})
+            if change is not None and change > threshold:
+                regressions.append({"metric": name, "value": value, "baseline": before, "worse_by": change})
+        return pd.DataFrame(rows), regressions
+
+    def run(self, only=None, threshold=None, save=True):
+        """Run the benchmarks in `only` (all if None); returns the history record."""
+        threshold = self.config.regression_threshold if threshold is None else threshold
+        self.prepare()
+        samples = {}
+        for name in BENCHMARKS:
+            if only is None or name in only:
+                samples[name] = []
+                for repeat in range(self.config.repeats):
+                    logger.info(f"Running the {name} benchmark ({repeat + 1}/{self.config.repeats})")
+                    # Tokenizing left this process measurably slower at generation (allocator
+                    # and thread-pool state), so every benchmark run gets a fresh one
+                    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                        samples[name].append(pool.submit(run_benchmark, self.config, name).result())
+        results = {name: median_of(runs) for name, runs in samples.items()}
+        spreads = spread([{name: sample} for name, runs in samples.items() for sample in runs])
+
+        history = self.load_history()
+        environment, settings = self.environment(), self.settings()
+        report, regressions = self.compare(results, self.baseline(history, environment, settings),
+                                           threshold, spreads)
+        logger.info(f"Benchmark results:\n{report.to_string(index=False, float_format='%.3f')}")
+        for regression in regressions:
+            logger.warning(f"Regression: {regression['metric']} {regression['value']:.3f} "
+                           f"vs {regression['baseline']:.3f} ({regression['worse_by']:.1%} worse)")
+
+        record = {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                  "commit": git_commit(), "environment": environment, "settings": settings,
+                  "results": results, "spread": spreads, "regressions": regressions}
+        if save:
+            history.append(record)
+            with open(self.config.history_file, "w") as f:
+                json.dump(history, f, indent=2)
+            logger.info(f"Benchmark history saved to: {self.config.history_file}")
+        return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks on a tiny locally built model")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="benchmarks to run (default: all)")
+    parser.add_argument("--threshold", type=float,
+                        help="flag metrics worse than the baseline by more than this fraction")
+    parser.add_argument("--no-save", action="store_true", help="don't append this run to the history file")
+    args = parser.parse_args()
+
+    config = ConfigurationManager().get_benchmark_suite_config()
+    record = BenchmarkSuite(config).run(only=args.only, threshold=args.threshold, save=not args.no_save)
+    sys.exit(1 if record["regressions"] else 0)
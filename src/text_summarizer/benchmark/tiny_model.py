@@ -0,0 +1,38 @@
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+from text_summarizer.logging import logger
+
+
+def build_tiny_model(texts, model_dir, vocab_size=2000, seed=0):
+    """Save a tiny randomly initialised BART model and its tokenizer to `model_dir`.
+
+    The word-level tokenizer is trained on `texts`, so the model builds
+    offline in seconds. Its layer names match the LoRA target modules
+    (`q_proj`, `v_proj`), so it goes through the same training, merging and
+    serving code as the real checkpoint. Building twice from the same texts
+    and seed gives the same files.
+    """
+    special_tokens = ["<pad>", "</s>", "<unk>", "<s>"]
+    tokenizer = Tokenizer(models.WordLevel(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(texts, trainers.WordLevelTrainer(vocab_size=vocab_size,
+                                                                   special_tokens=special_tokens))
+    tokenizer.post_processor = processors.TemplateProcessing(single="$A </s>", special_tokens=[("</s>", 1)])
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token="<pad>", eos_token="</s>",
+                                        unk_token="<unk>", bos_token="<s>",
+                                        model_input_names=["input_ids", "attention_mask"])
+
+    config = BartConfig(
+        vocab_size=len(tokenizer), d_model=32, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64,
+        max_position_embeddings=1100, pad_token_id=0, eos_token_id=1, bos_token_id=3,
+        decoder_start_token_id=1, forced_eos_token_id=1)
+    with torch.random.fork_rng():
+        torch.manual_seed(seed)
+        model = BartForConditionalGeneration(config)
+    model.save_pretrained(model_dir)
+    tokenizer.save_pretrained(model_dir)
+    logger.info(f"Tiny model ({sum(p.numel() for p in model.parameters())} parameters, "
+                f"vocabulary {len(tokenizer)}) saved to: {model_dir}")
+    return model_dir
@@ -1,7 +1,14 @@
-import os 
-import urllib.request as request 
-import zipfile 
-from text_summarizer.logging import logger 
+import os
+import time
+import shutil
+import hashlib
+import zipfile
+import zlib
+import urllib.error
+import urllib.request as request
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+from text_summarizer.logging import logger
 from text_summarizer.utils.common import get_size
 from pathlib import Path
 from text_summarizer.entity import DataIngestionConfig
@@ -10,20 +17,148 @@ from text_summarizer.entity import DataIngestionConfig
 
 class DataIngestion:
     def __init__(self, config: DataIngestionConfig):
-        self.config = config 
-
-    def download_data(self): 
-        if not os.path.exists(self.config.local_data_file):
-            filename, headers = request.urlretrieve(
-                url=self.config.source_URL,
-                filename=self.config.local_data_file,
-            )
-            logger.info(f"File : {filename} downloaded with info: {headers}")
-        else:
-            logger.info(f"File already exists of size: {get_size(Path(self.config.local_data_file))}")
+        self.config = config
+
+    def sources(self):
+        """Mirrors first, then the canonical source URL."""
+        return list(self.config.mirrors) + [self.config.source_URL]
+
+    @staticmethod
+    def local_path(source):
+        """Filesystem path for a plain path or file:// URL, None for remote URLs."""
+        parsed = urlparse(str(source))
+        if parsed.scheme == "file":
+            return url2pathname(parsed.path)
+        if not parsed.scheme or len(parsed.scheme) == 1:  # a drive letter on Windows
+            return str(source)
+        return None
+
+    @staticmethod
+    def sha256(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def verify(self, path):
+        """Check `path` against the configured sha256 (always passes when none is set)."""
+        actual = self.sha256(path)
+        if not self.config.sha256:
+            logger.warning(f"No sha256 configured for {path}, so it is not verified; "
+                           f"pin data_ingestion.sha256: {actual}")
+            return True
+        if actual != self.config.sha256.lower():
+            logger.warning(f"Checksum mismatch for {path}: expected {self.config.sha256}, got {actual}")
+            return False
+        return True
+
+    def copy_local(self, source, part_file):
+        with open(source, "rb") as src, open(part_file, "wb") as dst:
+            shutil.copyfileobj(src, dst, self.config.chunk_size)
+
+    def stream(self, url, part_file):
+        """Download `url` into `part_file` in chunks, resuming from its current size."""
+        offset = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+        req = request.Request(url, headers={"Range": f"bytes={offset}-"} if offset else {})
+        try:
+            response = request.urlopen(req, timeout=self.config.timeout_s)
+        except urllib.error.HTTPError as e:
+            if e.code == 416:  # the partial file already holds the whole body
+                logger.info(f"{part_file} is already complete ({offset} bytes)")
+                return
+            raise
+        with response:
+            if offset and response.status != 206:
+                logger.info(f"{url} does not support resuming; downloading from the start")
+                offset = 0
+            length = response.headers.get("Content-Length")
+            total = offset + int(length) if length else None
+            done, next_report, started = offset, time.monotonic(), time.monotonic()
+            with open(part_file, "ab" if offset else "wb") as f:
+                for chunk in iter(lambda: response.read(self.config.chunk_size), b""):
+                    f.write(chunk)
+                    done += len(chunk)
+                    if time.monotonic() >= next_report:
+                        progress = f"{done / total:.0%} of {total >> 10} KB" if total else f"{done >> 10} KB"
+                        logger.info(f"Downloading {url}: {progress}")
+                        next_report = time.monotonic() + 5
+            if total is not None and done < total:
+                # Raised like urlretrieve does; the next attempt resumes from here
+                raise urllib.error.ContentTooShortError(
+                    f"Connection closed after {done} of {total} bytes", None)
+            logger.info(f"Downloaded {done - offset} bytes from {url} in {time.monotonic() - started:.1f}s"
+                        + (f" (resumed at byte {offset})" if offset else ""))
+
+    def download_data(self):
+        """Fetch the archive from the first source that yields a file with the right checksum.
+
+        Remote downloads go to `<local_data_file>.part` and resume from it with
+        an HTTP Range request after an interruption; the file is only moved
+        into place once verified.
+        """
+        local_data_file = self.config.local_data_file
+        if os.path.exists(local_data_file):
+            if self.verify(local_data_file):
+                logger.info(f"File already exists of size: {get_size(Path(local_data_file))}")
+                return
+            os.remove(local_data_file)
+
+        part_file = f"{local_data_file}.part"
+        errors = []
+        for source in self.sources():
+            try:
+                self.fetch(source, part_file)
+            except (OSError, urllib.error.URLError) as e:
+                errors.append(f"{source}: {e}")
+                continue
+            if self.verify(part_file):
+                os.replace(part_file, local_data_file)
+                logger.info(f"File : {local_data_file} downloaded from {source}, "
+                            f"size: {get_size(Path(local_data_file))}")
+                return
+            os.remove(part_file)
+            errors.append(f"{source}: checksum mismatch")
+        raise RuntimeError(f"Could not download {local_data_file}: {'; '.join(errors)}")
+
+    def fetch(self, source, part_file):
+        """Copy or download `source` into `part_file`, retrying (and resuming) on errors."""
+        path = self.local_path(source)
+        for attempt in range(1, self.config.retries + 1):
+            try:
+                if path is not None:
+                    return self.copy_local(path, part_file)
+                return self.stream(source, part_file)
+            except (OSError, urllib.error.URLError) as e:
+                logger.warning(f"Fetching {source} failed (attempt {attempt}/{self.config.retries}): {e}")
+                if attempt == self.config.retries or path is not None:
+                    raise
+
+    @staticmethod
+    def crc32(path):
+        crc = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                crc = zlib.crc32(chunk, crc)
+        return crc
+
     def extract_zip_file(self):
+        """Extract the members that are missing or differ (size, then CRC) on disk."""
         unzip_path = self.config.unzip_dir
         os.makedirs(unzip_path, exist_ok=True)
+        root = os.path.realpath(unzip_path)
+        extracted, unchanged = 0, 0
         with zipfile.ZipFile(self.config.local_data_file, 'r') as zip_ref:
-            zip_ref.extractall(unzip_path)
-        logger.info(f"File extracted at : {unzip_path}")
\ No newline at end of file
+            for member in zip_ref.infolist():
+                target = os.path.realpath(os.path.join(unzip_path, member.filename))
+                if os.path.commonpath([root, target]) != root:
+                    raise ValueError(f"Refusing to extract {member.filename} outside {unzip_path}")
+                if member.is_dir():
+                    continue
+                if (os.path.isfile(target) and os.path.getsize(target) == member.file_size
+                        and self.crc32(target) == member.CRC):
+                    unchanged += 1
+                    continue
+                zip_ref.extract(member, unzip_path)
+                extracted += 1
+        logger.info(f"File extracted at : {unzip_path} ({extracted} members extracted, {unchanged} unchanged)")
@@ -1,30 +1,119 @@
-import os 
+import os
+import json
+import time
+import numpy as np
+import pyarrow.compute as pc
+from pathlib import Path
 from text_summarizer.logging import logger
-from transformers import AutoTokenizer
-from datasets import load_dataset, load_from_disk
+from datasets import DatasetDict, load_dataset, load_from_disk
+from datasets.fingerprint import Hasher
+from transformers.utils import cached_file
 from text_summarizer.entity import DataTransformationConfig
+from text_summarizer.utils.common import hash_path
+from text_summarizer.utils.model_registry import load_tokenizer
+
+
+# Files a tokenizer is built from, besides its own vocabulary files
+TOKENIZER_FILES = ("tokenizer_config.json", "special_tokens_map.json", "added_tokens.json")
 
 class DataTransformation:
     def __init__(self, config: DataTransformationConfig):
         self.config = config 
-        self.tokenizer = AutoTokenizer.from_pretrained(self.config.tokenizer_name)
+        self.tokenizer = load_tokenizer(self.config.tokenizer_name)
+        self.output_path = os.path.join(self.config.root_dir, "samsum_dataset")
 
 
     def convert_examples_to_features(self, example_batch):
-        input_encodings = self.tokenizer(example_batch['dialogue'] , max_length = 1024, truncation = True )
+        input_encodings = self.tokenizer(example_batch['dialogue'] , max_length = self.config.max_input_length, truncation = True )
 
         with self.tokenizer.as_target_tokenizer():
-            target_encodings = self.tokenizer(example_batch['summary'], max_length = 128, truncation = True )
+            target_encodings = self.tokenizer(example_batch['summary'], max_length = self.config.max_target_length, truncation = True )
 
         return {
             'input_ids' : input_encodings['input_ids'],
             'attention_mask': input_encodings['attention_mask'],
             'labels': target_encodings['input_ids']
         }
-    
+
+    def tokenizer_hash(self):
+        """Hash of the files the tokenizer was loaded from.
+
+        The tokenizer object itself is shared through the model registry and
+        its truncation/padding state changes with every call, so hashing it
+        would tell runs apart that tokenize identically.
+        """
+        names = sorted({*TOKENIZER_FILES, *self.tokenizer.vocab_files_names.values()})
+        hashes = {}
+        for name in names:
+            # A local directory or the hub cache; files the tokenizer doesn't have are None
+            path = cached_file(self.config.tokenizer_name, name, _raise_exceptions_for_missing_entries=False,
+                               _raise_exceptions_for_connection_errors=False)
+            if path is not None:
+                hashes[name] = hash_path(Path(path))
+        return Hasher.hash(hashes)
+
+    def fingerprint(self, dataset):
+        """Identity of a transformation run: input data, tokenizer and max lengths."""
+        return {
+            "splits": {split: dataset[split]._fingerprint for split in dataset},
+            "tokenizer": self.config.tokenizer_name,
+            "tokenizer_hash": self.tokenizer_hash(),
+            "max_input_length": self.config.max_input_length,
+            "max_target_length": self.config.max_target_length,
+        }
+
+    def is_up_to_date(self, fingerprint):
+        if not (os.path.exists(self.config.manifest_file) and os.path.exists(self.output_path)):
+            return False
+        with open(self.config.manifest_file) as f:
+            return json.load(f).get("fingerprint") == fingerprint
+
+    @staticmethod
+    def length_stats(column, max_length):
+        """Token-length summary of a list column, computed on the Arrow data."""
+        lengths = pc.list_value_length(column).to_numpy(zero_copy_only=False)
+        if len(lengths) == 0:
+            return {"count": 0}
+        return {
+            "count": int(len(lengths)),
+            "mean": float(lengths.mean()),
+            "p50": float(np.percentile(lengths, 50)),
+            "p95": float(np.percentile(lengths, 95)),
+            "max": int(lengths.max()),
+            "truncated": float((lengths >= max_length).mean()),
+        }
+
     def convert(self): 
         dataset_samsum = load_from_disk(self.config.data_path)
-        dataset_samsum_pt = dataset_samsum.map(
-            self.convert_examples_to_features, 
-            batched = True)
-        dataset_samsum_pt.save_to_disk(os.path.join(self.config.root_dir, "samsum_dataset"))
\ No newline at end of file
+        fingerprint = self.fingerprint(dataset_samsum)
+        if self.is_up_to_date(fingerprint):
+            logger.info(f"Tokenized dataset is up to date: {self.output_path}")
+            return
+
+        num_proc = max(1, min(self.config.num_proc, os.cpu_count() or 1))
+        dataset_samsum_pt, stats = {}, {}
+        for split, dataset in dataset_samsum.items():
+            started = time.perf_counter()
+            dataset_samsum_pt[split] = dataset.map(
+                self.convert_examples_to_features,
+                batched = True,
+                batch_size = self.config.batch_size,
+                # Small splits aren't worth a process pool
+                num_proc = num_proc if len(dataset) >= num_proc * self.config.batch_size else None,
+                desc = f"Tokenizing {split}")
+            table = dataset_samsum_pt[split].data
+            stats[split] = {
+                "seconds": time.perf_counter() - started,
+                "input_tokens": self.length_stats(table.column("input_ids"), self.config.max_input_length),
+                "label_tokens": self.length_stats(table.column("labels"), self.config.max_target_length),
+            }
+            inputs = stats[split]["input_tokens"]
+            logger.info(f"Tokenized {split}: {len(dataset)} rows in {stats[split]['seconds']:.1f}s, "
+                        f"input tokens p50/p95/max {inputs.get('p50')}/{inputs.get('p95')}/{inputs.get('max')}, "
+                        f"{inputs.get('truncated', 0):.1%} truncated")
+        DatasetDict(dataset_samsum_pt).save_to_disk(self.output_path)
+
+        with open(self.config.manifest_file, "w") as f:
+            json.dump({"fingerprint": fingerprint, "num_proc": num_proc,
+                       "batch_size": self.config.batch_size, "stats": stats}, f, indent=2)
+        logger.info(f"Tokenization stats saved to: {self.config.manifest_file}")
@@ -1,16 +1,31 @@
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 from datasets import load_dataset, load_from_disk
-import evaluate
 import torch
 import pandas as pd
+import numpy as np
 from tqdm import tqdm
 from text_summarizer.logging import logger
 from text_summarizer.entity import ModelEvaluationConfig
-from peft import PeftModel
+from text_summarizer.utils.common import hash_path
+from text_summarizer.components.model_scoring import PREDICTION_COLUMNS, load_predictions
+from text_summarizer.utils.arrow_collator import ArrowSeq2SeqCollator, list_lengths
+from text_summarizer.utils.model_registry import load_model, load_peft_model, load_tokenizer
+from pathlib import Path
+import multiprocessing
+import random
+import time
+import json
+import os
+
+
+def _generate_shard(config, worker_id, indices):
+    """Entry point of an evaluation worker process (must be importable for spawn)."""
+    ModelEvaluation(config).generate_shard(worker_id, indices)
 
 class ModelEvaluation:
     def __init__(self, config: ModelEvaluationConfig):
         self.config = config
+        # Decoding settings of the configured preset; recorded with every prediction
+        self.gen_kwargs = dict(config.gen_kwargs)
 
 
     
@@ -21,44 +36,57 @@ class ModelEvaluation:
             yield list_of_elements[i : i + batch_size]
 
     
-    def calculate_metric_on_test_ds(self,dataset, metric, model, tokenizer, 
-                               batch_size=16, device="cuda" if torch.cuda.is_available() else "cpu", 
-                               column_text="article", 
-                               column_summary="highlights"):
-        article_batches = list(self.generate_batch_sized_chunks(dataset[column_text], batch_size))
-        target_batches = list(self.generate_batch_sized_chunks(dataset[column_summary], batch_size))
-
-        for article_batch, target_batch in tqdm(
-            zip(article_batches, target_batches), total=len(article_batches)):
-            
-            inputs = tokenizer(article_batch, max_length=1024,  truncation=True, 
-                            padding="max_length", return_tensors="pt")
-            
-            summaries = model.generate(input_ids=inputs["input_ids"].to(device),
-                            attention_mask=inputs["attention_mask"].to(device), 
-                            length_penalty=0.8, num_beams=8, max_length=128)
-            ''' parameter for length penalty ensures that the model does not generate sequences that are too long. '''
-            
-            # Finally, we decode the generated texts, 
-            # replace the  token, and add the decoded texts with the references to the metric.
-            decoded_summaries = [tokenizer.decode(s, skip_special_tokens=True, 
-                                    clean_up_tokenization_spaces=True) 
-                for s in summaries]      
-            
-            decoded_summaries = [d.replace("", " ") for d in decoded_summaries]
-            
-            
-            metric.add_batch(predictions=decoded_summaries, references=target_batch)
-            
-        #  Finally compute and return the ROUGE scores.
-        score = metric.compute()
-        return score
+    def generate_batch(self, inputs, model, tokenizer, device):
+        """Generate for one padded batch; returns the decoded summaries and the seconds taken."""
+        started = time.perf_counter()
+        summaries = model.generate(input_ids=inputs["input_ids"].to(device),
+                        attention_mask=inputs["attention_mask"].to(device), 
+                        **self.gen_kwargs)
+        ''' parameter for length penalty ensures that the model does not generate sequences that are too long. '''
+        elapsed = time.perf_counter() - started
+        
+        # Finally, we decode the generated texts, 
+        # replace the  token, and add the decoded texts with the references to the metric.
+        decoded_summaries = [tokenizer.decode(s, skip_special_tokens=True, 
+                                clean_up_tokenization_spaces=True) 
+            for s in summaries]      
+        
+        decoded_summaries = [d.replace("", " ") for d in decoded_summaries]
+        return decoded_summaries, elapsed
 
 
-    def evaluate(self):
-        import os
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        tokenizer = AutoTokenizer.from_pretrained(self.config.tokenizer_path)
+    def generate_summaries_from_dataset(self, dataset, indices, model, tokenizer, batch_size=16,
+                                        device="cuda" if torch.cuda.is_available() else "cpu",
+                                        pad_to_multiple_of=8, on_batch=None):
+        """Summarize rows `indices` of a pre-tokenized dataset from its `input_ids`.
+
+        Rows are batched longest-first (lengths come from the Arrow offsets)
+        and each batch is taken from the memory-mapped table and padded by
+        `ArrowSeq2SeqCollator`, so nothing is re-tokenized and memory grows
+        with the batch size, not the split size. `on_batch(positions,
+        summaries, seconds, rows)` is called after each batch with positions
+        into `indices` and the batch's Arrow rows.
+        """
+        collator = ArrowSeq2SeqCollator(tokenizer.pad_token_id, pad_to_multiple_of=pad_to_multiple_of)
+        rows = dataset.with_format("arrow")
+        lengths = list_lengths(dataset.data.column("input_ids"))[indices]
+        order = np.argsort(-lengths, kind="stable").tolist()
+        position_batches = list(self.generate_batch_sized_chunks(order, batch_size))
+
+        predictions = [None] * len(indices)
+        for position_batch in tqdm(position_batches, total=len(position_batches)):
+            batch = rows[[indices[p] for p in position_batch]]
+            decoded_summaries, elapsed = self.generate_batch(collator(batch), model, tokenizer, device)
+            for p, decoded in zip(position_batch, decoded_summaries):
+                predictions[p] = decoded
+            if on_batch is not None:
+                on_batch(position_batch, decoded_summaries, elapsed, batch)
+
+        return predictions
+
+    
+    def load_model(self, device):
+        tokenizer = load_tokenizer(self.config.tokenizer_path)
         
         # Try to load as LoRA model, fallback to base model if adapter not found
         adapter_config_path = os.path.join(self.config.model_path, "adapter_config.json")
@@ -66,40 +94,127 @@ class ModelEvaluation:
         if os.path.exists(adapter_config_path):
             # LoRA model exists - load base model and merge with LoRA weights
             logger.info("Loading model with LoRA adapters...")
-            base_model = AutoModelForSeq2SeqLM.from_pretrained(self.config.model_path)
-            model = PeftModel.from_pretrained(base_model, self.config.model_path).to(device)
+            model = load_peft_model(self.config.model_path).to(device)
             model_name = "pegasus-lora"
             logger.info("LoRA model loaded successfully!")
         else:
             # No LoRA adapter - use standard model
             logger.info("No LoRA adapters found. Loading standard model...")
-            model = AutoModelForSeq2SeqLM.from_pretrained(self.config.model_path).to(device)
+            model = load_model(self.config.model_path).to(device)
             model_name = "pegasus"
             logger.info("Standard model loaded successfully!")
-       
-        #loading data 
-        dataset_samsum_pt = load_from_disk(self.config.data_path)
-
-
-        rouge_names = ["rouge1", "rouge2", "rougeL", "rougeLsum"]
-  
-        rouge_metric = evaluate.load('rouge')
-
-        score = self.calculate_metric_on_test_ds(
-        dataset_samsum_pt['test'][0:10], rouge_metric, model, tokenizer, batch_size = 2, column_text = 'dialogue', column_summary= 'summary'
-            )
-
-        # Handle different ROUGE score formats (newer versions return float directly)
-        rouge_dict = {}
-        for rn in rouge_names:
-            if hasattr(score[rn], 'mid'):
-                # Old format: score[rn].mid.fmeasure
-                rouge_dict[rn] = score[rn].mid.fmeasure
-            else:
-                # New format: score[rn] is already a float
-                rouge_dict[rn] = score[rn]
-
-        df = pd.DataFrame(rouge_dict, index = [model_name] )
-        df.to_csv(self.config.metric_file_name, index=False)
-        
-        logger.info(f"Evaluation metrics saved to: {self.config.metric_file_name}")
+        return model, tokenizer, model_name
+
+
+    def select_test_indices(self, num_rows):
+        """Rows of the test split to evaluate, according to `eval_mode`.
+
+        quick: the first 10 rows; sample: `sample_size` rows drawn with
+        `seed`; full: the whole split.
+
+        Raises:
+            ValueError: an unknown `eval_mode`
+        """
+        if self.config.eval_mode == "full":
+            return list(range(num_rows))
+        if self.config.eval_mode == "sample":
+            sample_size = min(self.config.sample_size, num_rows)
+            return sorted(random.Random(self.config.seed).sample(range(num_rows), sample_size))
+        if self.config.eval_mode == "quick":
+            return list(range(min(10, num_rows)))
+        raise ValueError(f"Unknown eval_mode: {self.config.eval_mode!r} (expected quick, sample or full)")
+
+
+    def load_predictions(self):
+        """All predictions written so far by any worker, as one DataFrame."""
+        return load_predictions(self.config.predictions_dir)
+
+
+    def prepare_checkpoints(self):
+        """Reuse checkpoints only if they were produced by the same model and settings.
+
+        A run manifest records the hash of the model directory and the
+        generation params; when either differs the old predictions are
+        discarded.
+        """
+        os.makedirs(self.config.predictions_dir, exist_ok=True)
+        manifest_path = os.path.join(self.config.predictions_dir, "run.json")
+        manifest = {"model_hash": hash_path(Path(self.config.model_path)),
+                    "gen_kwargs": self.gen_kwargs}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                if json.load(f) == manifest:
+                    return
+            logger.info("Model or generation params changed since the last evaluation run, "
+                        "discarding checkpoints")
+            for name in os.listdir(self.config.predictions_dir):
+                if name.startswith("part-"):
+                    os.remove(os.path.join(self.config.predictions_dir, name))
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+
+    def generate_shard(self, worker_id, indices):
+        """Summarize test rows `indices`, checkpointing them as Parquet parts of this worker."""
+        if self.config.torch_threads_per_worker > 0:
+            torch.set_num_threads(self.config.torch_threads_per_worker)
+        done = set(self.load_predictions()["id"])
+        indices = [i for i in indices if i not in done]
+        if not indices:
+            return
+        logger.info(f"Worker {worker_id}: {len(indices)} examples to summarize")
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model, tokenizer, _ = self.load_model(device)
+        test_split = load_from_disk(self.config.data_path)["test"]
+        gen_params = json.dumps(self.gen_kwargs, sort_keys=True)
+
+        pending = []
+        def checkpoint(positions, summaries, seconds, rows=None, flush=False):
+            # Batch time is split evenly over the examples generated together
+            latency_ms = 1000 * seconds / max(len(positions), 1)
+            if rows is not None:
+                sources, references = rows.column("dialogue").to_pylist(), rows.column("summary").to_pylist()
+                pending.extend({"id": indices[p], "source": source, "reference": reference,
+                                "prediction": s, "gen_params": gen_params, "latency_ms": latency_ms}
+                               for p, s, source, reference in zip(positions, summaries, sources, references))
+            if pending and (flush or len(pending) >= self.config.checkpoint_every * self.config.batch_size):
+                # Each flush is a new immutable part, so a crash never corrupts earlier ones
+                part = os.path.join(self.config.predictions_dir,
+                                    f"part-{worker_id}-{time.time_ns()}.parquet")
+                pd.DataFrame(pending, columns=PREDICTION_COLUMNS).to_parquet(part + ".tmp", index=False)
+                os.replace(part + ".tmp", part)
+                pending.clear()
+
+        self.generate_summaries_from_dataset(test_split, indices, model, tokenizer,
+                                             batch_size=self.config.batch_size, device=device,
+                                             on_batch=checkpoint)
+        checkpoint([], [], 0, flush=True)
+
+
+    def evaluate(self):
+        """Generate predictions for the selected test rows.
+
+        Predictions are written to `predictions_dir` (see `PREDICTION_COLUMNS`);
+        ROUGE is computed from them by the separate scoring step.
+        """
+        test_split = load_from_disk(self.config.data_path)["test"]
+        indices = self.select_test_indices(len(test_split))
+        logger.info(f"Evaluating {len(indices)} test examples ({self.config.eval_mode} mode) "
+                    f"with {self.config.num_workers} worker(s)")
+
+        # Generated summaries are checkpointed to disk, so an interrupted run resumes
+        self.prepare_checkpoints()
+        if self.config.num_workers > 1:
+            # Interleaved shards keep the length mix (and runtime) of workers balanced
+            shards = [(self.config, worker_id, indices[worker_id::self.config.num_workers])
+                      for worker_id in range(self.config.num_workers)]
+            with multiprocessing.get_context("spawn").Pool(self.config.num_workers) as pool:
+                pool.starmap(_generate_shard, shards)
+        else:
+            self.generate_shard(0, indices)
+
+        # Rows of this run; the predictions dir may also hold rows of earlier, larger runs
+        with open(os.path.join(self.config.predictions_dir, "selection.json"), "w") as f:
+            json.dump(indices, f)
+        logger.info(f"Predictions saved to: {self.config.predictions_dir}")
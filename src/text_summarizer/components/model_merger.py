@@ -0,0 +1,66 @@
+import os
+import json
+from pathlib import Path
+from text_summarizer.logging import logger
+from text_summarizer.entity import ModelMergerConfig
+from text_summarizer.utils.common import hash_path
+from text_summarizer.utils.model_registry import registry, load_peft_model, load_tokenizer
+
+
+class ModelMerger:
+    """Fold the trained LoRA adapters into the base weights.
+
+    The merged checkpoint is a plain seq2seq model: inference no longer
+    runs the extra LoRA matmuls on every forward pass and loading skips
+    PEFT entirely. A manifest records the hash of the adapter it was built
+    from (so an unchanged adapter is not merged again) and the content
+    hash of the merged checkpoint.
+    """
+
+    def __init__(self, config: ModelMergerConfig):
+        self.config = config
+
+    def read_manifest(self):
+        if not os.path.exists(self.config.manifest_file):
+            return None
+        with open(self.config.manifest_file) as f:
+            return json.load(f)
+
+    def merge(self):
+        adapter_config_path = os.path.join(self.config.adapter_path, "adapter_config.json")
+        if not os.path.exists(adapter_config_path):
+            logger.info(f"No LoRA adapter at {self.config.adapter_path}, nothing to merge")
+            return None
+
+        adapter_hash = hash_path(Path(self.config.adapter_path))
+        manifest = self.read_manifest()
+        if (manifest is not None and manifest["adapter_hash"] == adapter_hash
+                and os.path.exists(self.config.merged_model_path)):
+            logger.info(f"Merged model is up to date: {self.config.merged_model_path}")
+            return manifest
+
+        with open(adapter_config_path) as f:
+            base_ckpt = json.load(f).get("base_model_name_or_path") or self.config.base_model_ckpt
+        logger.info(f"Merging LoRA adapter {self.config.adapter_path} into {base_ckpt}")
+        # The model just trained (or evaluated) in this process, if any
+        model = load_peft_model(self.config.adapter_path, base_ckpt)
+        # Merging rewrites the base weights in place; no other stage may reuse it
+        registry.detach(model)
+        merged_model = model.merge_and_unload()
+
+        merged_model.save_pretrained(self.config.merged_model_path, safe_serialization=True)
+        # Ship the tokenizer alongside so the checkpoint is self-contained
+        tokenizer_source = self.config.tokenizer_path if os.path.exists(self.config.tokenizer_path) else base_ckpt
+        load_tokenizer(tokenizer_source).save_pretrained(self.config.merged_model_path)
+
+        manifest = {
+            "base_model": base_ckpt,
+            "adapter_hash": adapter_hash,
+            "merged_model_path": self.config.merged_model_path,
+            "merged_model_hash": hash_path(Path(self.config.merged_model_path)),
+        }
+        with open(self.config.manifest_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Merged model saved to: {self.config.merged_model_path} "
+                    f"(sha256 {manifest['merged_model_hash'][:16]})")
+        return manifest
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import torch
+import pandas as pd
+from pathlib import Path
+from datasets import load_from_disk
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, GenerationConfig
+from text_summarizer.logging import logger
+from text_summarizer.entity import ModelQuantizationConfig
+from text_summarizer.utils.common import hash_path
+from text_summarizer.utils.model_registry import registry, load_model, load_peft_model, load_tokenizer
+from text_summarizer.components.model_scoring import ROUGE_NAMES, rouge_scores
+
+
+QUANTIZED_WEIGHTS_NAME = "quantized_int8.pt"
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations
+    quantized on the fly). CPU only."""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def bf16_supported():
+    """True when the CPU has native bfloat16 kernels (oneDNN with AVX512-BF16 or
+    AMX); elsewhere bf16 matmuls are emulated and slower than fp32."""
+    return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+
+
+def load_quantized_model(path):
+    """Rebuild a model exported by `ModelQuantizer.export` from `path`."""
+    model = AutoModelForSeq2SeqLM.from_config(AutoConfig.from_pretrained(path))
+    model = quantize_int8(model.eval())
+    # Packed int8 params are not plain tensors, so the weights-only loader can't read them
+    state_dict = torch.load(os.path.join(path, QUANTIZED_WEIGHTS_NAME), weights_only=False)
+    model.load_state_dict(state_dict)
+    if os.path.exists(os.path.join(path, "generation_config.json")):
+        model.generation_config = GenerationConfig.from_pretrained(path)
+    return model.eval()
+
+
+def model_size_mb(model):
+    """Size of the model's state dict as serialized by torch.save, in MB."""
+    total = 0
+    for value in model.state_dict().values():
+        if isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):
+            # Packed quantized Linear params: (weight, bias)
+            total += sum(t.numel() * t.element_size() for t in value if isinstance(t, torch.Tensor))
+    return total / 2**20
+
+
+class ModelQuantizer:
+    """Export a dynamic int8 copy of the trained model and measure its ROUGE cost.
+
+    The fp32 source is the merged checkpoint when it exists, otherwise the
+    base model with the LoRA adapter merged in memory.
+    """
+
+    def __init__(self, config: ModelQuantizationConfig):
+        self.config = config
+
+    def load_fp32_model(self):
+        # quantize_int8 copies the model, so the fp32 one can stay shared
+        if os.path.exists(self.config.merged_model_path):
+            return load_model(self.config.merged_model_path), self.config.merged_model_path
+        adapter_config_path = os.path.join(self.config.adapter_path, "adapter_config.json")
+        if not os.path.exists(adapter_config_path):
+            return load_model(self.config.adapter_path), self.config.adapter_path
+        model = load_peft_model(self.config.adapter_path, self.config.base_model_ckpt)
+        registry.detach(model)
+        return model.merge_and_unload(), self.config.adapter_path
+
+    def export(self):
+        model, source_path = self.load_fp32_model()
+        quantized = quantize_int8(model.eval())
+
+        os.makedirs(self.config.quantized_model_path, exist_ok=True)
+        model.config.save_pretrained(self.config.quantized_model_path)
+        model.generation_config.save_pretrained(self.config.quantized_model_path)
+        weights_path = os.path.join(self.config.quantized_model_path, QUANTIZED_WEIGHTS_NAME)
+        torch.save(quantized.state_dict(), weights_path)
+
+        manifest = {
+            "source_model_path": source_path,
+            "source_model_hash": hash_path(Path(source_path)),
+            "quantized_model_hash": hash_path(Path(weights_path)),
+            "fp32_size_mb": model_size_mb(model),
+            "int8_size_mb": model_size_mb(quantized),
+        }
+        with open(os.path.join(self.config.quantized_model_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Quantized model saved to: {self.config.quantized_model_path} "
+                    f"({manifest['fp32_size_mb']:.0f} MB -> {manifest['int8_size_mb']:.0f} MB)")
+        return model, quantized
+
+    def summarize(self, model, tokenizer, texts, gen_kwargs):
+        summaries, started = [], time.perf_counter()
+        for i in range(0, len(texts), self.config.batch_size):
+            inputs = tokenizer(texts[i : i + self.config.batch_size], max_length=1024, truncation=True,
+                               padding="longest", return_tensors="pt")
+            with torch.inference_mode():
+                output = model.generate(input_ids=inputs["input_ids"],
+                                        attention_mask=inputs["attention_mask"], **gen_kwargs)
+            summaries.extend(tokenizer.batch_decode(output, skip_special_tokens=True,
+                                                    clean_up_tokenization_spaces=True))
+        return summaries, time.perf_counter() - started
+
+    def check_accuracy(self, fp32_model, int8_model):
+        """ROUGE of the int8 model vs the fp32 model on the validation split."""
+        tokenizer = load_tokenizer(self.config.tokenizer_path)
+        validation = load_from_disk(self.config.data_path)["validation"]
+        rows = validation.select(range(min(self.config.num_samples, len(validation))))
+        texts, references = list(rows["dialogue"]), list(rows["summary"])
+
+        report = {"samples": len(texts), "gen_kwargs": self.config.gen_kwargs}
+        for name, model in [("fp32", fp32_model), ("int8", int8_model)]:
+            summaries, seconds = self.summarize(model, tokenizer, texts, self.config.gen_kwargs)
+            rouge = pd.DataFrame(rouge_scores(summaries, references))[ROUGE_NAMES].mean()
+            report[name] = {"seconds": seconds, "size_mb": model_size_mb(model), **rouge.to_dict()}
+        report["rouge_drop"] = {rn: report["fp32"][rn] - report["int8"][rn] for rn in ROUGE_NAMES}
+        report["speedup"] = report["fp32"]["seconds"] / report["int8"]["seconds"]
+        report["passed"] = max(report["rouge_drop"].values()) <= self.config.max_rouge_drop
+
+        with open(self.config.report_file, "w") as f:
+            json.dump(report, f, indent=2)
+        log = logger.info if report["passed"] else logger.warning
+        log(f"int8 vs fp32 on {len(texts)} validation examples: rouge drop {report['rouge_drop']}, "
+            f"speedup {report['speedup']:.2f}x (max allowed drop {self.config.max_rouge_drop})")
+        return report
+
+    def quantize(self):
+        fp32_model, int8_model = self.export()
+        return self.check_accuracy(fp32_model, int8_model)
@@ -0,0 +1,101 @@
+from concurrent.futures import ProcessPoolExecutor
+from rouge_score import rouge_scorer
+import multiprocessing
+import pandas as pd
+import hashlib
+import json
+import os
+from text_summarizer.logging import logger
+from text_summarizer.entity import ModelScoringConfig
+from pathlib import Path
+
+
+ROUGE_NAMES = ["rouge1", "rouge2", "rougeL", "rougeLsum"]
+
+# Schema of the predictions written by the evaluation stage
+PREDICTION_COLUMNS = ["id", "source", "reference", "prediction", "gen_params", "latency_ms"]
+
+
+def load_predictions(predictions_dir):
+    """Read every Parquet part under `predictions_dir` into one DataFrame."""
+    parts = sorted(Path(predictions_dir).glob("part-*.parquet")) if os.path.isdir(predictions_dir) else []
+    if not parts:
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+    predictions = pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+    return predictions.drop_duplicates("id", keep="last")
+
+
+def rouge_scores(predictions, references):
+    """Per-row ROUGE F-measures (also the unit of work of a scoring process)."""
+    scorer = rouge_scorer.RougeScorer(ROUGE_NAMES)
+    scores = [scorer.score(reference, prediction)
+              for prediction, reference in zip(predictions, references)]
+    return [{rn: score[rn].fmeasure for rn in ROUGE_NAMES} for score in scores]
+
+
+class ModelScoring:
+    """Compute ROUGE from the predictions written by `ModelEvaluation`.
+
+    Per-row scores are kept in `scores_file` together with a hash of the
+    prediction and reference they were computed from, so a rerun only
+    scores rows that are new or changed. `rouge_score` has no batched API:
+    the rows of a chunk are scored one by one, and only the chunks run in
+    parallel, across `num_workers` processes. The reported metrics are the
+    mean per-row F-measures over the rows of the latest evaluation run.
+    """
+
+    def __init__(self, config: ModelScoringConfig):
+        self.config = config
+
+    @staticmethod
+    def row_hash(row_id, prediction, reference):
+        return hashlib.sha1(json.dumps([int(row_id), prediction, reference]).encode("utf-8")).hexdigest()
+
+    def score_rows(self, predictions, references):
+        """Score rows in chunks spread across `num_workers` processes."""
+        chunks = [(predictions[i : i + self.config.chunk_size], references[i : i + self.config.chunk_size])
+                  for i in range(0, len(predictions), self.config.chunk_size)]
+        if self.config.num_workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.config.num_workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = pool.map(rouge_scores, *zip(*chunks))
+        else:
+            results = [rouge_scores(*chunk) for chunk in chunks]
+        return pd.DataFrame([row for chunk in results for row in chunk], columns=ROUGE_NAMES)
+
+    def score(self):
+        predictions = load_predictions(self.config.predictions_dir)
+        if predictions.empty:
+            raise FileNotFoundError(f"No predictions found in: {self.config.predictions_dir}")
+        predictions["row_hash"] = [self.row_hash(i, p, r) for i, p, r in
+                                   zip(predictions["id"], predictions["prediction"], predictions["reference"])]
+
+        if os.path.exists(self.config.scores_file):
+            scores = pd.read_parquet(self.config.scores_file)
+        else:
+            scores = pd.DataFrame(columns=["id", "row_hash"] + ROUGE_NAMES)
+
+        # Only rows that are new, or whose prediction changed, need scoring
+        new_rows = predictions[~predictions["row_hash"].isin(set(scores["row_hash"]))]
+        logger.info(f"Scoring {len(new_rows)} new of {len(predictions)} predictions")
+        if len(new_rows):
+            new_scores = self.score_rows(new_rows["prediction"].tolist(), new_rows["reference"].tolist())
+            new_scores.insert(0, "row_hash", new_rows["row_hash"].tolist())
+            new_scores.insert(0, "id", new_rows["id"].tolist())
+            scores = pd.concat([scores, new_scores], ignore_index=True) if len(scores) else new_scores
+            scores = scores.drop_duplicates("row_hash", keep="last")
+            scores.to_parquet(self.config.scores_file, index=False)
+
+        # Report on the rows of the latest evaluation run
+        selection_path = os.path.join(self.config.predictions_dir, "selection.json")
+        if os.path.exists(selection_path):
+            with open(selection_path) as f:
+                predictions = predictions[predictions["id"].isin(set(json.load(f)))]
+        current = scores[scores["row_hash"].isin(set(predictions["row_hash"]))]
+        rouge_dict = current[ROUGE_NAMES].astype(float).mean().to_dict()
+
+        df = pd.DataFrame(rouge_dict, index=[0])
+        df.to_csv(self.config.metric_file_name, index=False)
+        logger.info(f"ROUGE over {len(current)} examples: {rouge_dict}")
+        logger.info(f"Evaluation metrics saved to: {self.config.metric_file_name}")
+        return rouge_dict
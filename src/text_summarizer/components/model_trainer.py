@@ -7,21 +7,58 @@ os.environ['PYTORCH_DISABLE_MPS'] = '1'
 os.environ['PYTORCH_ENABLE_MPS_FALLBACK'] = '0'
 
 from transformers import TrainingArguments, Trainer
-from transformers import DataCollatorForSeq2Seq
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from transformers import AutoModelForSeq2SeqLM
 from datasets import load_dataset, load_from_disk
 from text_summarizer.entity import ModelTrainerConfig
 from peft import get_peft_model, LoraConfig, TaskType
 import torch
+import json
+import time
 from inspect import signature
+from text_summarizer.logging import logger
+from text_summarizer.utils.arrow_collator import ArrowSeq2SeqCollator, list_lengths
+from text_summarizer.utils.model_registry import registry, load_tokenizer
+
+
+class ThroughputTrainer(Trainer):
+    """Trainer that counts the samples and real/padded tokens of every training batch."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.throughput = {"samples": 0, "tokens": 0, "padded_tokens": 0}
+
+    def training_step(self, model, inputs, *args, **kwargs):
+        labels = inputs["labels"]
+        self.throughput["samples"] += inputs["input_ids"].shape[0]
+        self.throughput["tokens"] += int(inputs["attention_mask"].sum()) + int((labels != -100).sum())
+        self.throughput["padded_tokens"] += inputs["input_ids"].numel() + labels.numel()
+        return super().training_step(model, inputs, *args, **kwargs)
 
 
 class ModelTrainer:
+    MODES = ("fast", "config")
+
     def __init__(self, config: ModelTrainerConfig):
+        if config.mode not in self.MODES:
+            raise ValueError(f"Unknown training mode: {config.mode!r} (expected fast or config)")
         self.config = config
 
+    def report_throughput(self, counts, seconds):
+        report = {
+            "mode": self.config.mode,
+            "seconds": seconds,
+            **counts,
+            "samples_per_sec": counts["samples"] / seconds,
+            "tokens_per_sec": counts["tokens"] / seconds,
+            "padding_ratio": 1 - counts["tokens"] / max(counts["padded_tokens"], 1),
+        }
+        with open(self.config.throughput_file, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Trained on {counts['samples']} samples in {seconds:.1f}s: "
+                    f"{report['samples_per_sec']:.2f} samples/s, {report['tokens_per_sec']:.0f} tokens/s, "
+                    f"{report['padding_ratio']:.1%} padding")
+        return report
 
-    
     def train(self):
         # Reduce parallelism to avoid macOS segfaults with NumPy/Torch
         os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -31,7 +68,8 @@ class ModelTrainer:
             pass
 
         device = "cuda" if torch.cuda.is_available() else "cpu"
-        tokenizer = AutoTokenizer.from_pretrained(self.config.model_ckpt)
+        # Shared with the data transformation stage when run in the same process
+        tokenizer = load_tokenizer(self.config.model_ckpt)
         base_model = AutoModelForSeq2SeqLM.from_pretrained(
             self.config.model_ckpt,
             use_safetensors=True
@@ -51,7 +89,9 @@ class ModelTrainer:
         model_lora = get_peft_model(base_model, lora_config)
         model_lora.print_trainable_parameters()
         
-        seq2seq_data_collator = DataCollatorForSeq2Seq(tokenizer, model=model_lora)
+        # Pads the pre-tokenized columns straight from Arrow (no Python lists)
+        seq2seq_data_collator = ArrowSeq2SeqCollator(tokenizer.pad_token_id,
+                                                     pad_to_multiple_of=self.config.pad_to_multiple_of)
         
         #loading data 
         dataset_samsum_pt = load_from_disk(self.config.data_path)
@@ -65,62 +105,101 @@ class ModelTrainer:
         # ) 
 
 
-        # Build TrainingArguments - FAST MODE (1 hour target)
-        # Optimized for speed - good enough quality
-        args_dict = {
-            "output_dir": self.config.root_dir,
-            "num_train_epochs": 1,  # Single epoch - faster
-            "warmup_steps": 20,  # Minimal warmup
-            "per_device_train_batch_size": 1,
-            "per_device_eval_batch_size": 1,
-            "weight_decay": 0.01,
-            "logging_steps": 20,  # Log less frequently
-            "logging_strategy": "steps",
-            "save_steps": int(1e6),
-            "gradient_accumulation_steps": 1,  # Reduced from 4
-            "dataloader_num_workers": 0,
-            "report_to": "none",
-            "no_cuda": True,
-            "disable_tqdm": False,
-            "learning_rate": 5e-4,
-        }
-        if "evaluation_strategy" in signature(TrainingArguments).parameters:
-            args_dict["evaluation_strategy"] = "no"  # Disable eval during training (too slow)
+        if self.config.mode == "fast":
+            # Build TrainingArguments - FAST MODE (1 hour target)
+            # Optimized for speed - good enough quality
+            args_dict = {
+                "output_dir": self.config.root_dir,
+                "num_train_epochs": 1,  # Single epoch - faster
+                "warmup_steps": 20,  # Minimal warmup
+                "per_device_train_batch_size": 1,
+                "per_device_eval_batch_size": 1,
+                "weight_decay": 0.01,
+                "logging_steps": 20,  # Log less frequently
+                "logging_strategy": "steps",
+                "save_steps": int(1e6),
+                "gradient_accumulation_steps": 1,  # Reduced from 4
+                "dataloader_num_workers": 0,
+                "report_to": "none",
+                "no_cuda": True,
+                "disable_tqdm": False,
+                "learning_rate": 5e-4,
+            }
+            evaluation_strategy = "no"  # Disable eval during training (too slow)
+        else:  # config
+            # CONFIG MODE - every value from params.yaml; examples of similar
+            # length share a batch, so larger batches carry little padding
+            args_dict = {
+                "output_dir": self.config.root_dir,
+                "num_train_epochs": self.config.num_train_epochs,
+                "warmup_steps": self.config.warmup_steps,
+                "per_device_train_batch_size": self.config.per_device_train_batch_size,
+                "per_device_eval_batch_size": self.config.per_device_train_batch_size,
+                "weight_decay": self.config.weight_decay,
+                "logging_steps": self.config.logging_steps,
+                "logging_strategy": "steps",
+                "eval_steps": self.config.eval_steps,
+                "save_steps": int(float(self.config.save_steps)),
+                "gradient_accumulation_steps": self.config.gradient_accumulation_steps,
+                "group_by_length": self.config.group_by_length,
+                "dataloader_num_workers": 0,
+                "report_to": "none",
+                "no_cuda": True,
+                "disable_tqdm": False,
+                "learning_rate": self.config.learning_rate,
+            }
+            evaluation_strategy = self.config.evaluation_strategy
+        parameters = signature(TrainingArguments).parameters
+        if "evaluation_strategy" in parameters:
+            args_dict["evaluation_strategy"] = evaluation_strategy
+        elif "eval_strategy" in parameters:
+            args_dict["eval_strategy"] = evaluation_strategy
 
         trainer_args = TrainingArguments(**args_dict)
 
-        # Use minimal training data - 100 samples for quick training (~1 hour)
+        # Minimal training data by default (max_train_samples: 100, ~1 hour in fast mode)
         # This gives decent quality while keeping speed reasonable
-        train_size = min(100, len(dataset_samsum_pt["train"]))
-        eval_size = min(30, len(dataset_samsum_pt["validation"]))
+        train_size = min(self.config.max_train_samples or len(dataset_samsum_pt["train"]),
+                         len(dataset_samsum_pt["train"]))
+        eval_size = min(self.config.max_eval_samples or len(dataset_samsum_pt["validation"]),
+                        len(dataset_samsum_pt["validation"]))
         
         train_dataset = dataset_samsum_pt["train"].select(range(train_size))
         eval_dataset = dataset_samsum_pt["validation"].select(range(eval_size))
+        if trainer_args.group_by_length:
+            # Lengths from the Arrow offsets, so the sampler doesn't decode every row
+            train_dataset = train_dataset.add_column(
+                trainer_args.length_column_name,
+                list_lengths(train_dataset.with_format("arrow")["input_ids"]))
+        # Rows come out of the memory-mapped files as numpy views for the collator
+        columns = ["input_ids", "labels"]
+        train_dataset = train_dataset.with_format("numpy", columns=columns + (
+            [trainer_args.length_column_name] if trainer_args.group_by_length else []))
+        eval_dataset = eval_dataset.with_format("numpy", columns=columns)
         
         print(f"\n{'='*60}")
-        print(f"TRAINING CONFIGURATION (LoRA - FAST MODE - 1 Hour)")
+        print(f"TRAINING CONFIGURATION (LoRA - {self.config.mode.upper()} MODE)")
         print(f"{'='*60}")
         print(f"Training samples: {len(train_dataset)}")
         print(f"Evaluation samples: {len(eval_dataset)}")
-        print(f"Number of epochs: 1")
-        print(f"Warmup steps: 20")
-        print(f"Learning rate: 5e-4")
+        print(f"Number of epochs: {trainer_args.num_train_epochs}")
+        print(f"Warmup steps: {trainer_args.warmup_steps}")
+        print(f"Learning rate: {trainer_args.learning_rate}")
         print(f"LoRA rank: 16")
-        print(f"Gradient accumulation: 1 (disabled for speed)")
-        print(f"Evaluation during training: No (faster)")
-        print(f"\nESTIMATED TIME:")
-        print(f"  Training: ~50-60 minutes on CPU")
-        print(f"  Evaluation: ~5-10 minutes")
-        print(f"  Total: ~1 hour")
-        print(f"  Total: ~2.5-3.5 hours")
+        print(f"Batch size: {trainer_args.per_device_train_batch_size} "
+              f"(x{trainer_args.gradient_accumulation_steps} gradient accumulation)")
+        print(f"Length-grouped batches: {'Yes' if trainer_args.group_by_length else 'No'}")
+        print(f"Evaluation during training: {evaluation_strategy}")
         print(f"{'='*60}\n")
         
-        trainer = Trainer(model=model_lora, args=trainer_args,
+        trainer = ThroughputTrainer(model=model_lora, args=trainer_args,
                   tokenizer=tokenizer, data_collator=seq2seq_data_collator,
                   train_dataset=train_dataset, 
                   eval_dataset=eval_dataset)
         
+        started = time.perf_counter()
         trainer.train()
+        self.report_throughput(trainer.throughput, time.perf_counter() - started)
 
         # Ensure evaluation runs even if evaluation_strategy is unsupported
         try:
@@ -129,6 +208,11 @@ class ModelTrainer:
             pass
 
         ## Save LoRA model
-        model_lora.save_pretrained(os.path.join(self.config.root_dir,"pegasus-samsum-model"))
+        model_path = os.path.join(self.config.root_dir,"pegasus-samsum-model")
+        model_lora.save_pretrained(model_path)
         ## Save tokenizer
-        tokenizer.save_pretrained(os.path.join(self.config.root_dir,"tokenizer"))
\ No newline at end of file
+        tokenizer_path = os.path.join(self.config.root_dir,"tokenizer")
+        tokenizer.save_pretrained(tokenizer_path)
+        # Later stages in this process (evaluation, merging) reuse the trained model
+        registry.put("peft", model_path, model_lora.eval())
+        registry.put("tokenizer", tokenizer_path, tokenizer)
\ No newline at end of file
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import inspect
+import functools
+import torch
+from contextlib import contextmanager
+from pathlib import Path
+from datasets import load_from_disk
+from transformers import AutoModelForSeq2SeqLM
+from text_summarizer.logging import logger
+from text_summarizer.entity import OnnxExportConfig
+from text_summarizer.utils.common import hash_path
+from text_summarizer.utils.model_registry import load_tokenizer
+
+try:
+    import onnxruntime
+    from optimum.exporters.onnx import main_export
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+except ImportError:  # optional: only needed for the ONNX backend
+    onnxruntime = None
+
+
+def _require_onnxruntime():
+    if onnxruntime is None:
+        raise ImportError("The ONNX backend needs optimum and onnxruntime: "
+                          "pip install 'optimum[onnxruntime]'")
+
+
+@contextmanager
+def _torchscript_onnx_export():
+    """Make `torch.onnx.export` default to the TorchScript exporter that optimum
+    1.x is written for; torch >= 2.9 defaults to the dynamo exporter, which
+    can't produce the older opsets (e.g. 14) optimum asks for."""
+    export = torch.onnx.export
+    if "dynamo" not in inspect.signature(export).parameters:
+        yield
+        return
+
+    @functools.wraps(export)
+    def torchscript_export(*args, **kwargs):
+        kwargs.setdefault("dynamo", False)
+        return export(*args, **kwargs)
+
+    torch.onnx.export = torchscript_export
+    try:
+        yield
+    finally:
+        torch.onnx.export = export
+
+
+def load_onnx_model(path, intra_op_threads=0):
+    """Load an exported encoder/decoder graph pair as a `generate`-capable model.
+
+    Args:
+        path (str): directory written by `OnnxExporter.export`
+        intra_op_threads (int): onnxruntime threads per session, 0 = runtime default
+    """
+    _require_onnxruntime()
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session_options.intra_op_num_threads = intra_op_threads
+    return ORTModelForSeq2SeqLM.from_pretrained(path, provider="CPUExecutionProvider",
+                                                session_options=session_options, use_cache=True)
+
+
+class OnnxExporter:
+    """Export the merged seq2seq model to ONNX and check it against PyTorch.
+
+    The export holds an encoder graph and a decoder graph that takes the
+    past key/values as inputs (the merged decoder also covers the first
+    step, which has no cache yet), so decoding reuses the KV cache instead
+    of re-running attention over the whole prefix for every token.
+    """
+
+    def __init__(self, config: OnnxExportConfig):
+        self.config = config
+
+    def export(self):
+        _require_onnxruntime()
+        if not os.path.exists(self.config.merged_model_path):
+            raise FileNotFoundError(f"No merged model at {self.config.merged_model_path}; "
+                                    f"run the model merging stage first")
+
+        started = time.perf_counter()
+        with _torchscript_onnx_export():
+            main_export(self.config.merged_model_path, output=self.config.onnx_model_path,
+                        task="text2text-generation-with-past", opset=self.config.opset,
+                        optimize=self.config.optimize, device="cpu")
+        # The merged checkpoint may lack a tokenizer if it was built by hand
+        if not os.path.exists(os.path.join(self.config.onnx_model_path, "tokenizer_config.json")):
+            load_tokenizer(self.config.tokenizer_path).save_pretrained(self.config.onnx_model_path)
+
+        manifest = {
+            "source_model_path": self.config.merged_model_path,
+            "source_model_hash": hash_path(Path(self.config.merged_model_path)),
+            "onnx_model_hash": hash_path(Path(self.config.onnx_model_path)),
+            "opset": self.config.opset,
+            "optimize": self.config.optimize,
+            "export_seconds": time.perf_counter() - started,
+        }
+        with open(os.path.join(self.config.onnx_model_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"ONNX model saved to: {self.config.onnx_model_path} "
+                    f"in {manifest['export_seconds']:.1f}s")
+        return manifest
+
+    @staticmethod
+    def generate(model, tokenizer, texts, gen_kwargs):
+        """Generate one text at a time; returns token ids and seconds per new token."""
+        outputs, seconds, new_tokens = [], 0.0, 0
+        for text in texts:
+            inputs = tokenizer([text], max_length=1024, truncation=True, return_tensors="pt")
+            started = time.perf_counter()
+            with torch.inference_mode():
+                output = model.generate(input_ids=inputs["input_ids"],
+                                        attention_mask=inputs["attention_mask"], **gen_kwargs)
+            seconds += time.perf_counter() - started
+            new_tokens += output.shape[-1] - 1
+            outputs.append(output[0].tolist())
+        return outputs, seconds / max(new_tokens, 1)
+
+    def check_parity(self):
+        """Compare the ONNX model with the PyTorch model on validation examples.
+
+        Checks the encoder hidden states (max absolute difference against
+        `atol`) and the generated token ids (exact match rate against
+        `min_exact_match`), and measures load time and per-token latency of
+        both backends.
+        """
+        tokenizer = load_tokenizer(self.config.onnx_model_path)
+        validation = load_from_disk(self.config.data_path)["validation"]
+        rows = validation.select(range(min(self.config.num_samples, len(validation))))
+        texts = list(rows["dialogue"])
+
+        started = time.perf_counter()
+        # Not timed through the registry cache: a model already loaded here would read as 0s
+        torch_model = AutoModelForSeq2SeqLM.from_pretrained(self.config.merged_model_path).eval()
+        torch_load_s = time.perf_counter() - started
+        started = time.perf_counter()
+        onnx_model = load_onnx_model(self.config.onnx_model_path)
+        onnx_load_s = time.perf_counter() - started
+
+        max_abs_diff = 0.0
+        for text in texts:
+            inputs = tokenizer([text], max_length=1024, truncation=True, return_tensors="pt")
+            with torch.inference_mode():
+                expected = torch_model.get_encoder()(**inputs).last_hidden_state
+            actual = onnx_model.encoder(input_ids=inputs["input_ids"],
+                                        attention_mask=inputs["attention_mask"]).last_hidden_state
+            max_abs_diff = max(max_abs_diff, (expected - actual).abs().max().item())
+
+        torch_ids, torch_token_s = self.generate(torch_model, tokenizer, texts, self.config.gen_kwargs)
+        onnx_ids, onnx_token_s = self.generate(onnx_model, tokenizer, texts, self.config.gen_kwargs)
+        exact_match = sum(a == b for a, b in zip(torch_ids, onnx_ids)) / max(len(texts), 1)
+
+        report = {
+            "samples": len(texts),
+            "gen_kwargs": self.config.gen_kwargs,
+            "encoder_max_abs_diff": max_abs_diff,
+            "exact_match_rate": exact_match,
+            "torch": {"load_s": torch_load_s, "ms_per_token": torch_token_s * 1000},
+            "onnx": {"load_s": onnx_load_s, "ms_per_token": onnx_token_s * 1000},
+            "passed": max_abs_diff <= self.config.atol and exact_match >= self.config.min_exact_match,
+        }
+        with open(self.config.report_file, "w") as f:
+            json.dump(report, f, indent=2)
+        log = logger.info if report["passed"] else logger.warning
+        log(f"ONNX vs PyTorch on {len(texts)} validation examples: encoder max abs diff "
+            f"{max_abs_diff:.2e} (atol {self.config.atol}), exact match {exact_match:.2%}, "
+            f"{report['torch']['ms_per_token']:.1f} -> {report['onnx']['ms_per_token']:.1f} ms/token, "
+            f"load {torch_load_s:.2f}s -> {onnx_load_s:.2f}s")
+        return report
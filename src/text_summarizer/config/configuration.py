@@ -2,6 +2,12 @@ from text_summarizer.constants import *
 from text_summarizer.utils.common import read_yaml, create_directories
 from text_summarizer.entity import DataIngestionConfig, DataTransformationConfig
 from text_summarizer.entity import DataValidationConfig, ModelEvaluationConfig
+from text_summarizer.entity import ServingConfig, SummaryCacheConfig, LongDocumentConfig
+from text_summarizer.entity import AdapterConfig
+from text_summarizer.entity import ModelScoringConfig, DecodingConfig
+from text_summarizer.entity import DecodingBenchmarkConfig, ModelMergerConfig
+from text_summarizer.entity import BenchmarkSuiteConfig, ProfilingConfig
+from text_summarizer.entity import ModelQuantizationConfig, OnnxExportConfig
 import os
 from pathlib import Path
 
@@ -24,11 +30,18 @@ class ConfigurationManager:
     def get_data_ingestion_config(self) -> DataIngestionConfig:
         config = self.config.data_ingestion
         create_directories([config.root_dir]) 
+        if config.retries < 1:
+            raise ValueError(f"data_ingestion.retries must be at least 1, got {config.retries}")
         data_ingestion_config = DataIngestionConfig(
             root_dir= config.root_dir,
             source_URL=config.source_URL,
             local_data_file=config.local_data_file,
             unzip_dir=config.unzip_dir,
+            mirrors=list(config.mirrors),
+            sha256=config.sha256,
+            chunk_size=config.chunk_size,
+            timeout_s=config.timeout_s,
+            retries=config.retries,
         )
         return data_ingestion_config
     
@@ -49,6 +62,11 @@ class ConfigurationManager:
             root_dir= config.root_dir,
             data_path=config.data_path,
             tokenizer_name=config.tokenizer_name,
+            max_input_length=config.max_input_length,
+            max_target_length=config.max_target_length,
+            num_proc=config.num_proc,
+            batch_size=config.batch_size,
+            manifest_file=config.manifest_file,
         )
         return data_transformation_config
     
@@ -70,17 +88,224 @@ class ConfigurationManager:
             eval_steps=ta.eval_steps,
             save_steps=ta.save_steps,
             gradient_accumulation_steps=ta.gradient_accumulation_steps,
+            mode=ta.mode,
+            learning_rate=ta.learning_rate,
+            group_by_length=ta.group_by_length,
+            pad_to_multiple_of=ta.pad_to_multiple_of,
+            max_train_samples=ta.max_train_samples,
+            max_eval_samples=ta.max_eval_samples,
+            throughput_file=config.throughput_file,
         )
         return model_trainer_config
     
+    def get_model_merger_config(self) -> ModelMergerConfig:
+        config = self.config.model_merger
+        create_directories([config.root_dir]) 
+        model_merger_config = ModelMergerConfig(
+            root_dir=config.root_dir,
+            adapter_path=config.adapter_path,
+            tokenizer_path=config.tokenizer_path,
+            base_model_ckpt=config.base_model_ckpt,
+            merged_model_path=config.merged_model_path,
+            manifest_file=config.manifest_file,
+        )
+        return model_merger_config
+    
+    def get_model_quantization_config(self) -> ModelQuantizationConfig:
+        config = self.config.model_quantization
+        create_directories([config.root_dir]) 
+        decoding_config = self.get_decoding_config()
+        if config.generation_preset not in decoding_config.presets:
+            raise ValueError(f"Unknown generation_preset: {config.generation_preset}")
+        model_quantization_config = ModelQuantizationConfig(
+            root_dir=config.root_dir,
+            adapter_path=config.adapter_path,
+            base_model_ckpt=config.base_model_ckpt,
+            merged_model_path=config.merged_model_path,
+            tokenizer_path=config.tokenizer_path,
+            quantized_model_path=config.quantized_model_path,
+            data_path=config.data_path,
+            gen_kwargs=decoding_config.presets[config.generation_preset],
+            num_samples=config.num_samples,
+            batch_size=config.batch_size,
+            max_rouge_drop=config.max_rouge_drop,
+            report_file=config.report_file,
+        )
+        return model_quantization_config
+    
+    def get_onnx_export_config(self) -> OnnxExportConfig:
+        config = self.config.onnx_export
+        create_directories([config.root_dir]) 
+        decoding_config = self.get_decoding_config()
+        if config.generation_preset not in decoding_config.presets:
+            raise ValueError(f"Unknown generation_preset: {config.generation_preset}")
+        onnx_export_config = OnnxExportConfig(
+            root_dir=config.root_dir,
+            merged_model_path=config.merged_model_path,
+            tokenizer_path=config.tokenizer_path,
+            onnx_model_path=config.onnx_model_path,
+            opset=config.opset,
+            optimize=config.optimize,
+            data_path=config.data_path,
+            gen_kwargs=decoding_config.presets[config.generation_preset],
+            num_samples=config.num_samples,
+            atol=config.atol,
+            min_exact_match=config.min_exact_match,
+            report_file=config.report_file,
+        )
+        return onnx_export_config
+    
     def get_model_evaluation_config(self) -> ModelEvaluationConfig:
         config = self.config.model_evaluation
         create_directories([config.root_dir]) 
+        decoding_config = self.get_decoding_config()
+        if config.generation_preset not in decoding_config.presets:
+            raise ValueError(f"Unknown generation_preset: {config.generation_preset}")
         model_evaluation_config = ModelEvaluationConfig(
             root_dir= config.root_dir,
             data_path=config.data_path,
             model_path=config.model_path,
             tokenizer_path=config.tokenizer_path,
             metric_file_name=config.metric_file_name,
+            eval_mode=config.eval_mode,
+            sample_size=config.sample_size,
+            seed=config.seed,
+            batch_size=config.batch_size,
+            num_workers=config.num_workers,
+            torch_threads_per_worker=config.torch_threads_per_worker,
+            checkpoint_every=config.checkpoint_every,
+            predictions_dir=config.predictions_dir,
+            generation_preset=config.generation_preset,
+            gen_kwargs=decoding_config.presets[config.generation_preset],
+        )
+        return model_evaluation_config
+    
+    def get_model_scoring_config(self) -> ModelScoringConfig:
+        config = self.config.model_scoring
+        create_directories([config.root_dir]) 
+        model_scoring_config = ModelScoringConfig(
+            root_dir=config.root_dir,
+            predictions_dir=config.predictions_dir,
+            scores_file=config.scores_file,
+            metric_file_name=config.metric_file_name,
+            num_workers=config.num_workers,
+            chunk_size=config.chunk_size,
+        )
+        return model_scoring_config
+    
+    def get_serving_config(self) -> ServingConfig:
+        config = self.config.serving
+        serving_config = ServingConfig(
+            max_batch_size=config.max_batch_size,
+            max_wait_ms=config.max_wait_ms,
+            executor_workers=config.executor_workers,
+            max_queue_depth=config.max_queue_depth,
+            request_timeout_s=config.request_timeout_s,
+            predict_batch_size=config.predict_batch_size,
+            max_batch_documents=config.max_batch_documents,
+            quantization=config.quantization,
+            backend=config.backend,
+            onnx_threads=config.onnx_threads,
+            mmap_weights=config.mmap_weights,
+            warmup_runs=config.warmup_runs,
+        )
+        return serving_config
+    
+    def get_adapter_config(self) -> AdapterConfig:
+        config = self.config.adapters
+        if config.enabled and config.default not in config.registry:
+            raise ValueError(f"Default adapter {config.default!r} is not in adapters.registry")
+        adapter_config = AdapterConfig(
+            enabled=config.enabled,
+            base_model_ckpt=config.base_model_ckpt,
+            default_adapter=config.default,
+            max_loaded=config.max_loaded,
+            max_loaded_mb=config.max_loaded_mb,
+            registry=dict(config.registry),
+        )
+        return adapter_config
+    
+    def get_long_document_config(self) -> LongDocumentConfig:
+        config = self.config.long_document
+        long_document_config = LongDocumentConfig(
+            max_chunk_tokens=config.max_chunk_tokens,
+            overlap_tokens=config.overlap_tokens,
+            max_input_tokens=config.max_input_tokens,
+            max_depth=config.max_depth,
+            batch_size=config.batch_size,
+        )
+        return long_document_config
+    
+    def get_summary_cache_config(self) -> SummaryCacheConfig:
+        config = self.config.summary_cache
+        summary_cache_config = SummaryCacheConfig(
+            enabled=config.enabled,
+            max_entries=config.max_entries,
+            max_bytes=config.max_bytes,
+            ttl_s=config.ttl_s,
+            disk_path=config.disk_path or "",
+            max_disk_entries=config.max_disk_entries,
+        )
+        return summary_cache_config
+    
+    def get_decoding_config(self) -> DecodingConfig:
+        params = self.params.GenerationPresets
+        decoding_config = DecodingConfig(
+            default_preset=params.default,
+            presets={name: dict(preset) for name, preset in params.presets.items()},
+        )
+        return decoding_config
+    
+    def get_decoding_benchmark_config(self) -> DecodingBenchmarkConfig:
+        config = self.config.decoding_benchmark
+        create_directories([config.root_dir]) 
+        decoding_benchmark_config = DecodingBenchmarkConfig(
+            root_dir=config.root_dir,
+            data_path=config.data_path,
+            num_samples=config.num_samples,
+            presets=list(config.presets),
+            report_file=config.report_file,
+        )
+        return decoding_benchmark_config
+    
+    def get_benchmark_suite_config(self) -> BenchmarkSuiteConfig:
+        config = self.config.benchmark_suite
+        create_directories([config.root_dir]) 
+        if config.repeats < 1 or config.baseline_runs < 1:
+            raise ValueError(f"benchmark_suite.repeats and baseline_runs must be at least 1, "
+                             f"got {config.repeats} and {config.baseline_runs}")
+        benchmark_suite_config = BenchmarkSuiteConfig(
+            root_dir=config.root_dir,
+            data_path=config.data_path,
+            workspace_dir=config.workspace_dir,
+            history_file=config.history_file,
+            num_samples=config.num_samples,
+            train_samples=config.train_samples,
+            presets=list(config.presets),
+            generation_samples=config.generation_samples,
+            http_requests=config.http_requests,
+            http_concurrency=config.http_concurrency,
+            app_dir=config.app_dir,
+            startup_timeout_s=config.startup_timeout_s,
+            repeats=config.repeats,
+            regression_threshold=config.regression_threshold,
+            baseline_runs=config.baseline_runs,
+        )
+        return benchmark_suite_config
+    
+    def get_profiling_config(self) -> ProfilingConfig:
+        config = self.config.profiling
+        if config.max_profiles < 1:
+            raise ValueError(f"profiling.max_profiles must be at least 1, got {config.max_profiles}")
+        profiling_config = ProfilingConfig(
+            root_dir=config.root_dir,
+            mode=config.mode,
+            sample_interval_ms=config.sample_interval_ms,
+            row_limit=config.row_limit,
+            record_shapes=config.record_shapes,
+            with_stack=config.with_stack,
+            max_profiles=config.max_profiles,
+            request_profiling=config.request_profiling,
+            min_interval_s=config.min_interval_s,
         )
-        return model_evaluation_config
\ No newline at end of file
+        return profiling_config
\ No newline at end of file
@@ -7,6 +7,11 @@ class DataIngestionConfig:
     source_URL: str 
     local_data_file: Path 
     unzip_dir: Path  
+    mirrors: list
+    sha256: str
+    chunk_size: int
+    timeout_s: float
+    retries: int
 
 @dataclass(frozen=True)
 class DataValidationConfig: 
@@ -19,6 +24,11 @@ class DataTransformationConfig:
     root_dir: Path 
     data_path: Path
     tokenizer_name: str
+    max_input_length: int
+    max_target_length: int
+    num_proc: int
+    batch_size: int
+    manifest_file: Path
 
 @dataclass(frozen=True)
 class ModelTrainerConfig:
@@ -34,6 +44,52 @@ class ModelTrainerConfig:
     eval_steps: int
     save_steps: float
     gradient_accumulation_steps: int   
+    mode: str
+    learning_rate: float
+    group_by_length: bool
+    pad_to_multiple_of: int
+    max_train_samples: int
+    max_eval_samples: int
+    throughput_file: Path
+
+@dataclass(frozen=True)
+class ModelMergerConfig:
+    root_dir: Path
+    adapter_path: Path
+    tokenizer_path: Path
+    base_model_ckpt: str
+    merged_model_path: Path
+    manifest_file: Path
+
+@dataclass(frozen=True)
+class ModelQuantizationConfig:
+    root_dir: Path
+    adapter_path: Path
+    base_model_ckpt: str
+    merged_model_path: Path
+    tokenizer_path: Path
+    quantized_model_path: Path
+    data_path: Path
+    gen_kwargs: dict
+    num_samples: int
+    batch_size: int
+    max_rouge_drop: float
+    report_file: Path
+
+@dataclass(frozen=True)
+class OnnxExportConfig:
+    root_dir: Path
+    merged_model_path: Path
+    tokenizer_path: Path
+    onnx_model_path: Path
+    opset: int
+    optimize: str
+    data_path: Path
+    gen_kwargs: dict
+    num_samples: int
+    atol: float
+    min_exact_match: float
+    report_file: Path
 
 @dataclass(frozen=True)
 class ModelEvaluationConfig:
@@ -42,4 +98,107 @@ class ModelEvaluationConfig:
     model_path: Path
     tokenizer_path: Path
     metric_file_name: str
+    eval_mode: str
+    sample_size: int
+    seed: int
+    batch_size: int
+    num_workers: int
+    torch_threads_per_worker: int
+    checkpoint_every: int
+    predictions_dir: Path
+    generation_preset: str
+    gen_kwargs: dict
+
+@dataclass(frozen=True)
+class ModelScoringConfig:
+    root_dir: Path
+    predictions_dir: Path
+    scores_file: Path
+    metric_file_name: Path
+    num_workers: int
+    chunk_size: int
+
+@dataclass(frozen=True)
+class DecodingBenchmarkConfig:
+    root_dir: Path
+    data_path: Path
+    num_samples: int
+    presets: list
+    report_file: Path
+
+@dataclass(frozen=True)
+class BenchmarkSuiteConfig:
+    root_dir: Path
+    data_path: Path
+    workspace_dir: Path
+    history_file: Path
+    num_samples: int
+    train_samples: int
+    presets: list
+    generation_samples: int
+    http_requests: int
+    http_concurrency: int
+    app_dir: Path
+    startup_timeout_s: float
+    repeats: int
+    regression_threshold: float
+    baseline_runs: int
 
+@dataclass(frozen=True)
+class ProfilingConfig:
+    root_dir: Path
+    mode: str
+    sample_interval_ms: float
+    row_limit: int
+    record_shapes: bool
+    with_stack: bool
+    max_profiles: int
+    request_profiling: bool
+    min_interval_s: float
+
+@dataclass(frozen=True)
+class ServingConfig:
+    max_batch_size: int
+    max_wait_ms: float
+    executor_workers: int
+    max_queue_depth: int
+    request_timeout_s: float
+    predict_batch_size: int
+    max_batch_documents: int
+    quantization: str
+    backend: str
+    onnx_threads: int
+    mmap_weights: bool
+    warmup_runs: int
+
+
+@dataclass(frozen=True)
+class AdapterConfig:
+    enabled: bool
+    base_model_ckpt: str
+    default_adapter: str
+    max_loaded: int
+    max_loaded_mb: float
+    registry: dict
+
+@dataclass(frozen=True)
+class LongDocumentConfig:
+    max_chunk_tokens: int
+    overlap_tokens: int
+    max_input_tokens: int
+    max_depth: int
+    batch_size: int
+
+@dataclass(frozen=True)
+class SummaryCacheConfig:
+    enabled: bool
+    max_entries: int
+    max_bytes: int
+    ttl_s: float
+    disk_path: str
+    max_disk_entries: int
+
+@dataclass(frozen=True)
+class DecodingConfig:
+    default_preset: str
+    presets: dict
\ No newline at end of file
@@ -1,11 +1,48 @@
 import os
 import sys
+import json
 import logging
+from contextvars import ContextVar
 
-logging_str = ['%(asctime)s: %(levelname)s: %(module)s: %(message)s']
+logging_str = ['%(asctime)s: %(levelname)s: %(module)s: %(request_tag)s%(message)s']
 log_dir = "logs"
 log_filepath = os.path.join(log_dir, "running_logs.log")
 
+# Id of the HTTP request being handled, attached to every record logged for it
+request_id = ContextVar("request_id", default=None)
+
+
+class RequestIdFilter(logging.Filter):
+    """Tag records with the current request id; `request_tag` is its text-log
+    prefix, empty outside requests."""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        record.request_tag = "" if record.request_id is None else f"[{record.request_id}] "
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with `extra=` become keys."""
+
+    # Attributes of every LogRecord; anything else on a record came from `extra=`
+    RESERVED = (set(vars(logging.LogRecord("", 0, "", 0, "", None, None)))
+                | {"message", "asctime", "request_id", "request_tag"})
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.module,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in self.RESERVED})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
 # Handlers: always include StreamHandler; add FileHandler only if writable
 handlers = [logging.StreamHandler(sys.stdout)]
 try:
@@ -18,10 +55,16 @@ except Exception:
     # In read-only environments (e.g., some notebooks), skip file logging
     pass
 
+# LOG_FORMAT=json switches to structured logs (e.g. for a log collector)
+for handler in handlers:
+    handler.addFilter(RequestIdFilter())
+    if os.environ.get("LOG_FORMAT", "text").lower() == "json":
+        handler.setFormatter(JsonFormatter())
+
 logging.basicConfig(
     level=logging.INFO,
     format=logging_str[0],
     handlers=handlers,
 )
 
-logger = logging.getLogger("text_summarizer")
\ No newline at end of file
+logger = logging.getLogger("text_summarizer")
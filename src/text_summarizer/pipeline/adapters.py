@@ -0,0 +1,114 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from peft import PeftModel
+from text_summarizer.logging import logger
+from text_summarizer.entity import AdapterConfig
+from text_summarizer.utils.common import hash_path
+
+
+class AdapterManager:
+    """Serve several LoRA adapters from one resident base model.
+
+    Adapters are registered by name in `adapters.registry` and loaded into
+    the shared `PeftModel` on first use. Only one adapter is active at a
+    time, so callers hold `lock` from `activate` until their `generate`
+    call returns. When more than `max_loaded` adapters, or more than
+    `max_loaded_mb` of adapter weights, are resident, the least recently
+    used ones are deleted from the model (and reloaded on their next use).
+
+    `stats` and `model_id` are called on the event loop, so neither waits
+    for `lock`: stats are a snapshot published under a lock of their own,
+    and the adapters are hashed once, when the manager is built.
+    """
+
+    def __init__(self, base_model, config: AdapterConfig):
+        self.config = config
+        self.lock = threading.RLock()
+        self._loaded = OrderedDict()  # name -> adapter weight bytes
+        self._model_ids = {name: f"{name}@{hash_path(Path(path))[:16]}"
+                           for name, path in config.registry.items()}
+        self.counters = {"loads": 0, "evictions": 0}
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+        default = config.default_adapter
+        self.check_base_model(default)
+        self.model = PeftModel.from_pretrained(base_model, self.config.registry[default],
+                                               adapter_name=default)
+        self.model.eval()
+        self._loaded[default] = self._adapter_bytes(default)
+        self.counters["loads"] += 1
+        self.active = default
+        self._publish_stats()
+
+    def resolve(self, name=None):
+        """Canonical adapter name for a request.
+
+        Raises:
+            ValueError: if `name` is not registered
+        """
+        name = name or self.config.default_adapter
+        if name not in self.config.registry:
+            raise ValueError(f"Unknown adapter: {name!r} (available: {sorted(self.config.registry)})")
+        return name
+
+    def check_base_model(self, name):
+        config_path = os.path.join(self.config.registry[name], "adapter_config.json")
+        with open(config_path) as f:
+            base = json.load(f).get("base_model_name_or_path")
+        if base and os.path.basename(os.path.normpath(base)) != \
+                os.path.basename(os.path.normpath(self.config.base_model_ckpt)):
+            logger.warning(f"Adapter {name!r} was trained on {base}, serving it on "
+                           f"{self.config.base_model_ckpt}")
+
+    def activate(self, name=None):
+        """Make `name` the active adapter, loading it if needed. Hold `lock`."""
+        name = self.resolve(name)
+        if name not in self._loaded:
+            self.check_base_model(name)
+            logger.info(f"Loading adapter {name!r} from {self.config.registry[name]}")
+            self.model.load_adapter(self.config.registry[name], adapter_name=name)
+            self._loaded[name] = self._adapter_bytes(name)
+            self.counters["loads"] += 1
+        self._loaded.move_to_end(name)
+        if self.active != name:
+            self.model.set_adapter(name)
+            self.active = name
+        self._evict()
+        self._publish_stats()
+        return name
+
+    def model_id(self, name=None):
+        """Identity of an adapter's weights (used in cache keys)."""
+        return self._model_ids[self.resolve(name)]
+
+    def stats(self):
+        """Load/eviction counts and resident adapters, as of the last `activate`."""
+        with self._stats_lock:
+            return {**self._stats, "loaded": dict(self._stats["loaded"])}
+
+    def _publish_stats(self):
+        # Called with `lock` held; readers only take the short `_stats_lock`
+        stats = {**self.counters, "active": self.active,
+                 "loaded": {name: size / 2**20 for name, size in self._loaded.items()}}
+        with self._stats_lock:
+            self._stats = stats
+
+    def _adapter_bytes(self, name):
+        marker = f".{name}."
+        return sum(p.numel() * p.element_size() for n, p in self.model.named_parameters() if marker in n)
+
+    def _evict(self):
+        # The active (most recently used) adapter is never evicted
+        while len(self._loaded) > 1 and (
+                len(self._loaded) > self.config.max_loaded
+                or sum(self._loaded.values()) > self.config.max_loaded_mb * 2**20):
+            oldest = next(iter(self._loaded))
+            # LoraModel (not PeftModel) owns delete_adapter in this peft version
+            self.model.base_model.delete_adapter(oldest)
+            del self._loaded[oldest]
+            self.counters["evictions"] += 1
+            logger.info(f"Evicted adapter {oldest!r}")
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from text_summarizer.logging import logger
+from text_summarizer.entity import SummaryCacheConfig
+
+
+class SummaryCache:
+    """Content-addressed cache of generated summaries.
+
+    Entries are keyed on a hash of the normalized input text, the model
+    identity and the generation kwargs, so a retrained model or different
+    decoding settings never return a stale summary. The first tier is an
+    in-memory LRU bounded by entry count, byte size and TTL. An optional
+    SQLite tier (`disk_path`) persists entries and is shared by every
+    gunicorn worker on the host; memory misses fall through to it. It is
+    bounded by TTL and `max_disk_entries` (pruned every `PRUNE_EVERY`
+    writes), and is only accessed from its own thread so the event loop
+    never waits on disk.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, config: SummaryCacheConfig):
+        self.config = config
+        self._entries = OrderedDict()  # key -> (summary, created, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk = None
+        self._disk_writes = 0
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+        if config.enabled and config.disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(config.disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(config.disk_path, timeout=5, check_same_thread=False)
+            # WAL lets several worker processes read while one writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS summaries "
+                             "(key TEXT PRIMARY KEY, summary TEXT NOT NULL, created REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS summaries_created ON summaries (created)")
+            self._db.commit()
+            # One thread owns the connection, so disk reads and writes are serialized
+            self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary-cache")
+            self._disk.submit(self._prune, time.time())
+            logger.info(f"Summary cache disk tier at: {config.disk_path}")
+
+    @staticmethod
+    def make_key(text, model_id, gen_kwargs):
+        """Hash of (whitespace-normalized text, model identity, generation kwargs)."""
+        payload = json.dumps({
+            "text": " ".join(text.split()),
+            "model": model_id,
+            "gen_kwargs": gen_kwargs,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key):
+        """Return the cached summary for `key`, or None on a miss."""
+        if not self.config.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                summary, created, _ = entry
+                if now - created <= self.config.ttl_s:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return summary
+                self._remove(key)
+                self.counters["expirations"] += 1
+
+        if self._db is not None:
+            loop = asyncio.get_running_loop()
+            row = await loop.run_in_executor(self._disk, self._disk_get, key)
+            if row is not None and now - row[1] <= self.config.ttl_s:
+                with self._lock:
+                    if key not in self._entries:
+                        self._insert(key, row[0], row[1])
+                    self.counters["disk_hits"] += 1
+                return row[0]
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    async def put(self, key, summary):
+        if not self.config.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._insert(key, summary, now)
+        if self._db is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._disk, self._disk_put, key, summary, now)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries), "bytes": self._bytes}
+
+    def _disk_get(self, key):
+        return self._db.execute("SELECT summary, created FROM summaries WHERE key = ?",
+                                (key,)).fetchone()
+
+    def _disk_put(self, key, summary, now):
+        self._db.execute("INSERT OR REPLACE INTO summaries (key, summary, created) "
+                         "VALUES (?, ?, ?)", (key, summary, now))
+        self._db.commit()
+        self._disk_writes += 1
+        if self._disk_writes % self.PRUNE_EVERY == 0:
+            self._prune(now)
+
+    def _prune(self, now):
+        """Drop expired rows, then the oldest beyond `max_disk_entries`."""
+        self._db.execute("DELETE FROM summaries WHERE created < ?", (now - self.config.ttl_s,))
+        self._db.execute("DELETE FROM summaries WHERE key IN (SELECT key FROM summaries "
+                         "ORDER BY created DESC LIMIT -1 OFFSET ?)", (self.config.max_disk_entries,))
+        self._db.commit()
+
+    def _insert(self, key, summary, created):
+        size = len(key) + len(summary.encode("utf-8"))
+        self._entries[key] = (summary, created, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.config.max_entries
+                                 or self._bytes > self.config.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.counters["evictions"] += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
@@ -0,0 +1,143 @@
+import re
+import time
+from text_summarizer.entity import LongDocumentConfig
+
+
+# A dialogue turn / paragraph is one line; long lines fall back to sentences
+LINE_PATTERN = re.compile(r"[^\n]+")
+SENTENCE_PATTERN = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+
+
+class LongDocumentSummarizer:
+    """Summarize texts longer than the model window by map-reduce.
+
+    The text is split on turn (line) boundaries, lines that are too long on
+    sentence boundaries, and packed into windows of at most
+    `max_chunk_tokens` tokens that overlap by up to `overlap_tokens` tokens
+    of whole turns/sentences, so context at a boundary is seen by both
+    windows. The windows are summarized in length-sorted batches (map), the
+    chunk summaries are joined and, while the joined text is still longer
+    than one window, split and summarized again (reduce) up to `max_depth`
+    levels, or until a reduce round no longer makes the text shorter. Memory is bounded by `batch_size` windows per `generate` call
+    and time by `max_input_tokens`.
+    """
+
+    def __init__(self, prediction_pipeline, config: LongDocumentConfig):
+        self.prediction_pipeline = prediction_pipeline
+        self.config = config
+
+    def count_tokens(self, text):
+        return len(self.prediction_pipeline.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def split_units(self, text):
+        """Split `text` into (start, end, tokens) spans on turn, then sentence boundaries."""
+        units = []
+        for line in LINE_PATTERN.finditer(text):
+            if not line.group().strip():
+                continue
+            tokens = self.count_tokens(line.group())
+            if tokens <= self.config.max_chunk_tokens:
+                units.append((line.start(), line.end(), tokens))
+                continue
+            for sentence in SENTENCE_PATTERN.finditer(line.group()):
+                if not sentence.group().strip():
+                    continue
+                start, end = line.start() + sentence.start(), line.start() + sentence.end()
+                units.extend(self.split_tokens(text, start, end))
+        return units
+
+    def split_tokens(self, text, start, end):
+        """Spans of at most `max_chunk_tokens` tokens over text[start:end]; a
+        sentence longer than a window is cut at token boundaries."""
+        encoding = self.prediction_pipeline.tokenizer(text[start:end], add_special_tokens=False,
+                                                      return_offsets_mapping=True)
+        offsets = encoding["offset_mapping"]
+        spans = []
+        for i in range(0, len(offsets), self.config.max_chunk_tokens):
+            window = offsets[i : i + self.config.max_chunk_tokens]
+            spans.append((start + window[0][0], start + window[-1][1], len(window)))
+        return spans
+
+    def chunk(self, text):
+        """Pack turns/sentences into overlapping windows.
+
+        Returns:
+            list: (start, end, tokens) character spans of `text`, one per window
+        """
+        units = self.split_units(text)
+        chunks, current = [], []
+        for unit in units:
+            if current and sum(u[2] for u in current) + unit[2] > self.config.max_chunk_tokens:
+                chunks.append((current[0][0], current[-1][1], sum(u[2] for u in current)))
+                # Carry trailing units into the next window, up to overlap_tokens
+                overlap, carried = [], 0
+                for previous in reversed(current):
+                    if carried + previous[2] > self.config.overlap_tokens:
+                        break
+                    overlap.insert(0, previous)
+                    carried += previous[2]
+                # Always make progress: the new unit must fit next to the overlap
+                while overlap and carried + unit[2] > self.config.max_chunk_tokens:
+                    carried -= overlap.pop(0)[2]
+                current = overlap
+            current.append(unit)
+        if current:
+            chunks.append((current[0][0], current[-1][1], sum(u[2] for u in current)))
+        return chunks
+
+    def summarize(self, text, gen_kwargs=None, adapter=None):
+        """Summarize `text` of any length up to `max_input_tokens`.
+
+        Args:
+            text (str): input text
+            gen_kwargs (dict, optional): full `generate` kwargs, as built by
+                `resolve_gen_kwargs`; used for every map and reduce step
+            adapter (str, optional): registered LoRA adapter
+
+        Returns:
+            dict: the `summary`, `input_tokens`, and one entry per stage with
+                its chunk boundaries (character spans of that stage's input)
+                and wall-clock seconds
+
+        Raises:
+            ValueError: if `text` is longer than `max_input_tokens`
+        """
+        started = time.perf_counter()
+        gen_kwargs = gen_kwargs or self.prediction_pipeline.resolve_gen_kwargs()
+        input_tokens = self.count_tokens(text)
+        if input_tokens > self.config.max_input_tokens:
+            raise ValueError(f"Text has {input_tokens} tokens, more than the "
+                             f"{self.config.max_input_tokens} allowed")
+
+        stages, depth, tokens, previous_tokens = [], 0, input_tokens, None
+        while True:
+            stage_started = time.perf_counter()
+            chunks = self.chunk(text)
+            fits = len(chunks) <= 1
+            # Summaries as long as their inputs: more rounds would never fit one window
+            stalled = previous_tokens is not None and tokens >= previous_tokens
+            if not fits and (depth >= self.config.max_depth or stalled):
+                # Out of reduce levels: the final pass sees the head of the text only
+                chunks = chunks[:1]
+                fits = True
+            texts = [text[start:end] for start, end, _ in chunks] or [text]
+            summaries = self.prediction_pipeline.summarize_many(
+                texts, [gen_kwargs] * len(texts), self.config.batch_size, adapter)
+            stages.append({
+                "stage": "final" if fits else ("map" if depth == 0 else "reduce"),
+                "depth": depth,
+                "chunks": [{"start": start, "end": end, "tokens": tokens} for start, end, tokens in chunks],
+                "seconds": time.perf_counter() - stage_started,
+            })
+            if fits:
+                break
+            text = "\n".join(summary.strip() for summary in summaries)
+            previous_tokens, tokens = tokens, self.count_tokens(text)
+            depth += 1
+
+        return {
+            "summary": summaries[0],
+            "input_tokens": input_tokens,
+            "stages": stages,
+            "seconds": time.perf_counter() - started,
+        }
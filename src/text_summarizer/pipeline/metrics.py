@@ -0,0 +1,275 @@
+import bisect
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from text_summarizer.logging import logger, request_id
+from text_summarizer.utils.profiling import Profiler, ProfileLimiter, parse_modes
+
+
+# Latency buckets in seconds, from a cached hit to a long beam search
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.type = "counter"
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def samples(self):
+        with self._lock:
+            return [(f"{self.name}_total", _labels(self.labelnames, key), value)
+                    for key, value in self._values.items()]
+
+
+class Histogram:
+    def __init__(self, name, help, buckets=SECONDS_BUCKETS, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.type = "histogram"
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [count per bucket (last one is +Inf), sum]
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            counts = self._values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            counts[0][bisect.bisect_left(self.buckets, value)] += 1
+            counts[1] += value
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket",
+                                    _labels(self.labelnames + ("le",), key + (bound,)), cumulative))
+                samples.append((f"{self.name}_sum", _labels(self.labelnames, key), total))
+                samples.append((f"{self.name}_count", _labels(self.labelnames, key), cumulative))
+        return samples
+
+
+class Gauge:
+    """A value read when scraped: `fn()` returns a number, or a dict of
+    label value -> number for a gauge with one label (None to skip)."""
+
+    def __init__(self, name, help, fn, labelname=None):
+        self.name, self.help, self.fn, self.labelname = name, help, fn, labelname
+        self.type = "gauge"
+
+    def samples(self):
+        value = self.fn()
+        if value is None:
+            return []
+        if self.labelname is None:
+            return [(self.name, "", value)]
+        return [(self.name, _labels((self.labelname,), (key,)), v) for key, v in value.items()]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.samples()
+            except Exception:
+                logger.exception(f"Collecting metric {metric.name} failed")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(f"{name}{labels} {float(value)!r}" for name, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "summarizer_requests", "HTTP requests by route and status code", ["route", "status"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "summarizer_request_seconds", "HTTP request latency, including streamed bodies", labelnames=["route"]))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "summarizer_stage_seconds", "Time per model call by stage: tokenize, encode, decode "
+    "(generation loop), detokenize", labelnames=["stage"]))
+QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "summarizer_queue_wait_seconds", "Time a request waited for a batch or an inference thread"))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "summarizer_batch_size", "Texts per generate call", BATCH_SIZE_BUCKETS))
+INPUT_TOKENS = REGISTRY.register(Histogram(
+    "summarizer_input_tokens", "Input tokens per text (after truncation)", TOKEN_BUCKETS))
+OUTPUT_TOKENS = REGISTRY.register(Histogram(
+    "summarizer_output_tokens", "Generated tokens per summary", TOKEN_BUCKETS))
+
+
+class Trace:
+    """Timings and sizes of one request (or one batch), filled in while it is served."""
+
+    def __init__(self, request_id=None):
+        self.request_id = request_id
+        self.stages = defaultdict(float)
+        self.values = {}
+        # (input tokens, output tokens) of each text generated, in order
+        self.lengths = []
+        # Set when this request asked to be profiled and was admitted
+        self.profiler = None
+
+    def merge(self, other):
+        for name, seconds in other.stages.items():
+            self.stages[name] += seconds
+        self.values.update(other.values)
+
+    def summary(self):
+        return {**{f"{name}_ms": round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+                **self.values}
+
+
+current_trace = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def stage(name):
+    """Time a block as `name` in the stage histogram and the current trace."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.stages[name] += elapsed
+
+
+def record_tokens(input_lengths, output_lengths):
+    for n in input_lengths:
+        INPUT_TOKENS.observe(n)
+    for n in output_lengths:
+        OUTPUT_TOKENS.observe(n)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.lengths.extend(zip(input_lengths, output_lengths))
+        trace.values["input_tokens"] = sum(n for n, _ in trace.lengths)
+        trace.values["output_tokens"] = sum(n for _, n in trace.lengths)
+
+
+def record_queue_wait(seconds, trace=None):
+    QUEUE_WAIT_SECONDS.observe(seconds)
+    trace = trace or current_trace.get()
+    if trace is not None:
+        trace.values["queue_wait_ms"] = round(seconds * 1000, 3)
+
+
+# Probes and scrapes are counted but not logged
+QUIET_PATHS = {"/metrics", "/healthz", "/readyz"}
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware: request id, request metrics and one log line per request.
+
+    The request id comes from the `X-Request-ID` header (or is generated),
+    is echoed in the response and tagged on every log record emitted while
+    the request is handled. The log line carries the request's `Trace`:
+    queue wait, batch size, stage timings and token counts.
+
+    With `profiling.request_profiling` on, an `X-Profile: torch|python|both|1`
+    header profiles the (first) model call serving the request (at most one
+    at a time and one per `min_interval_s`). The response's `X-Profile` header
+    holds the profile folder, or why there is none.
+    """
+
+    def __init__(self, app, profiling=None):
+        self.app = app
+        self.profiling = profiling
+        self.profile_limiter = (ProfileLimiter(profiling.min_interval_s)
+                                if profiling is not None and profiling.request_profiling else None)
+
+    def start_profile(self, trace, value):
+        """Attach a profiler to the trace if allowed; otherwise the reason why not."""
+        if self.profile_limiter is None:
+            return "disabled"
+        try:
+            modes = parse_modes(value, self.profiling.mode)
+        except ValueError as e:
+            return str(e)
+        if not modes:
+            return "off"
+        if not self.profile_limiter.acquire():
+            return "rate limited"
+        # Written in the background, so requests batched with this one aren't held up
+        trace.profiler = Profiler(f"request-{trace.request_id}", self.profiling, modes, background=True)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers") or [])
+        rid = headers.get(b"x-request-id", b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        trace = Trace(rid)
+        trace_token, rid_token = current_trace.set(trace), request_id.set(rid)
+        profile_status = headers.get(b"x-profile")
+        if profile_status is not None:
+            profile_status = self.start_profile(trace, profile_status.decode("latin-1"))
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", rid.encode("latin-1"))]
+                profile_header = profile_status
+                if trace.profiler is not None:
+                    # Streamed and cached responses make no profiled model call
+                    profile_header = str(trace.profiler.output_dir) if trace.profiler.finished else "no model call"
+                if profile_header is not None:
+                    message["headers"].append((b"x-profile", profile_header.encode("latin-1", "replace")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            path = scope.get("path", "")
+            # Unmatched paths share one label, so scanners can't grow the series count
+            route = path if scope.get("endpoint") is not None else "unmatched"
+            REQUESTS.inc(route=route, status=status)
+            REQUEST_SECONDS.observe(elapsed, route=route)
+            if path not in QUIET_PATHS:
+                fields = trace.summary()
+                details = ", ".join(f"{key} {value}" for key, value in fields.items())
+                logger.info(f"{scope.get('method')} {path} {status} in {elapsed * 1000:.1f} ms"
+                            + (f" ({details})" if details else ""),
+                            extra={"method": scope.get("method"), "path": path, "status": status,
+                                   "duration_ms": round(elapsed * 1000, 3), **fields})
+            if trace.profiler is not None:
+                self.profile_limiter.release()
+            current_trace.reset(trace_token)
+            request_id.reset(rid_token)
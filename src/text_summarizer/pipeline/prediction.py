@@ -1,17 +1,81 @@
 from text_summarizer.config.configuration import ConfigurationManager
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-from transformers import pipeline
+from text_summarizer.utils.common import hash_path, memory_usage
+from text_summarizer.utils.mmap_weights import load_mmap_model
+from text_summarizer.utils.model_registry import registry, load_model, load_peft_model, load_tokenizer
+from text_summarizer.components.model_quantizer import quantize_int8, load_quantized_model, bf16_supported
+from text_summarizer.pipeline.adapters import AdapterManager
+from text_summarizer.pipeline.metrics import stage, record_tokens
+from transformers import AutoModelForSeq2SeqLM
+from transformers import pipeline, TextIteratorStreamer, StoppingCriteria, StoppingCriteriaList
 from peft import PeftModel
+import torch
+import json
+import contextvars
 import os
+from contextlib import contextmanager
+from threading import Thread
+from pathlib import Path
+
+
+# Generation parameters a caller may override per request, with their types
+ALLOWED_GEN_KWARGS = {
+    "num_beams": int, "max_length": int, "min_length": int, "max_new_tokens": int,
+    "no_repeat_ngram_size": int, "top_k": int,
+    "length_penalty": float, "top_p": float, "temperature": float, "repetition_penalty": float,
+    "early_stopping": bool, "do_sample": bool,
+}
+
+
+def check_gen_params(params):
+    """Validate per-request generation params; integers given for float params
+    become floats, so `1` and `1.0` give the same cache key.
+
+    Raises:
+        ValueError: an unsupported key, or a value of the wrong type
+    """
+    unknown = set(params) - ALLOWED_GEN_KWARGS.keys()
+    if unknown:
+        raise ValueError(f"Unsupported generation params: {sorted(unknown)}")
+    checked = {}
+    for name, value in params.items():
+        expected = ALLOWED_GEN_KWARGS[name]
+        # bool is a subclass of int, but `num_beams: true` is a mistake
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if not isinstance(value, expected) or (expected is not bool and isinstance(value, bool)):
+            raise ValueError(f"Generation param {name} must be {expected.__name__}, "
+                             f"got {type(value).__name__} {value!r}")
+        checked[name] = value
+    return checked
+
+
+class StopOnEvent(StoppingCriteria):
+    """End `generate` at the next step once `event` is set."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool,
+                          device=input_ids.device)
 
 
 class PredictionPipeline:
-    def __init__(self):
-        self.config = ConfigurationManager().get_model_evaluation_config()
+    def __init__(self, config_manager=None):
+        config_manager = config_manager or ConfigurationManager()
+        self.config = config_manager.get_model_evaluation_config()
+        self.merger_config = config_manager.get_model_merger_config()
+        # Named decoding presets from params.yaml, selectable per request
+        self.decoding_config = config_manager.get_decoding_config()
+        self.serving_config = config_manager.get_serving_config()
+        self.adapter_config = config_manager.get_adapter_config()
+        # Set when several LoRA adapters are served from one base model
+        self.adapters = None
         
         # Convert relative paths to absolute paths
         tokenizer_path = os.path.abspath(self.config.tokenizer_path)
         model_path = os.path.abspath(self.config.model_path)
+        merged_model_path = os.path.abspath(self.merger_config.merged_model_path)
         
         # Load tokenizer - use base model if custom tokenizer not available
         print(f"Loading tokenizer...")
@@ -19,49 +83,404 @@ class PredictionPipeline:
             # First try to load from saved path
             if os.path.exists(tokenizer_path):
                 print(f"  From: {tokenizer_path}")
-                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+                self.tokenizer = load_tokenizer(tokenizer_path)
             else:
                 # Fallback to base model
                 print(f"  From base model: google/pegasus-cnn_dailymail")
-                self.tokenizer = AutoTokenizer.from_pretrained("google/pegasus-cnn_dailymail")
+                self.tokenizer = load_tokenizer("google/pegasus-cnn_dailymail")
         except Exception as e:
             print(f"  Error loading tokenizer: {e}")
             print(f"  Using default tokenizer...")
-            self.tokenizer = AutoTokenizer.from_pretrained("google/pegasus-cnn_dailymail")
+            self.tokenizer = load_tokenizer("google/pegasus-cnn_dailymail")
         
         # Load model
         print(f"Loading model...")
+        if self.serving_config.backend == "onnx":
+            self._load_onnx_model(config_manager, model_path, merged_model_path)
+        elif self.serving_config.backend == "torch" and self.adapter_config.enabled:
+            self._load_adapters()
+        elif self.serving_config.backend == "torch":
+            self._load_torch_model(model_path, merged_model_path)
+            self._apply_quantization(config_manager)
+        else:
+            raise ValueError(f"Unknown serving backend: {self.serving_config.backend!r} "
+                             f"(expected torch or onnx)")
+        
+        # Create pipeline
+        self.pipe = pipeline("summarization", model=self.model, tokenizer=self.tokenizer)
+        print("✓ Pipeline ready!")
+        self.report_memory()
+
+    def report_memory(self):
+        """Print this worker's memory; `shared` counts weights mapped by other workers too."""
+        usage = memory_usage()
+        if usage:
+            print(f"  Worker {os.getpid()} memory: rss {usage['rss']:.0f} MB, pss {usage['pss']:.0f} MB, "
+                  f"shared {usage['shared']:.0f} MB, private heap {usage['anonymous']:.0f} MB")
+        return usage
+
+    def _load_torch_model(self, model_path, merged_model_path):
+        # Identifies the weights that produce a summary (used in cache keys)
+        self.model_id = "google/pegasus-cnn_dailymail"
+        # Content hash of the loaded checkpoint, matched against derived exports
+        self.model_hash = None
         try:
-            if os.path.exists(model_path):
-                # Try to load as LoRA model first
+            if os.path.exists(merged_model_path):
+                # Adapters already folded into the base weights: no PEFT overhead per token
+                print(f"  From merged checkpoint: {merged_model_path}")
+                self.model_hash = self._merged_model_hash(merged_model_path)
+                if self.serving_config.mmap_weights:
+                    # Weights stay in the page cache, shared by every worker process
+                    self.model = registry.get("model", merged_model_path, lambda: load_mmap_model(merged_model_path),
+                                              identity=self.model_hash, mmap=True)
+                else:
+                    self.model = load_model(merged_model_path)
+                print("  Merged model loaded!")
+                self.model_id = f"{os.path.basename(merged_model_path)}@{self.model_hash[:16]}"
+            elif os.path.exists(model_path):
                 print(f"  From: {model_path}")
-                try:
-                    base_model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
-                    self.model = PeftModel.from_pretrained(base_model, model_path)
+                if os.path.exists(os.path.join(model_path, "adapter_config.json")):
+                    self.model = load_peft_model(model_path, self.adapter_config.base_model_ckpt)
                     print("  LoRA model loaded!")
-                except:
-                    # Load as regular model
-                    self.model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+                else:
+                    self.model = load_model(model_path)
                     print("  Standard model loaded!")
+                self.model_hash = hash_path(Path(model_path))
+                self.model_id = f"{os.path.basename(model_path)}@{self.model_hash[:16]}"
             else:
                 # Load base model from HuggingFace
                 print(f"  From HuggingFace: google/pegasus-cnn_dailymail")
-                self.model = AutoModelForSeq2SeqLM.from_pretrained("google/pegasus-cnn_dailymail")
+                self.model = load_model("google/pegasus-cnn_dailymail")
                 print("  Base model loaded!")
         except Exception as e:
             print(f"  Error: {e}")
             print(f"  Using default model...")
-            self.model = AutoModelForSeq2SeqLM.from_pretrained("google/pegasus-cnn_dailymail")
-        
-        # Create pipeline
-        self.pipe = pipeline("summarization", model=self.model, tokenizer=self.tokenizer)
-        print("✓ Pipeline ready!")
+            self.model = load_model("google/pegasus-cnn_dailymail")
+
+    def _load_adapters(self):
+        """One resident base model with the registered LoRA adapters on top."""
+        if self.serving_config.quantization == "int8":
+            raise ValueError("serving.quantization int8 can't be combined with adapters")
+        print(f"  Base model for adapters: {self.adapter_config.base_model_ckpt}")
+        base_model = AutoModelForSeq2SeqLM.from_pretrained(self.adapter_config.base_model_ckpt)
+        self.model_id = os.path.basename(os.path.normpath(self.adapter_config.base_model_ckpt))
+        if self.serving_config.quantization == "bf16":
+            self._warn_if_bf16_unsupported()
+            base_model = base_model.to(torch.bfloat16)
+            self.model_id += "+bf16"
+        self.adapters = AdapterManager(base_model, self.adapter_config)
+        self.model = self.adapters.model
+        print(f"  Adapters: {sorted(self.adapter_config.registry)} "
+              f"(default {self.adapter_config.default_adapter!r})")
+
+    def _load_onnx_model(self, config_manager, model_path, merged_model_path):
+        """Load the exported ONNX encoder/decoder graphs run by onnxruntime.
+
+        Like the int8 export, the graphs are only served while they were
+        exported from the current merged model (the manifest's
+        `source_model_hash`); otherwise the merged model is served by the
+        torch backend until the export is rerun.
+        """
+        from text_summarizer.components.onnx_exporter import load_onnx_model
+
+        if self.serving_config.quantization != "none":
+            raise ValueError("serving.quantization applies to the torch backend only")
+        onnx_model_path = os.path.abspath(config_manager.get_onnx_export_config().onnx_model_path)
+        if not os.path.exists(onnx_model_path):
+            raise FileNotFoundError(f"No ONNX export at {onnx_model_path}; run "
+                                    f"python -m text_summarizer.pipeline.stage_09_onnx_export")
+        with open(os.path.join(onnx_model_path, "manifest.json")) as f:
+            manifest = json.load(f)
+        # Without a merged model (e.g. only the export was deployed) there is nothing to compare
+        if (os.path.exists(merged_model_path)
+                and manifest["source_model_hash"] != self._merged_model_hash(merged_model_path)):
+            # Built from an earlier model: serving it would return stale summaries
+            print(f"  Warning: ONNX export at {onnx_model_path} is out of date "
+                  f"(source {manifest['source_model_hash'][:16]}); serving the merged model with "
+                  f"the torch backend until the ONNX export stage is rerun")
+            self._load_torch_model(model_path, merged_model_path)
+            return
+        print(f"  ONNX model from: {onnx_model_path}")
+        self.model = load_onnx_model(onnx_model_path, self.serving_config.onnx_threads)
+        self.model_id = f"{os.path.basename(onnx_model_path)}@{manifest['onnx_model_hash'][:16]}"
+        print("  ONNX model loaded!")
+
+    def _merged_model_hash(self, merged_model_path):
+        # The merge manifest already holds the content hash; avoid rehashing GBs at startup
+        if os.path.exists(self.merger_config.manifest_file):
+            with open(self.merger_config.manifest_file) as f:
+                return json.load(f)["merged_model_hash"]
+        return hash_path(Path(merged_model_path))
+
+    @staticmethod
+    def _warn_if_bf16_unsupported():
+        if not bf16_supported():
+            print("  Warning: this CPU has no native bfloat16 support; "
+                  "bf16 will likely be slower than fp32 here")
+
+    def _apply_quantization(self, config_manager):
+        """Switch to a reduced-precision model when `serving.quantization` asks for one.
+
+        `int8` uses the checkpoint exported by the model quantization stage
+        when it was built from the loaded model (its manifest's
+        `source_model_hash`), otherwise quantizes the loaded model on the fly.
+        Both modes change the summaries slightly, so they also change `model_id`.
+        """
+        mode = self.serving_config.quantization
+        if mode == "none":
+            return
+        if mode == "int8":
+            quantized_model_path = os.path.abspath(
+                config_manager.get_model_quantization_config().quantized_model_path)
+            manifest_path = os.path.join(quantized_model_path, "manifest.json")
+            manifest = None
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+            if manifest is not None and manifest["source_model_hash"] == self.model_hash:
+                print(f"  Int8 model from: {quantized_model_path}")
+                self.model = registry.get("model", quantized_model_path,
+                                          lambda: load_quantized_model(quantized_model_path),
+                                          identity=manifest["quantized_model_hash"], int8=True)
+                self.model_id = (f"{os.path.basename(quantized_model_path)}"
+                                 f"@{manifest['quantized_model_hash'][:16]}")
+                return
+            if manifest is not None:
+                # Built from an earlier model: serving it would return stale summaries
+                print(f"  Int8 export at {quantized_model_path} is out of date "
+                      f"(source {manifest['source_model_hash'][:16]}); rerun the model quantization stage")
+            print("  Quantizing Linear layers to int8 (dynamic)...")
+            if isinstance(self.model, PeftModel):
+                registry.detach(self.model)
+                self.model = self.model.merge_and_unload()
+            self.model = quantize_int8(self.model.eval())
+        elif mode == "bf16":
+            self._warn_if_bf16_unsupported()
+            print("  Casting model to bfloat16...")
+            # Module.to casts in place, so the fp32 model can't stay shared
+            registry.detach(self.model)
+            self.model = self.model.to(torch.bfloat16)
+        else:
+            raise ValueError(f"Unknown serving quantization: {mode!r} (expected none, int8 or bf16)")
+        self.model_id = f"{self.model_id}+{mode}"
 
     
+    def warm_up(self, runs=1, batch_size=1):
+        """Run `runs` throwaway generations of a `batch_size` batch with the
+        default preset, so the first real requests don't pay for kernel
+        selection and allocator growth."""
+        texts = ["Amanda: I baked cookies. Do you want some?\nJerry: Sure!"] * batch_size
+        for _ in range(runs):
+            self.predict_batch(texts)
+
     def predict(self, text):
         # Use the pre-loaded pipeline (fast, no reloading)
-        gen_kwargs = {"length_penalty": 0.8, "num_beams": 8, "max_length": 128}
-        
-        output = self.pipe(text, **gen_kwargs)[0]["summary_text"]
+        with self._use_adapter(None):
+            output = self.pipe(text, **self.resolve_gen_kwargs())[0]["summary_text"]
         
-        return output
\ No newline at end of file
+        return output
+
+    def resolve_gen_kwargs(self, params=None, preset=None):
+        """Build the full `generate` kwargs for a request.
+
+        Args:
+            params (dict, optional): generation params overriding the preset
+            preset (str, optional): decoding preset name; defaults to the
+                `default` preset of params.yaml
+
+        Raises:
+            ValueError: if the preset is unknown, or `params` has an unsupported
+                key or a value of the wrong type
+        """
+        preset = preset or self.decoding_config.default_preset
+        if preset not in self.decoding_config.presets:
+            raise ValueError(f"Unknown decoding preset: {preset!r} "
+                             f"(available: {sorted(self.decoding_config.presets)})")
+        return {**self.decoding_config.presets[preset], **check_gen_params(params or {})}
+
+    def resolve_adapter(self, adapter=None):
+        """Canonical adapter name for a request (None when adapters are disabled).
+
+        Raises:
+            ValueError: if the adapter is unknown, or adapters are disabled
+        """
+        if self.adapters is None:
+            if adapter:
+                raise ValueError("Adapter selection needs adapters.enabled in config.yaml")
+            return None
+        return self.adapters.resolve(adapter)
+
+    def model_id_for(self, adapter=None):
+        """Identity of the weights that summarize with `adapter` (used in cache keys)."""
+        if self.adapters is None:
+            return self.model_id
+        return f"{self.model_id}+{self.adapters.model_id(adapter)}"
+
+    def predict_batch(self, texts, gen_kwargs=None, adapter=None):
+        """Summarize several texts with a single padded `generate` call.
+
+        Args:
+            texts (list): input texts
+            gen_kwargs (dict, optional): full `generate` kwargs, as built by
+                `resolve_gen_kwargs`; defaults to the default preset
+            adapter (str, optional): registered LoRA adapter; defaults to the
+                default adapter
+
+        Returns:
+            list: one summary per input text, in input order
+        """
+        gen_kwargs = gen_kwargs or self.resolve_gen_kwargs()
+
+        # Pad only to the longest text in the batch, not to the model window
+        with stage("tokenize"):
+            inputs = self.tokenizer(list(texts), max_length=1024, truncation=True,
+                                    padding="longest", return_tensors="pt")
+        return self._generate(inputs, gen_kwargs, adapter)
+
+    def summarize_many(self, texts, gen_kwargs_list=None, batch_size=16, adapter=None):
+        """Summarize a large list of texts in length-sorted, model-sized batches.
+
+        All texts are tokenized together up front. Texts sharing the same
+        generation kwargs are sorted by token length so each batch holds
+        similar lengths and padding stays small, then results are put back
+        in input order.
+
+        Args:
+            texts (list): input texts
+            gen_kwargs_list (list, optional): per-text `generate` kwargs, as built
+                by `resolve_gen_kwargs` (or None for the default preset)
+            batch_size (int): texts per `generate` call
+            adapter (str, optional): registered LoRA adapter for every text
+
+        Returns:
+            list: one summary per input text, in input order
+        """
+        gen_kwargs_list = gen_kwargs_list or [None] * len(texts)
+        with stage("tokenize"):
+            encodings = self.tokenizer(list(texts), max_length=1024, truncation=True)["input_ids"]
+
+        groups = {}
+        for idx, gen_kwargs in enumerate(gen_kwargs_list):
+            gen_kwargs = gen_kwargs or self.resolve_gen_kwargs()
+            groups.setdefault(json.dumps(gen_kwargs, sort_keys=True), []).append(idx)
+
+        summaries = [None] * len(texts)
+        for key, indices in groups.items():
+            gen_kwargs = json.loads(key)
+            indices.sort(key=lambda i: len(encodings[i]), reverse=True)
+            for start in range(0, len(indices), batch_size):
+                chunk = indices[start : start + batch_size]
+                with stage("tokenize"):
+                    inputs = self.tokenizer.pad({"input_ids": [encodings[i] for i in chunk]},
+                                                padding="longest", return_tensors="pt")
+                for idx, summary in zip(chunk, self._generate(inputs, gen_kwargs, adapter)):
+                    summaries[idx] = summary
+        return summaries
+
+    def stream(self, text, gen_kwargs=None, adapter=None, stop=None):
+        """Yield the summary of `text` piece by piece as it is decoded.
+
+        Greedy and sampling decoding (`num_beams=1`) stream true token-by-token
+        text: `generate` runs in a background thread and pushes decoded text
+        into a `TextIteratorStreamer` as each token is produced.
+
+        Beam search cannot stream: the best hypothesis is only known once the
+        whole search finishes, and the leading beam may change at any step.
+        With `num_beams > 1` the full summary is therefore yielded once, as a
+        single piece, when generation completes.
+
+        Args:
+            text (str): input text
+            gen_kwargs (dict, optional): full `generate` kwargs, as built by
+                `resolve_gen_kwargs`; defaults to the default preset
+            adapter (str, optional): registered LoRA adapter
+            stop (threading.Event, optional): once set, generation ends at the
+                next decoding step (e.g. the client went away)
+
+        Yields:
+            str: successive pieces of the summary; joined they form the summary
+        """
+        gen_kwargs = gen_kwargs or self.resolve_gen_kwargs()
+        if stop is not None:
+            gen_kwargs = {**gen_kwargs, "stopping_criteria": StoppingCriteriaList([StopOnEvent(stop)])}
+        with stage("tokenize"):
+            inputs = self.tokenizer([text], max_length=1024, truncation=True, return_tensors="pt")
+
+        if gen_kwargs.get("num_beams", 1) > 1:
+            yield self._generate(inputs, gen_kwargs, adapter)[0]
+            return
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_special_tokens=True,
+                                        clean_up_tokenization_spaces=True)
+        errors = []
+
+        def run():
+            try:
+                # Streamed text is detokenized inside the loop, so it all counts as decode
+                with self._use_adapter(adapter), torch.inference_mode(), stage("decode"):
+                    self.model.generate(input_ids=inputs["input_ids"],
+                                        attention_mask=inputs["attention_mask"],
+                                        streamer=streamer, **gen_kwargs)
+            except Exception as e:
+                errors.append(e)
+                # Unblock the consumer, otherwise it waits forever for more text
+                streamer.end()
+
+        # The copied context carries the request's trace into the generation thread
+        thread = Thread(target=contextvars.copy_context().run, args=(run,), daemon=True)
+        thread.start()
+        try:
+            for piece in streamer:
+                if piece:
+                    yield piece
+        finally:
+            # Also reached when the consumer closes this generator early: the
+            # generation thread must be finished before the caller moves on
+            if stop is not None:
+                stop.set()
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    @contextmanager
+    def _use_adapter(self, adapter):
+        """Hold the adapter lock with `adapter` active (no-op without adapters)."""
+        if self.adapters is None:
+            yield
+            return
+        with self.adapters.lock:
+            self.adapters.activate(adapter)
+            yield
+
+    def _generate(self, inputs, gen_kwargs, adapter=None):
+        with self._use_adapter(adapter), torch.inference_mode():
+            if isinstance(self.model, torch.nn.Module):
+                # Run the encoder on its own so its time is measured apart from
+                # the decoding loop; generate() then starts from its outputs
+                with stage("encode"):
+                    encoder_outputs = self.model.get_encoder()(input_ids=inputs["input_ids"],
+                                                               attention_mask=inputs["attention_mask"],
+                                                               return_dict=True)
+                with stage("decode"):
+                    summaries = self.model.generate(encoder_outputs=encoder_outputs,
+                                                    attention_mask=inputs["attention_mask"],
+                                                    **gen_kwargs)
+            else:
+                with stage("decode"):
+                    summaries = self.model.generate(input_ids=inputs["input_ids"],
+                                                    attention_mask=inputs["attention_mask"],
+                                                    **gen_kwargs)
+        # The first column is the decoder start token (pad for Pegasus, </s> for BART), not output
+        record_tokens(inputs["attention_mask"].sum(dim=1).tolist(),
+                      (summaries[:, 1:] != self.tokenizer.pad_token_id).sum(dim=1).tolist())
+
+        with stage("detokenize"):
+            return self.tokenizer.batch_decode(summaries, skip_special_tokens=True,
+                                               clean_up_tokenization_spaces=True)
+
+    def model_bytes(self):
+        """Bytes of the model's parameters and buffers (None for the ONNX backend)."""
+        if not isinstance(self.model, torch.nn.Module):
+            return None
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
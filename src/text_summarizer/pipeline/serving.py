@@ -0,0 +1,332 @@
+import asyncio
+import contextvars
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from text_summarizer.logging import logger
+from text_summarizer.entity import ServingConfig
+from text_summarizer.pipeline.metrics import BATCH_SIZE, Trace, current_trace, record_queue_wait
+from text_summarizer.utils.profiling import call_profiled
+
+
+class ServiceBusyError(Exception):
+    """Raised when the inference queue is full and a request is rejected."""
+
+
+class ModelNotReadyError(Exception):
+    """Raised when a request needs the model before it has loaded."""
+
+
+class ModelLoader:
+    """Build the prediction pipeline in a background thread.
+
+    The server starts accepting connections right away; `factory()` runs
+    in a daemon thread, followed by the optional `warmup(pipeline)`. Until
+    both finish `get` raises `ModelNotReadyError`, and `status` moves
+    through `loading`, `warming_up` and `ready` (or `failed`).
+    """
+
+    def __init__(self, factory, warmup=None):
+        self.factory = factory
+        self.warmup = warmup
+        self.status = "pending"
+        self.error = None
+        self._value = None
+        self._started = None
+        self._ready_after = None
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.status == "ready"
+
+    def start(self):
+        if self._thread is None:
+            self._started = time.perf_counter()
+            self.status = "loading"
+            self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        """Block until loading finishes; True if the model is ready."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def get(self):
+        """Return the loaded pipeline.
+
+        Raises:
+            ModelNotReadyError: still loading or warming up, or loading failed
+        """
+        if not self.ready:
+            raise ModelNotReadyError(f"Model is {self.status}" + (f": {self.error}" if self.error else ""))
+        return self._value
+
+    def describe(self):
+        elapsed = self._ready_after
+        if elapsed is None and self._started is not None:
+            elapsed = time.perf_counter() - self._started
+        return {"status": self.status, "seconds": elapsed, "error": self.error}
+
+    def _load(self):
+        try:
+            value = self.factory()
+            if self.warmup is not None:
+                self.status = "warming_up"
+                self.warmup(value)
+            self._value = value
+            self._ready_after = time.perf_counter() - self._started
+            self.status = "ready"
+            logger.info(f"Model ready after {self._ready_after:.1f}s")
+        except Exception as e:
+            logger.exception("Model loading failed")
+            self.error = str(e)
+            self.status = "failed"
+
+
+class MicroBatcher:
+    """Collect concurrent summarization requests into padded batches.
+
+    Requests are queued by `submit` and a background task drains the queue,
+    waiting at most `max_wait_ms` for up to `max_batch_size` requests before
+    running them through `predict_fn(texts, gen_kwargs, adapter)`. Requests
+    with the same generation kwargs and LoRA adapter share one batch. Every caller awaits its own
+    future and gets back only its own summary.
+
+    Batches run on a dedicated pool of `executor_workers` threads so the
+    event loop (and the health check) stays responsive while the model is
+    busy. At most `max_queue_depth` requests may be waiting or in flight;
+    beyond that `submit` raises `ServiceBusyError` instead of queueing.
+
+    Queue wait and batch size are recorded in the metrics and in each
+    request's trace; the model's stage timings for a batch are added to
+    the trace of every request in it. A batch holding a request with a
+    profiler attached (see `RequestMetricsMiddleware`) runs inside it.
+    """
+
+    def __init__(self, predict_fn, config: ServingConfig):
+        self.predict_fn = predict_fn
+        self.config = config
+        self._queue = None
+        self._worker = None
+        self._slots = None
+        self._executor = None
+        self._pending = 0
+        self._batches = set()
+
+    @property
+    def pending(self):
+        """Number of admitted requests that have not completed yet."""
+        return self._pending
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.config.executor_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.config.executor_workers,
+                                            thread_name_prefix="inference")
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"Micro-batcher started (max_batch_size={self.config.max_batch_size}, "
+                    f"max_wait_ms={self.config.max_wait_ms}, "
+                    f"executor_workers={self.config.executor_workers}, "
+                    f"max_queue_depth={self.config.max_queue_depth})")
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, text, gen_kwargs=None, adapter=None):
+        """Queue `text` and wait for its summary.
+
+        Raises:
+            ServiceBusyError: the queue already holds `max_queue_depth` requests
+            asyncio.TimeoutError: no result within `request_timeout_s`
+        """
+        if self._pending >= self.config.max_queue_depth:
+            raise ServiceBusyError(f"Inference queue is full ({self._pending} requests pending)")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending += 1
+        try:
+            await self._queue.put((text, gen_kwargs, adapter, future,
+                                   current_trace.get(), time.perf_counter()))
+            # On timeout wait_for cancels the future, so the batch loop skips it
+            return await asyncio.wait_for(future, self.config.request_timeout_s)
+        finally:
+            self._pending -= 1
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` on the inference executor, bypassing the batch queue.
+
+        Used for work that is already batched by the caller (e.g. the batch
+        endpoint). It counts against `max_queue_depth` and shares executor
+        threads with queued batches, but has no per-request timeout since its
+        duration scales with the number of documents.
+
+        Raises:
+            ServiceBusyError: the queue already holds `max_queue_depth` requests
+        """
+        if self._pending >= self.config.max_queue_depth:
+            raise ServiceBusyError(f"Inference queue is full ({self._pending} requests pending)")
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        try:
+            queued = time.perf_counter()
+            async with self._slots:
+                record_queue_wait(time.perf_counter() - queued)
+                # The copied context carries the request's trace into the executor thread
+                context = contextvars.copy_context()
+                trace = current_trace.get()
+                return await loop.run_in_executor(self._executor, context.run, call_profiled,
+                                                  trace.profiler if trace is not None else None, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def stream(self, gen_fn, *args):
+        """Iterate the blocking generator `gen_fn(*args, stop=stop)` on the inference executor.
+
+        Each item is produced in an executor thread and yielded back to the
+        event loop as soon as it is ready. The stream holds one executor slot
+        for its whole lifetime and counts against `max_queue_depth`.
+
+        When the consumer goes away (client disconnect, cancellation) the
+        `stop` event is set; `gen_fn` should then wind down its work. The
+        generator is closed, and the slot released, only once the item being
+        produced in the executor is done, so the slot stays taken while the
+        model is still busy.
+
+        Raises:
+            ServiceBusyError: the queue already holds `max_queue_depth` requests
+        """
+        if self._pending >= self.config.max_queue_depth:
+            raise ServiceBusyError(f"Inference queue is full ({self._pending} requests pending)")
+
+        loop = asyncio.get_running_loop()
+        done, stop = object(), threading.Event()
+        self._pending += 1
+        queued = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self._pending -= 1
+            raise
+        record_queue_wait(time.perf_counter() - queued)
+        context = contextvars.copy_context()
+        iterator = gen_fn(*args, stop=stop)
+        step = None
+        try:
+            while True:
+                step = loop.run_in_executor(self._executor, context.run, next, iterator, done)
+                # Shielded: on cancellation next() carries on in its thread regardless
+                item = await asyncio.shield(step)
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            # Finished in a task of its own: this one may be cancelled again at every await
+            task = loop.create_task(self._close_stream(step, iterator))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _close_stream(self, step, iterator):
+        """Close a stream's generator once its last `next` call has returned,
+        then free its slot."""
+        try:
+            if step is not None:
+                await asyncio.wait([step])
+            await asyncio.get_running_loop().run_in_executor(self._executor, iterator.close)
+        except Exception:
+            logger.exception("Closing a stream failed")
+        finally:
+            self._slots.release()
+            self._pending -= 1
+
+    async def _collect(self, first):
+        """Starting from `first`, gather more requests until the batch is full
+        or the wait window closes."""
+        loop = asyncio.get_running_loop()
+        batch = [first]
+        deadline = loop.time() + self.config.max_wait_ms / 1000
+        while len(batch) < self.config.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            # Wait for a free executor thread, so requests arriving while every
+            # thread is busy pile up into the next (larger) batch. The slot is
+            # only taken once there is work, so `run`/`stream` can use idle slots.
+            await self._slots.acquire()
+            try:
+                batch = await self._collect(first)
+            except BaseException:
+                self._slots.release()
+                raise
+            # Keep a reference so in-flight batches aren't garbage collected
+            task = asyncio.create_task(self._dispatch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            # Callers that gave up (timed out or disconnected) don't need a summary
+            groups = {}
+            dispatched = time.perf_counter()
+            for text, gen_kwargs, adapter, future, trace, enqueued in batch:
+                if not future.done():
+                    record_queue_wait(dispatched - enqueued, trace)
+                    key = json.dumps([adapter, gen_kwargs], sort_keys=True)
+                    groups.setdefault(key, (gen_kwargs, adapter, []))[2].append((text, future, trace))
+            for gen_kwargs, adapter, group in groups.values():
+                await self._run_group(gen_kwargs, adapter, group)
+        finally:
+            self._slots.release()
+
+    async def _run_group(self, gen_kwargs, adapter, group):
+        loop = asyncio.get_running_loop()
+        texts = [text for text, _, _ in group]
+        BATCH_SIZE.observe(len(texts))
+        # The batch is timed once, under its own trace, then shared with its requests
+        batch_trace = Trace()
+        context = contextvars.copy_context()
+        context.run(current_trace.set, batch_trace)
+        # A request that asked to be profiled gets the profile of its whole batch
+        profiler = next((trace.profiler for _, _, trace in group
+                         if trace is not None and trace.profiler is not None), None)
+        try:
+            summaries = await loop.run_in_executor(self._executor, context.run, call_profiled, profiler,
+                                                   self.predict_fn, texts, gen_kwargs, adapter)
+        except Exception as e:
+            logger.exception(f"Batch of {len(texts)} failed")
+            for _, future, _ in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for position, ((_, future, trace), summary) in enumerate(zip(group, summaries)):
+            if trace is not None:
+                trace.merge(batch_trace)
+                trace.values["batch_size"] = len(texts)
+                if position < len(batch_trace.lengths):
+                    # Texts were generated in group order: this request's own counts
+                    trace.values["input_tokens"], trace.values["output_tokens"] = batch_trace.lengths[position]
+            if not future.done():
+                future.set_result(summary)
@@ -0,0 +1,12 @@
+from text_summarizer.config.configuration import ConfigurationManager
+from text_summarizer.logging import logger
+from text_summarizer.components.model_scoring import ModelScoring
+
+class ModelScoringPipeline:
+    def __init__(self):
+        self.config = ConfigurationManager()
+    
+    def main(self):
+        model_scoring_config = self.config.get_model_scoring_config()
+        model_scoring = ModelScoring(config=model_scoring_config)
+        model_scoring.score()
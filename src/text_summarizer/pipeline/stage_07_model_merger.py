@@ -0,0 +1,14 @@
+from text_summarizer.config.configuration import ConfigurationManager
+from text_summarizer.components.model_merger import ModelMerger
+from text_summarizer.logging import logger
+
+
+class ModelMergerPipeline:
+    def __init__(self):
+        pass
+
+    def main(self):
+        config = ConfigurationManager()
+        model_merger_config = config.get_model_merger_config()
+        model_merger = ModelMerger(config=model_merger_config)
+        model_merger.merge()
\ No newline at end of file
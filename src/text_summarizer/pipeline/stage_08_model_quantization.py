@@ -0,0 +1,19 @@
+from text_summarizer.config.configuration import ConfigurationManager
+from text_summarizer.components.model_quantizer import ModelQuantizer
+from text_summarizer.logging import logger
+
+
+class ModelQuantizationPipeline:
+    def __init__(self):
+        pass
+
+    def main(self):
+        config = ConfigurationManager()
+        model_quantization_config = config.get_model_quantization_config()
+        model_quantizer = ModelQuantizer(config=model_quantization_config)
+        model_quantizer.quantize()
+
+
+if __name__ == "__main__":
+    # One-time export, run on demand: python -m text_summarizer.pipeline.stage_08_model_quantization
+    ModelQuantizationPipeline().main()
\ No newline at end of file
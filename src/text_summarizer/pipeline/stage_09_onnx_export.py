@@ -0,0 +1,20 @@
+from text_summarizer.config.configuration import ConfigurationManager
+from text_summarizer.components.onnx_exporter import OnnxExporter
+from text_summarizer.logging import logger
+
+
+class OnnxExportPipeline:
+    def __init__(self):
+        pass
+
+    def main(self):
+        config = ConfigurationManager()
+        onnx_export_config = config.get_onnx_export_config()
+        onnx_exporter = OnnxExporter(config=onnx_export_config)
+        onnx_exporter.export()
+        onnx_exporter.check_parity()
+
+
+if __name__ == "__main__":
+    # One-time export, run on demand: python -m text_summarizer.pipeline.stage_09_onnx_export
+    OnnxExportPipeline().main()
\ No newline at end of file
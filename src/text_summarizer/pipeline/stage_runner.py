@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import hashlib
+import shutil
+from collections import namedtuple
+from contextlib import nullcontext
+from pathlib import Path
+from text_summarizer.constants import CONFIG_FILE_PATH, PARAMS_FILE_PATH
+from text_summarizer.utils.common import read_yaml, hash_path, stat_fingerprint
+from text_summarizer.logging import logger
+
+
+# `config` / `params`: config.yaml sections and params.yaml keys the stage reads;
+# `inputs` / `outputs`: dotted config.yaml keys naming the artifacts it reads / writes
+Stage = namedtuple("Stage", ["key", "name", "pipeline", "config", "params", "inputs", "outputs"])
+
+
+def _pipeline(module, cls):
+    """Import a stage pipeline class lazily, so listing stages stays cheap."""
+    def load():
+        return getattr(__import__(f"text_summarizer.pipeline.{module}", fromlist=[cls]), cls)
+    return load
+
+
+STAGES = [
+    Stage("data_ingestion", "Data Ingestion Stage",
+          _pipeline("stage_01_data_ingestion", "DataIngestionTrainPipeline"),
+          config=["data_ingestion"], params=[], inputs=[],
+          outputs=["data_ingestion.local_data_file", "data_transformation.data_path"]),
+    Stage("data_validation", "Data Validation Stage",
+          _pipeline("stage_02_data_validation", "DataValidationTrainPipeline"),
+          config=["data_validation"], params=[], inputs=["data_transformation.data_path"],
+          outputs=["data_validation.status_file"]),
+    Stage("data_transformation", "Data Transformation Stage",
+          _pipeline("stage_03_data_transformation", "DataTransformationTrainPipeline"),
+          config=["data_transformation"], params=[], inputs=["data_transformation.data_path"],
+          outputs=["model_trainer.data_path"]),
+    Stage("model_trainer", "Model Training Stage",
+          _pipeline("stage_04_model_trainer", "ModelTrainerTrainingPipeline"),
+          config=["model_trainer"], params=["TrainingArguments"], inputs=["model_trainer.data_path"],
+          outputs=["model_evaluation.model_path", "model_evaluation.tokenizer_path"]),
+    Stage("model_evaluation", "Model Evaluation Stage",
+          _pipeline("stage_05_model_evaluation", "ModelEvaluationTrainPipeline"),
+          config=["model_evaluation"], params=["GenerationPresets"],
+          inputs=["model_evaluation.data_path", "model_evaluation.model_path",
+                  "model_evaluation.tokenizer_path"],
+          outputs=["model_evaluation.predictions_dir"]),
+    Stage("model_scoring", "Model Scoring Stage",
+          _pipeline("stage_06_model_scoring", "ModelScoringPipeline"),
+          config=["model_scoring"], params=[], inputs=["model_scoring.predictions_dir"],
+          outputs=["model_scoring.metric_file_name"]),
+    Stage("model_merger", "Model Merging Stage",
+          _pipeline("stage_07_model_merger", "ModelMergerPipeline"),
+          config=["model_merger"], params=[], inputs=["model_merger.adapter_path"],
+          outputs=["model_merger.merged_model_path"]),
+]
+
+STAGE_KEYS = [stage.key for stage in STAGES]
+
+
+class StageRunner:
+    """Run the training pipeline stages, skipping the ones whose inputs are unchanged.
+
+    Each stage gets a hash of its config.yaml sections, its params.yaml
+    keys and the content of its input artifacts. After a successful run
+    the hash is recorded in `artifacts/.stage_state.json`; on the next run
+    a stage whose hash matches, and whose outputs still exist, is skipped.
+    Stages run in order, so when a stage rewrites an artifact the stages
+    reading it see a new input hash and rerun too. Content hashes of
+    artifacts are memoized by (size, mtime) so unchanged files are not
+    read again. After each stage, cached models and tokenizers that no
+    later stage refers to are released (see `release_models`).
+    """
+
+    def __init__(self, config_filepath=CONFIG_FILE_PATH, params_filepath=PARAMS_FILE_PATH):
+        self.config_filepath, self.params_filepath = Path(config_filepath), Path(params_filepath)
+        self.config = read_yaml(Path(config_filepath))
+        self.params = read_yaml(Path(params_filepath))
+        self.state_file = Path(self.config.artifacts_root) / ".stage_state.json"
+        self.state = self.read_state()
+
+    def read_state(self):
+        if self.state_file.exists():
+            with open(self.state_file) as f:
+                return json.load(f)
+        return {"stages": {}, "paths": {}}
+
+    def write_state(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def clean(self):
+        artifacts_dir = Path(self.config.artifacts_root)
+        if artifacts_dir.exists():
+            logger.info(f"Removing {artifacts_dir} for a clean run")
+            shutil.rmtree(artifacts_dir)
+        self.state = {"stages": {}, "paths": {}}
+
+    def resolve(self, dotted_key):
+        value = self.config
+        for part in dotted_key.split("."):
+            value = value[part]
+        return Path(value)
+
+    def path_hash(self, path):
+        """Content hash of a file or directory, reusing the last hash if no file changed."""
+        if not path.exists():
+            return None
+        stat = stat_fingerprint(path)
+        cached = self.state["paths"].get(str(path))
+        if cached and cached["stat"] == stat:
+            return cached["hash"]
+        digest = hash_path(path)
+        self.state["paths"][str(path)] = {"stat": stat, "hash": digest}
+        return digest
+
+    def stage_hash(self, stage):
+        payload = {
+            "config": {section: self.config[section].to_dict() for section in stage.config},
+            "params": {key: self.params[key].to_dict() if hasattr(self.params[key], "to_dict")
+                       else self.params[key] for key in stage.params if key in self.params},
+            "inputs": {key: self.path_hash(self.resolve(key)) for key in stage.inputs},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_up_to_date(self, stage, stage_hash):
+        recorded = self.state["stages"].get(stage.key)
+        return (recorded is not None and recorded["hash"] == stage_hash
+                and all(self.resolve(key).exists() for key in stage.outputs))
+
+    def select(self, from_stage=None, only=None):
+        """Stages to consider, and the subset forced to run regardless of hashes."""
+        if only:
+            return [stage for stage in STAGES if stage.key in only], set(only)
+        if from_stage:
+            start = STAGE_KEYS.index(from_stage)
+            return STAGES[start:], {from_stage}
+        return STAGES, set()
+
+    def referenced(self, stages):
+        """Every string (artifact path, hub id) in the config sections of `stages`."""
+        values, pending = [], [self.config[section] for stage in stages for section in stage.config]
+        while pending:
+            value = pending.pop()
+            if isinstance(value, dict):
+                pending.extend(value.values())
+            elif isinstance(value, list):
+                pending.extend(value)
+            elif isinstance(value, str):
+                values.append(value)
+        return values
+
+    def release_models(self, remaining):
+        """Release the process-wide cached models and tokenizers (see
+        `ModelRegistry`) that none of the `remaining` stages can reuse."""
+        # Imported here, like the profiler: the registry pulls in transformers
+        from text_summarizer.utils.model_registry import registry
+        registry.retain(self.referenced(remaining))
+
+    def profiler(self, stage, profile):
+        """A `Profiler` for `stage`, or a no-op context when `profile` is None."""
+        if profile is None:
+            return nullcontext()
+        # Imported here: the profiler pulls in torch, which listing stages doesn't need
+        from text_summarizer.config.configuration import ConfigurationManager
+        from text_summarizer.utils.profiling import Profiler, parse_modes
+        config = ConfigurationManager(self.config_filepath, self.params_filepath).get_profiling_config()
+        modes = parse_modes(profile, config.mode)
+        return Profiler(stage.key, config, modes) if modes else nullcontext()
+
+    def run(self, from_stage=None, only=None, force=False, clean=False, profile=None):
+        """Run the selected stages.
+
+        Args:
+            from_stage (str, optional): rerun this stage, then every later stage
+                whose inputs changed; earlier stages are not touched
+            only (list, optional): run just these stages (always rerun)
+            force (bool): rerun every selected stage, ignoring recorded hashes
+            clean (bool): delete the artifacts directory (and the state) first
+            profile (str, optional): profile every stage that runs with "torch",
+                "python" or "both" ("" for `profiling.mode` in config.yaml)
+
+        Returns:
+            dict: stage key -> "ran" or "skipped"
+        """
+        if clean:
+            self.clean()
+        stages, forced = self.select(from_stage, only)
+        summary = {}
+        for position, stage in enumerate(stages):
+            stage_hash = self.stage_hash(stage)
+            if not force and stage.key not in forced and self.is_up_to_date(stage, stage_hash):
+                logger.info(f">>>>>> stage {stage.name} skipped (inputs unchanged) <<<<<<")
+                summary[stage.key] = "skipped"
+                continue
+            try:
+                logger.info(f">>>>>> stage {stage.name} started <<<<<<")
+                started = time.perf_counter()
+                with self.profiler(stage, profile):
+                    stage.pipeline()().main()
+                logger.info(f">>>>>> stage {stage.name} completed <<<<<<\n\nx==========x")
+            except Exception as e:
+                logger.exception(f"Error in stage {stage.name}")
+                raise e
+            self.state["stages"][stage.key] = {"hash": stage_hash, "seconds": time.perf_counter() - started,
+                                               "completed_at": time.time()}
+            self.write_state()
+            summary[stage.key] = "ran"
+            self.release_models(stages[position + 1:])
+        logger.info(f"Stage summary: {summary}")
+        return summary
@@ -0,0 +1,77 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import torch
+
+
+def list_lengths(column):
+    """Lengths of the lists in an Arrow list column, read from its offsets."""
+    return pc.list_value_length(column).to_numpy(zero_copy_only=False)
+
+
+def list_parts(column):
+    """Flat values and per-row lengths of an Arrow list column.
+
+    For an unsliced, null-free column of ints the values are a view of the
+    Arrow buffer (of the memory-mapped file, for a dataset loaded from disk).
+    """
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+    return column.flatten().to_numpy(zero_copy_only=False), list_lengths(column)
+
+
+def pad_flat(values, lengths, pad_value, pad_to_multiple_of=None):
+    """Right-pad concatenated sequences into a (rows, longest) tensor.
+
+    Args:
+        values (np.ndarray): the sequences, concatenated
+        lengths (np.ndarray): length of each sequence
+        pad_value (int): fill value of the padding
+        pad_to_multiple_of (int, optional): round the width up to a multiple of this
+    """
+    width = int(lengths.max()) if len(lengths) else 0
+    if pad_to_multiple_of:
+        width = -(-width // pad_to_multiple_of) * pad_to_multiple_of
+    padded = np.full((len(lengths), width), pad_value, dtype=np.int64)
+    # Scatter every token to (its row, its position in the row) in one step
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    padded[rows, np.arange(len(values)) - starts] = values
+    return torch.from_numpy(padded)
+
+
+class ArrowSeq2SeqCollator:
+    """Build padded seq2seq batches from pre-tokenized `input_ids` / `labels`.
+
+    Accepts either a `pyarrow.Table` of rows (a batch taken from a dataset
+    in "arrow" format) or a list of rows from a dataset in "numpy" format,
+    as yielded by a `DataLoader`. Either way the token ids go from Arrow
+    buffers to one padded array with numpy, never through Python lists.
+    The attention mask follows from the input lengths, so the
+    `attention_mask` column is not read.
+    """
+
+    def __init__(self, pad_token_id, label_pad_token_id=-100, pad_to_multiple_of=None):
+        self.pad_token_id = pad_token_id
+        self.label_pad_token_id = label_pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+
+    @staticmethod
+    def parts(batch, name):
+        if isinstance(batch, pa.Table):
+            return list_parts(batch.column(name))
+        sequences = [row[name] for row in batch]
+        return np.concatenate(sequences), np.array([len(s) for s in sequences])
+
+    def __call__(self, batch):
+        has_labels = "labels" in (batch.column_names if isinstance(batch, pa.Table) else batch[0])
+        values, lengths = self.parts(batch, "input_ids")
+        input_ids = pad_flat(values, lengths, self.pad_token_id, self.pad_to_multiple_of)
+        features = {
+            "input_ids": input_ids,
+            "attention_mask": torch.from_numpy((np.arange(input_ids.shape[1]) < lengths[:, None]).astype(np.int64)),
+        }
+        if has_labels:
+            values, lengths = self.parts(batch, "labels")
+            features["labels"] = pad_flat(values, lengths, self.label_pad_token_id, self.pad_to_multiple_of)
+        return features
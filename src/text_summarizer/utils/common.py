@@ -1,4 +1,5 @@
 import os 
+import hashlib
 from box.exceptions import BoxValueError 
 import yaml 
 from text_summarizer.logging import logger
@@ -52,4 +53,66 @@ def get_size(path: Path) -> str:
         str: size in KB
     """
     size_in_kb = round(os.path.getsize(path)/1024)
-    return f"~ {size_in_kb} KB"
\ No newline at end of file
+    return f"~ {size_in_kb} KB"
+
+@ensure_annotations
+def hash_path(path: Path) -> str:
+    """sha256 of the contents of a file, or of every file under a directory
+
+    Args:
+        path (Path): file or directory to hash
+
+    Returns:
+        str: hex digest; directory digests also cover relative file names
+    """
+    digest = hashlib.sha256()
+    files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+    for file in files:
+        if file != path:
+            digest.update(file.relative_to(path).as_posix().encode())
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+@ensure_annotations
+def stat_fingerprint(path: Path) -> str:
+    """cheap change detector for a file or directory: names, sizes, mtimes and inodes
+
+    Args:
+        path (Path): file or directory
+
+    Returns:
+        str: hex digest that changes whenever a file is added, removed, rewritten or replaced
+    """
+    digest = hashlib.sha256()
+    files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+    for file in files:
+        stat = file.stat()
+        digest.update(f"{file.relative_to(path).as_posix() if file != path else ''}:"
+                      f"{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino}\n".encode())
+    return digest.hexdigest()
+
+@ensure_annotations
+def memory_usage() -> dict:
+    """memory of the current process in MB, from /proc/self/smaps_rollup
+
+    Returns:
+        dict: `rss`, `pss` (shared pages split across the processes mapping
+            them), `shared` (pages also mapped by another process) and
+            `anonymous` (private heap, not backed by a file); empty where
+            /proc is unavailable
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+              "Anonymous": "anonymous"}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return {}
+    usage = dict.fromkeys(fields.values(), 0.0)
+    for line in lines:
+        key, _, value = line.partition(":")
+        if key in fields:
+            usage[fields[key]] += int(value.split()[0]) / 1024
+    return usage
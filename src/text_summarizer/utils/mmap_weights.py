@@ -0,0 +1,81 @@
+import os
+import json
+import torch
+from pathlib import Path
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, GenerationConfig
+from transformers.modeling_utils import no_init_weights
+from text_summarizer.logging import logger
+
+
+# safetensors dtype tags -> torch dtypes
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+    "U8": torch.uint8, "BOOL": torch.bool,
+}
+
+
+def mmap_safetensors(path):
+    """Tensors of a .safetensors file, backed by a private read-only mapping of it.
+
+    Nothing is copied: each tensor is a view into one file mapping, so its
+    pages live in the OS page cache and every process mapping the same file
+    shares them. The mapping is copy-on-write, so a stray in-place write
+    only copies the touched page and never modifies the file.
+    """
+    nbytes = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+    storage = torch.UntypedStorage.from_file(str(path), shared=False, nbytes=nbytes)
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        dtype = SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        offset = data_start + begin
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        if offset % itemsize:
+            raise ValueError(f"{path}: tensor {name} is not aligned to its dtype")
+        tensor = torch.empty(0, dtype=dtype)
+        tensor.set_(storage, offset // itemsize, info["shape"])
+        tensors[name] = tensor
+    return tensors
+
+
+def load_mmap_model(path):
+    """Load a safetensors seq2seq checkpoint with memory-mapped weights.
+
+    The module tree is built without initializing weights, then every
+    parameter is swapped (`assign=True`) for a tensor that views the mapped
+    file, so the weights cost no private memory in this process.
+
+    Raises:
+        FileNotFoundError: if `path` holds no .safetensors file
+        ValueError: if weights are missing that tying does not restore
+    """
+    files = sorted(Path(path).glob("*.safetensors"))
+    if not files:
+        raise FileNotFoundError(f"No .safetensors weights in {path}")
+
+    # Skips the random init; torch.empty pages are never touched, so never resident
+    with no_init_weights():
+        model = AutoModelForSeq2SeqLM.from_config(AutoConfig.from_pretrained(path))
+    state_dict = {}
+    for file in files:
+        state_dict.update(mmap_safetensors(file))
+    missing, unexpected = model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    # Tied weights (embeddings / lm_head) are saved once; they now view a mapped tensor
+    mapped = {tensor.data_ptr() for tensor in state_dict.values()}
+    current = model.state_dict()
+    missing = [key for key in missing if current[key].data_ptr() not in mapped]
+    if missing:
+        raise ValueError(f"{path} is missing weights: {missing}")
+    if unexpected:
+        logger.warning(f"Ignoring unexpected weights in {path}: {unexpected}")
+    if os.path.exists(os.path.join(path, "generation_config.json")):
+        model.generation_config = GenerationConfig.from_pretrained(path)
+    return model.eval()
@@ -0,0 +1,134 @@
+import gc
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from peft import PeftModel
+from text_summarizer.logging import logger
+from text_summarizer.utils.common import memory_usage, stat_fingerprint
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded tokenizers and models.
+
+    Entries are keyed by kind, resolved path and identity of the files
+    (hub ids, which have no local files, by name) plus the load options, so
+    pipeline stages and the serving path running in one process share one
+    copy, and a checkpoint rewritten on disk is loaded afresh. The identity
+    is the content hash from the checkpoint's manifest when the caller has
+    one, otherwise the files' names, sizes, mtimes and inodes: the files
+    are never read just to build a key, so a memory-mapped checkpoint stays
+    out of this process's memory until it is used. Cached objects are
+    shared: code that changes a model in place (PEFT wrapping,
+    `merge_and_unload`, dtype casts) calls `detach` on it first. `release`
+    and `retain` drop entries so their memory can be reclaimed.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self.counters = {"loads": 0, "hits": 0, "released": 0}
+
+    @staticmethod
+    def source(name_or_path):
+        """Resolved path of a local checkpoint, or the name of a hub id."""
+        path = Path(name_or_path)
+        return str(path.resolve()) if path.exists() else str(name_or_path)
+
+    def key(self, kind, name_or_path, options, identity=None):
+        source = self.source(name_or_path)
+        if identity is None and Path(name_or_path).exists():
+            identity = stat_fingerprint(Path(source))
+        return (kind, source, identity, json.dumps(options, sort_keys=True, default=str))
+
+    def get(self, kind, name_or_path, loader, identity=None, **options):
+        """The cached object for `name_or_path`, loading it with `loader()` on a miss.
+
+        Args:
+            identity (str, optional): content hash of the checkpoint from its
+                manifest (merger, quantizer); by default its stat fingerprint
+        """
+        with self._lock:
+            key = self.key(kind, name_or_path, options, identity)
+            if key in self._entries:
+                self.counters["hits"] += 1
+                logger.info(f"Reusing loaded {kind} {name_or_path}")
+                return self._entries[key]
+            rss_before = memory_usage().get("rss", 0.0)
+            started = time.perf_counter()
+            value = loader()
+            rss_after = memory_usage().get("rss", 0.0)
+            logger.info(f"Loaded {kind} {name_or_path} in {time.perf_counter() - started:.1f}s, "
+                        f"rss {rss_before:.0f} -> {rss_after:.0f} MB ({rss_after - rss_before:+.0f} MB)")
+            self._entries[key] = value
+            self.counters["loads"] += 1
+            return value
+
+    def put(self, kind, name_or_path, value, identity=None, **options):
+        """Register an object built in this process (e.g. a model just trained and saved)."""
+        with self._lock:
+            self._entries[self.key(kind, name_or_path, options, identity)] = value
+
+    def detach(self, value):
+        """Stop sharing `value`, so the caller may modify it in place."""
+        with self._lock:
+            for key in [key for key, cached in self._entries.items() if cached is value]:
+                del self._entries[key]
+
+    def release(self, name_or_path=None, kind=None):
+        """Drop the entries of `name_or_path` (all entries if None) of `kind` (any if None)."""
+        source = None if name_or_path is None else self.source(name_or_path)
+        with self._lock:
+            return self._drop([key for key in self._entries
+                               if (kind is None or key[0] == kind) and (source is None or key[1] == source)])
+
+    def retain(self, names_or_paths):
+        """Drop every entry except those loaded from `names_or_paths`."""
+        keep = {self.source(name_or_path) for name_or_path in names_or_paths}
+        with self._lock:
+            return self._drop([key for key in self._entries if key[1] not in keep])
+
+    def _drop(self, keys):
+        with self._lock:
+            for key in keys:
+                del self._entries[key]
+            self.counters["released"] += len(keys)
+        if keys:
+            rss_before = memory_usage().get("rss", 0.0)
+            gc.collect()
+            rss_after = memory_usage().get("rss", 0.0)
+            logger.info(f"Released {len(keys)} cached object(s), rss {rss_before:.0f} -> {rss_after:.0f} MB")
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "entries": [f"{key[0]}:{key[1]}" for key in self._entries]}
+
+
+registry = ModelRegistry()
+
+
+def load_tokenizer(name_or_path):
+    return registry.get("tokenizer", name_or_path, lambda: AutoTokenizer.from_pretrained(name_or_path))
+
+
+def load_model(name_or_path, **kwargs):
+    """A seq2seq model from a checkpoint directory or hub id, shared within the process."""
+    return registry.get("model", name_or_path,
+                        lambda: AutoModelForSeq2SeqLM.from_pretrained(name_or_path, **kwargs), **kwargs)
+
+
+def load_peft_model(adapter_path, base_model_ckpt=None):
+    """The base model named in the adapter config (or `base_model_ckpt`) with the
+    LoRA adapter at `adapter_path` on top, shared within the process."""
+    def loader():
+        with open(os.path.join(adapter_path, "adapter_config.json")) as f:
+            base_ckpt = json.load(f).get("base_model_name_or_path") or base_model_ckpt
+        if not base_ckpt:
+            raise ValueError(f"Adapter {adapter_path} does not name its base model")
+        # Loaded privately: PEFT injects the adapter layers into the base model
+        base_model = AutoModelForSeq2SeqLM.from_pretrained(base_ckpt)
+        return PeftModel.from_pretrained(base_model, adapter_path)
+    return registry.get("peft", adapter_path, loader)
@@ -0,0 +1,297 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+import torch
+from torch.profiler import ProfilerActivity, profile
+from transformers import PreTrainedModel
+from text_summarizer.logging import logger
+
+
+MODES = ("torch", "python")
+# Prefix of the profiler scopes opened around module forwards
+SCOPE = "profile::"
+# Self CPU time is attributed to the innermost of these around each operator
+CATEGORIES = {
+    "linear": "linear layers (projections, feed-forward, LM head)",
+    "attention": "attention blocks, excluding their linear projections",
+    "model_other": "rest of the forward pass (embeddings, norms, activations, residuals)",
+    "outside_model": "outside any forward pass (beam search bookkeeping, logits processing, data collation)",
+    "backward": "autograd backward pass",
+    "optimizer": "optimizer steps",
+}
+
+
+def parse_modes(value, default="both"):
+    """Profilers to run from a flag or header value: "torch", "python", "both"
+    (or a comma-separated list); "", "1", "true" mean `default`, and "0",
+    "false" mean none.
+
+    Raises:
+        ValueError: an unknown profiler name
+    """
+    value = (value or "").strip().lower()
+    if value in ("0", "false", "no", "off"):
+        return ()
+    if value in ("", "1", "true", "yes", "on"):
+        value = default
+    if value == "both":
+        return MODES
+    modes = tuple(mode.strip() for mode in value.split(",") if mode.strip())
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        raise ValueError(f"Unknown profiler {', '.join(unknown)} (expected torch, python or both)")
+    return modes
+
+
+def module_category(module):
+    name = type(module).__name__
+    # Also covers dynamic int8 and LoRA-wrapped linear layers
+    if isinstance(module, torch.nn.Linear) or name.endswith("Linear"):
+        return "linear"
+    if "Attention" in name:
+        return "attention"
+    if isinstance(module, PreTrainedModel):
+        return "model_other"
+    return None
+
+
+@contextmanager
+def module_scopes():
+    """Open a profiler scope around every linear layer, attention block and
+    model forward (in any thread) while the block runs."""
+    local = threading.local()
+
+    def enter(module, args):
+        category = module_category(module)
+        if category is not None:
+            scope = torch.autograd.profiler.record_function(SCOPE + category)
+            scope.__enter__()
+            local.__dict__.setdefault("stack", []).append((module, scope))
+
+    def leave(module, args, output):
+        stack = getattr(local, "stack", None)
+        if stack and stack[-1][0] is module:
+            stack.pop()[1].__exit__(None, None, None)
+
+    handles = [torch.nn.modules.module.register_module_forward_pre_hook(enter),
+               torch.nn.modules.module.register_module_forward_hook(leave)]
+    try:
+        yield
+    finally:
+        for handle in handles:
+            handle.remove()
+
+
+def self_time_by_category(events):
+    """Self CPU milliseconds of the profiled operators by `CATEGORIES` key."""
+    totals = defaultdict(float)
+    pending = [(event, "outside_model") for event in events if event.cpu_parent is None]
+    while pending:
+        event, category = pending.pop()
+        if event.name.startswith(SCOPE):
+            category = event.name[len(SCOPE):]
+        elif event.name.startswith("autograd::engine::evaluate_function"):
+            category = "backward"
+        elif event.name.startswith("Optimizer.step"):
+            category = "optimizer"
+        totals[category] += event.self_cpu_time_total / 1000
+        pending.extend((child, category) for child in event.cpu_children)
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+class StackSampler:
+    """Sample the Python stack of one thread every `interval` seconds.
+
+    The counts are written as folded stacks (`frame;frame;frame count`),
+    the input of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.counts[";".join(reversed(frames))] += 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def prune_profiles(root_dir, keep):
+    """Delete all but the `keep` newest profile folders under `root_dir`."""
+    folders = sorted((path for path in Path(root_dir).iterdir() if path.is_dir()),
+                     key=lambda path: (path.stat().st_mtime, path.name))
+    for path in folders[:max(len(folders) - keep, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class Profiler:
+    """Profile a block with the torch profiler and/or a sampling Python profiler.
+
+    Used as a context manager in the thread doing the work, once: a
+    profiler profiles a single block (see `call_profiled`). The output goes
+    to `<root_dir>/<timestamp>-<name>/`; only the newest `max_profiles`
+    folders are kept:
+
+    - `trace.json`: torch operator timeline (chrome://tracing or Perfetto)
+    - `operators.txt`: torch operators by self CPU time, with input shapes
+    - `torch.folded`: Python stacks of the torch operators, weighted by self CPU time
+    - `python.folded`: sampled Python stacks of the profiled thread
+    - `summary.json`: wall time, self CPU time by category (`CATEGORIES`) and top operators
+
+    The `.folded` files are flamegraph inputs (flamegraph.pl, speedscope).
+    Aggregating the operators takes seconds per second profiled; with
+    `background=True` the files are written by a separate thread, so the
+    profiled call returns first (`summary.json` is written last).
+    """
+
+    def __init__(self, name, config, modes=None, background=False):
+        self.name = name
+        self.config = config
+        self.background = background
+        self.modes = parse_modes(config.mode) if modes is None else modes
+        label = re.sub(r"[^A-Za-z0-9_.-]", "_", name)[:80]
+        self.output_dir = Path(config.root_dir) / f"{time.strftime('%Y%m%d-%H%M%S')}-{label}"
+        self.seconds = None
+        self._torch = None
+        self._scopes = None
+        self._sampler = None
+        self._lock = threading.Lock()
+        self._claimed = False
+        self._entered = False
+
+    @property
+    def finished(self):
+        return self.seconds is not None
+
+    def claim(self):
+        """True for the first caller only, which may then profile its block."""
+        with self._lock:
+            claimed, self._claimed = self._claimed, True
+            return not claimed
+
+    def __enter__(self):
+        with self._lock:
+            if self._entered:
+                raise RuntimeError(f"Profiler {self.name} was already used; it profiles a single block")
+            self._entered = self._claimed = True
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        prune_profiles(self.config.root_dir, self.config.max_profiles)
+        if "torch" in self.modes:
+            self._scopes = module_scopes()
+            self._scopes.__enter__()
+            self._torch = profile(activities=[ProfilerActivity.CPU], record_shapes=self.config.record_shapes,
+                                  with_stack=self.config.with_stack)
+            self._torch.__enter__()
+        if "python" in self.modes:
+            self._sampler = StackSampler(threading.get_ident(), self.config.sample_interval_ms / 1000).start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self._started
+        if self._sampler is not None:
+            self._sampler.stop()
+        if self._torch is not None:
+            self._torch.__exit__(None, None, None)
+            self._scopes.__exit__(None, None, None)
+        if self.background:
+            threading.Thread(target=self._write, name="profile-writer").start()
+        else:
+            self._write()
+        return False
+
+    def _write(self):
+        try:
+            self.write()
+        except Exception:
+            # A failed write must not hide the outcome of the profiled block
+            logger.exception(f"Writing the profile of {self.name} failed")
+
+    def write(self):
+        summary = {"name": self.name, "modes": list(self.modes), "seconds": self.seconds}
+        if self._torch is not None:
+            self._torch.export_chrome_trace(str(self.output_dir / "trace.json"))
+            averages = self._torch.key_averages(group_by_input_shape=self.config.record_shapes)
+            with open(self.output_dir / "operators.txt", "w") as f:
+                f.write(averages.table(sort_by="self_cpu_time_total", row_limit=self.config.row_limit))
+            if self.config.with_stack:
+                self._torch.export_stacks(str(self.output_dir / "torch.folded"), "self_cpu_time_total")
+            operators = sorted((event for event in self._torch.key_averages() if not event.key.startswith(SCOPE)),
+                               key=lambda event: -event.self_cpu_time_total)
+            summary["self_cpu_ms_by_category"] = self_time_by_category(self._torch.events())
+            summary["categories"] = CATEGORIES
+            summary["top_operators"] = [{"name": event.key, "calls": event.count,
+                                         "self_cpu_ms": event.self_cpu_time_total / 1000}
+                                        for event in operators[:self.config.row_limit]]
+        if self._sampler is not None:
+            self._sampler.write(self.output_dir / "python.folded")
+            summary["python_samples"] = sum(self._sampler.counts.values())
+        with open(self.output_dir / "summary.json", "w") as f:
+            json.dump(summary, f, indent=2)
+
+        breakdown = summary.get("self_cpu_ms_by_category", {})
+        total = sum(breakdown.values()) or 1
+        shares = ", ".join(f"{category} {ms / total:.0%}" for category, ms in breakdown.items())
+        logger.info(f"Profile of {self.name} ({self.seconds:.2f}s) saved to: {self.output_dir}"
+                    + (f" (self CPU time: {shares})" if shares else ""))
+
+
+class ProfileLimiter:
+    """Admit at most one profile at a time, and one per `min_interval_s`."""
+
+    def __init__(self, min_interval_s):
+        self.min_interval_s = min_interval_s
+        self._lock = threading.Lock()
+        self._busy = False
+        self._last = None
+
+    def acquire(self):
+        """True if a profile may start now; the caller then calls `release`."""
+        with self._lock:
+            now = time.monotonic()
+            if self._busy or (self._last is not None and now - self._last < self.min_interval_s):
+                return False
+            self._busy, self._last = True, now
+            return True
+
+    def release(self):
+        with self._lock:
+            self._busy = False
+
+
+def call_profiled(profiler, fn, *args):
+    """`fn(*args)`, inside `profiler` when there is one that hasn't been used
+    yet: a request making several model calls gets the profile of the first."""
+    if profiler is None or not profiler.claim():
+        return fn(*args)
+    with profiler:
+        return fn(*args)
@@ -0,0 +1,85 @@
+import pytest
+from datasets import Dataset, DatasetDict
+from text_summarizer.entity import (BenchmarkSuiteConfig, DataIngestionConfig, DataTransformationConfig,
+                                   LongDocumentConfig, ModelMergerConfig, ModelQuantizationConfig,
+                                   ModelScoringConfig, ProfilingConfig, ServingConfig, SummaryCacheConfig)
+from text_summarizer.benchmark.tiny_model import build_tiny_model
+
+
+DIALOGUES = [
+    "Amanda: I baked cookies. Do you want some?\nJerry: Sure!\nAmanda: I'll bring you tomorrow :-)",
+    "Olivia: Who are you voting for in this election?\nOliver: Liberals as always.\nOlivia: Me too!!",
+    "Tim: Hi, what's up?\nKim: Bad mood tbh, I was going to do lots of stuff but ended up procrastinating",
+    "Edward: Rachel, I think I'm in love with Bella..\nRachel: Don't say anything else..",
+]
+SUMMARIES = [
+    "Amanda baked cookies and will bring Jerry some tomorrow.",
+    "Olivia and Olivier are voting for liberals in this election.",
+    "Kim may try the pomodoro technique recommended by Tim to get more stuff done.",
+    "Edward thinks he is in love with Bella. Rachel wants Edward to open his door.",
+]
+
+
+# Small, fast settings per config entity; tests override the fields they exercise
+CONFIG_DEFAULTS = {
+    BenchmarkSuiteConfig: lambda tmp_path: dict(
+        root_dir=tmp_path, data_path=tmp_path, workspace_dir=tmp_path / "workspace",
+        history_file=tmp_path / "history.json", num_samples=400, train_samples=96, presets=["greedy"],
+        generation_samples=20, http_requests=64, http_concurrency=8, app_dir=tmp_path, startup_timeout_s=120,
+        repeats=3, regression_threshold=0.2, baseline_runs=3),
+    DataIngestionConfig: lambda tmp_path: dict(
+        root_dir=str(tmp_path), source_URL="", local_data_file=str(tmp_path / "data.zip"),
+        unzip_dir=str(tmp_path / "data"), mirrors=[], sha256="", chunk_size=64, timeout_s=5, retries=3),
+    DataTransformationConfig: lambda tmp_path: dict(
+        root_dir=str(tmp_path), data_path=str(tmp_path / "samsum_dataset"), tokenizer_name=str(tmp_path / "tokenizer"),
+        max_input_length=32, max_target_length=16, num_proc=1, batch_size=2,
+        manifest_file=str(tmp_path / "data_transformation_manifest.json")),
+    LongDocumentConfig: lambda tmp_path: dict(
+        max_chunk_tokens=10, overlap_tokens=0, max_input_tokens=1000, max_depth=3, batch_size=2),
+    ModelMergerConfig: lambda tmp_path: dict(
+        root_dir=str(tmp_path), adapter_path=str(tmp_path / "adapter"),
+        tokenizer_path=str(tmp_path / "tokenizer"), base_model_ckpt="",
+        merged_model_path=str(tmp_path / "merged"), manifest_file=str(tmp_path / "manifest.json")),
+    ModelQuantizationConfig: lambda tmp_path: dict(
+        root_dir=str(tmp_path), adapter_path=str(tmp_path / "adapter"), base_model_ckpt="",
+        merged_model_path=str(tmp_path / "merged"), tokenizer_path=str(tmp_path / "tokenizer"),
+        quantized_model_path=str(tmp_path / "int8"), data_path=str(tmp_path / "samsum_dataset"),
+        gen_kwargs={"num_beams": 1, "max_new_tokens": 16}, num_samples=4, batch_size=2, max_rouge_drop=0.01,
+        report_file=str(tmp_path / "quantization_report.json")),
+    ModelScoringConfig: lambda tmp_path: dict(
+        root_dir=tmp_path, predictions_dir=tmp_path / "predictions", scores_file=tmp_path / "scores.parquet",
+        metric_file_name=tmp_path / "metrics.csv", num_workers=1, chunk_size=2),
+    ProfilingConfig: lambda tmp_path: dict(
+        root_dir=tmp_path, mode="python", sample_interval_ms=1, row_limit=10, record_shapes=False,
+        with_stack=False, max_profiles=20, request_profiling=True, min_interval_s=60),
+    ServingConfig: lambda tmp_path: dict(
+        max_batch_size=8, max_wait_ms=50, executor_workers=1, max_queue_depth=16, request_timeout_s=5,
+        predict_batch_size=4, max_batch_documents=16, quantization="none", backend="torch",
+        onnx_threads=0, mmap_weights=False, warmup_runs=0),
+    SummaryCacheConfig: lambda tmp_path: dict(
+        enabled=True, max_entries=100, max_bytes=1 << 20, ttl_s=60, disk_path="", max_disk_entries=1000),
+}
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """`make_config(ServingConfig, max_batch_size=2)`: a config entity with test defaults."""
+    def make(cls, **overrides):
+        return cls(**{**CONFIG_DEFAULTS[cls](tmp_path), **overrides})
+    return make
+
+
+@pytest.fixture(scope="session")
+def tiny_model(tmp_path_factory):
+    """Directory of a tiny BART model and its tokenizer, built offline (see `build_tiny_model`)."""
+    return build_tiny_model(DIALOGUES + SUMMARIES, str(tmp_path_factory.mktemp("tiny") / "model"))
+
+
+@pytest.fixture(scope="session")
+def samsum_dataset(tmp_path_factory):
+    """A SAMSum-shaped DatasetDict on disk, with the same rows in every split."""
+    path = str(tmp_path_factory.mktemp("data") / "samsum_dataset")
+    split = Dataset.from_dict({"id": [str(i) for i in range(len(DIALOGUES))],
+                               "dialogue": DIALOGUES, "summary": SUMMARIES})
+    DatasetDict(train=split, validation=split, test=split).save_to_disk(path)
+    return path
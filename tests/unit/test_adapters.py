@@ -0,0 +1,68 @@
+import threading
+import pytest
+import torch
+from peft import LoraConfig, get_peft_model
+from transformers import AutoModelForSeq2SeqLM
+from text_summarizer.entity import AdapterConfig
+from text_summarizer.pipeline import adapters
+from text_summarizer.pipeline.adapters import AdapterManager
+
+
+@pytest.fixture(scope="module")
+def registry(tmp_path_factory, tiny_model):
+    root = tmp_path_factory.mktemp("adapters")
+    paths = {}
+    for seed, name in enumerate(["samsum", "news"]):
+        lora = LoraConfig(r=4, lora_alpha=8, target_modules=["q_proj", "v_proj"], init_lora_weights=False)
+        with torch.random.fork_rng():
+            torch.manual_seed(seed)
+            get_peft_model(AutoModelForSeq2SeqLM.from_pretrained(tiny_model), lora).save_pretrained(root / name)
+        paths[name] = str(root / name)
+    return paths
+
+
+@pytest.fixture
+def manager(tiny_model, registry):
+    config = AdapterConfig(enabled=True, base_model_ckpt=tiny_model, default_adapter="samsum",
+                           max_loaded=4, max_loaded_mb=512, registry=registry)
+    return AdapterManager(AutoModelForSeq2SeqLM.from_pretrained(tiny_model), config)
+
+
+def test_stats_follow_activation(manager):
+    assert manager.stats()["loads"] == 1 and manager.stats()["active"] == "samsum"
+
+    with manager.lock:
+        manager.activate("news")
+
+    stats = manager.stats()
+    assert (stats["loads"], stats["evictions"], stats["active"]) == (2, 0, "news")
+    assert sorted(stats["loaded"]) == ["news", "samsum"]
+
+
+def test_stats_and_model_id_do_not_wait_for_a_running_generation(manager, monkeypatch):
+    # Adapters are hashed when the manager is built, not by the first request
+    monkeypatch.setattr(adapters, "hash_path", lambda path: pytest.fail("hashed on the request path"))
+    generating, done = threading.Event(), threading.Event()
+
+    def generate():
+        # As PredictionPipeline._use_adapter does for the whole generate() call
+        with manager.lock:
+            manager.activate("news")
+            generating.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=generate)
+    thread.start()
+    try:
+        assert generating.wait(5)
+        answers = []
+        reader = threading.Thread(target=lambda: answers.append((manager.stats(), manager.model_id("news"))))
+        reader.start()
+        reader.join(1)
+        assert answers, "stats() blocked on the adapter lock"
+        stats, model_id = answers[0]
+        assert stats["active"] == "news"
+        assert model_id.startswith("news@")
+    finally:
+        done.set()
+        thread.join()
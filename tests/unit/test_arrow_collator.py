@@ -0,0 +1,74 @@
+import numpy as np
+import pyarrow as pa
+import torch
+from datasets import Dataset
+from transformers import DataCollatorForSeq2Seq, PreTrainedTokenizerFast
+from tokenizers import Tokenizer, models
+from text_summarizer.utils.arrow_collator import ArrowSeq2SeqCollator, list_lengths, pad_flat
+
+
+ROWS = {
+    "input_ids": [[5, 6, 7], [8], [9, 10, 11, 12, 13]],
+    "attention_mask": [[1, 1, 1], [1], [1, 1, 1, 1, 1]],
+    "labels": [[21, 22], [23, 24, 25], [26]],
+}
+
+
+def test_pads_inputs_with_the_pad_token_and_labels_with_minus_100():
+    features = ArrowSeq2SeqCollator(pad_token_id=0)(pa.table(ROWS))
+
+    assert features["input_ids"].tolist() == [[5, 6, 7, 0, 0], [8, 0, 0, 0, 0], [9, 10, 11, 12, 13]]
+    assert features["attention_mask"].tolist() == [[1, 1, 1, 0, 0], [1, 0, 0, 0, 0], [1, 1, 1, 1, 1]]
+    assert features["labels"].tolist() == [[21, 22, -100], [23, 24, 25], [26, -100, -100]]
+    assert all(value.dtype == torch.int64 for value in features.values())
+
+
+def test_pad_to_multiple_of_rounds_the_width_up():
+    features = ArrowSeq2SeqCollator(pad_token_id=1, pad_to_multiple_of=4)(pa.table(ROWS))
+
+    assert features["input_ids"].shape == (3, 8)
+    assert features["labels"].shape == (3, 4)
+    assert features["input_ids"][1].tolist() == [8] + [1] * 7
+    assert features["attention_mask"].sum(dim=1).tolist() == [3, 1, 5]
+
+
+def test_numpy_rows_and_arrow_tables_give_the_same_batch():
+    collator = ArrowSeq2SeqCollator(pad_token_id=0, pad_to_multiple_of=8)
+    dataset = Dataset.from_dict(ROWS).with_format("numpy")
+
+    from_rows = collator([dataset[i] for i in range(len(dataset))])
+    from_table = collator(dataset.with_format("arrow")[:])
+
+    assert from_rows.keys() == from_table.keys()
+    for name in from_rows:
+        assert torch.equal(from_rows[name], from_table[name])
+
+
+def test_matches_data_collator_for_seq2seq():
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=Tokenizer(models.WordLevel({"<pad>": 0, "<unk>": 1},
+                                                                                    unk_token="<unk>")),
+                                        pad_token="<pad>")
+    reference = DataCollatorForSeq2Seq(tokenizer, pad_to_multiple_of=8, return_tensors="pt")
+    rows = [{name: values[i] for name, values in ROWS.items()} for i in range(3)]
+
+    expected = reference(rows)
+    actual = ArrowSeq2SeqCollator(tokenizer.pad_token_id, pad_to_multiple_of=8)(pa.table(ROWS))
+
+    for name in ["input_ids", "attention_mask", "labels"]:
+        assert torch.equal(actual[name], expected[name]), name
+
+
+def test_batch_without_labels():
+    table = pa.table({"input_ids": ROWS["input_ids"]})
+
+    features = ArrowSeq2SeqCollator(pad_token_id=0)(table)
+
+    assert set(features) == {"input_ids", "attention_mask"}
+
+
+def test_helpers_on_chunked_columns():
+    column = pa.chunked_array([pa.array(ROWS["input_ids"]), pa.array([[1, 2]])])
+
+    assert list_lengths(column).tolist() == [3, 1, 5, 2]
+    assert pad_flat(np.array([4, 5, 6]), np.array([2, 1]), pad_value=-1).tolist() == [[4, 5], [6, -1]]
+    assert pad_flat(np.array([], dtype=np.int64), np.array([], dtype=np.int64), pad_value=0).shape == (0, 0)
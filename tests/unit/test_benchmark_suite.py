@@ -0,0 +1,77 @@
+import pytest
+from text_summarizer.entity import BenchmarkSuiteConfig
+from text_summarizer.benchmark.suite import BenchmarkSuite, median_of, spread, worsening
+
+
+ENVIRONMENT = {"python": "3.11", "torch": "2.0"}
+SETTINGS = {"num_samples": 400, "repeats": 3}
+
+
+@pytest.fixture
+def suite(make_config):
+    def make(**overrides):
+        return BenchmarkSuite(make_config(BenchmarkSuiteConfig, **overrides))
+    return make
+
+
+def run(p50_ms, requests_per_s=100.0, regressions=(), environment=ENVIRONMENT, settings=SETTINGS):
+    return {"environment": environment, "settings": settings, "regressions": list(regressions),
+            "results": {"http": {"p50_ms": p50_ms, "requests_per_s": requests_per_s}}}
+
+
+def test_worsening_by_metric_suffix():
+    assert worsening("http.p50_ms", 120.0, 100.0) == pytest.approx(0.2)
+    assert worsening("http.p50_ms", 80.0, 100.0) == pytest.approx(-0.2)
+    assert worsening("http.requests_per_s", 75.0, 100.0) == pytest.approx(0.25)
+    assert worsening("training.padding_ratio", 0.5, 0.1) is None
+    assert worsening("http.p50_ms", 10.0, 0) is None
+
+
+def test_compare_flags_metrics_past_the_threshold(suite):
+    results = {"http": {"p50_ms": 130.0, "requests_per_s": 95.0, "errors": 3}}
+    baseline = {"http.p50_ms": 100.0, "http.requests_per_s": 100.0, "http.errors": 0}
+
+    report, regressions = suite().compare(results, baseline, threshold=0.2,
+                                                  spreads={"http.p50_ms": [110.0, 150.0]})
+
+    assert [regression["metric"] for regression in regressions] == ["http.p50_ms"]
+    assert regressions[0]["worse_by"] == pytest.approx(0.3)
+    row = report.set_index("metric").loc["http.p50_ms"]
+    assert (row["min"], row["max"], row["baseline"]) == (110.0, 150.0, 100.0)
+    assert report.set_index("metric")["worse_by"].isna()["http.errors"]
+
+
+def test_baseline_is_the_median_of_recent_runs_without_regressions(suite):
+    history = [
+        run(500.0),  # older than the last baseline_runs good runs
+        run(100.0),
+        run(300.0, requests_per_s=40.0, regressions=[{"metric": "http.p50_ms"}]),
+        run(120.0, requests_per_s=90.0),
+        run(10.0, environment={"python": "3.12", "torch": "2.0"}),
+        run(10.0, settings={"num_samples": 50, "repeats": 3}),
+        run(110.0, requests_per_s=None),
+    ]
+
+    baseline = suite().baseline(history, ENVIRONMENT, SETTINGS)
+
+    assert baseline == {"http.p50_ms": 110.0, "http.requests_per_s": 100.0}
+
+
+def test_regressing_run_does_not_become_the_baseline(suite):
+    benchmark = suite(baseline_runs=1)
+    history = [run(100.0)]
+    _, regressions = benchmark.compare(run(200.0)["results"],
+                                       benchmark.baseline(history, ENVIRONMENT, SETTINGS), 0.2)
+    history.append(run(200.0, regressions=regressions))
+
+    assert benchmark.baseline(history, ENVIRONMENT, SETTINGS)["http.p50_ms"] == 100.0
+
+
+def test_repeats_are_reduced_to_median_and_spread():
+    samples = [{"p50_ms": 12.0, "batch": None, "greedy": {"tokens_per_s": 30.0}},
+               {"p50_ms": 10.0, "batch": 2.0, "greedy": {"tokens_per_s": 10.0}},
+               {"p50_ms": 50.0, "batch": None, "greedy": {"tokens_per_s": 20.0}}]
+
+    assert median_of(samples) == {"p50_ms": 12.0, "batch": 2.0, "greedy": {"tokens_per_s": 20.0}}
+    assert median_of([{"batch": None}]) == {"batch": None}
+    assert spread(samples) == {"p50_ms": [10.0, 50.0], "batch": [2.0, 2.0], "greedy.tokens_per_s": [10.0, 30.0]}
@@ -0,0 +1,88 @@
+import asyncio
+import sqlite3
+import time
+from text_summarizer.entity import SummaryCacheConfig
+from text_summarizer.pipeline.cache import SummaryCache
+
+
+def test_key_depends_on_model_and_generation_kwargs():
+    key = SummaryCache.make_key("Some  text\n", "model-a", {"num_beams": 4})
+
+    assert key == SummaryCache.make_key("Some text", "model-a", {"num_beams": 4})
+    assert key != SummaryCache.make_key("Some text", "model-b", {"num_beams": 4})
+    assert key != SummaryCache.make_key("Some text", "model-a", {"num_beams": 1})
+
+
+def test_retrained_model_misses_the_cache(make_config):
+    cache = SummaryCache(make_config(SummaryCacheConfig))
+
+    async def main():
+        await cache.put(SummaryCache.make_key("text", "model-a", {}), "old summary")
+        return (await cache.get(SummaryCache.make_key("text", "model-a", {})),
+                await cache.get(SummaryCache.make_key("text", "model-b", {})))
+
+    assert asyncio.run(main()) == ("old summary", None)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(make_config):
+    cache = SummaryCache(make_config(SummaryCacheConfig, max_entries=2))
+
+    async def main():
+        await cache.put("a", "A")
+        await cache.put("b", "B")
+        await cache.get("a")
+        await cache.put("c", "C")
+        return [await cache.get(key) for key in "abc"]
+
+    assert asyncio.run(main()) == ["A", None, "C"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(make_config):
+    cache = SummaryCache(make_config(SummaryCacheConfig, ttl_s=0.05))
+
+    async def main():
+        await cache.put("a", "A")
+        fresh = await cache.get("a")
+        await asyncio.sleep(0.1)
+        return fresh, await cache.get("a")
+
+    assert asyncio.run(main()) == ("A", None)
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disabled_cache_stores_nothing(make_config):
+    cache = SummaryCache(make_config(SummaryCacheConfig, enabled=False))
+
+    async def main():
+        await cache.put("a", "A")
+        return await cache.get("a")
+
+    assert asyncio.run(main()) is None
+
+
+def test_disk_tier_is_shared_and_bounded(tmp_path, make_config):
+    config = make_config(SummaryCacheConfig, disk_path=str(tmp_path / "summaries.sqlite"), max_disk_entries=3)
+    SummaryCache.PRUNE_EVERY, prune_every = 1, SummaryCache.PRUNE_EVERY
+    try:
+        async def fill():
+            writer = SummaryCache(config)
+            for i in range(5):
+                await writer.put(f"key-{i}", f"summary {i}")
+                time.sleep(0.01)
+
+        async def read():
+            # A second cache (another worker) starts with an empty memory tier
+            reader = SummaryCache(config)
+            return [await reader.get(f"key-{i}") for i in range(5)], reader.stats()["disk_hits"]
+
+        asyncio.run(fill())
+        summaries, disk_hits = asyncio.run(read())
+    finally:
+        SummaryCache.PRUNE_EVERY = prune_every
+
+    assert summaries == [None, None, "summary 2", "summary 3", "summary 4"]
+    assert disk_hits == 3
+    with sqlite3.connect(config.disk_path) as db:
+        assert db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] == 3
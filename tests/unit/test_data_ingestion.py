@@ -0,0 +1,176 @@
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from text_summarizer.entity import DataIngestionConfig
+from text_summarizer.components.data_ingestion import DataIngestion
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    """Serves `server.files` by path, honouring `Range: bytes=N-`.
+
+    Each request takes the next entry of `server.faults`, if any: `error`
+    answers 500, `cut` drops the connection halfway through the body.
+    """
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Range")))
+        fault = self.server.faults.pop(0) if self.server.faults else None
+        body = self.server.files.get(self.path)
+        if body is None or fault == "error":
+            self.send_error(404 if body is None else 500)
+            return
+        start = int(self.headers["Range"][len("bytes="):-1]) if self.headers.get("Range") else 0
+        if start >= len(body):
+            self.send_error(416)
+            return
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        end = start + (len(body) - start) // 2 if fault == "cut" else len(body)
+        self.wfile.write(body[start:end])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ArchiveHandler)
+    httpd.files, httpd.faults, httpd.requests = {}, [], []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_port}{path}"
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+ARCHIVE = make_zip({f"samsum/{split}.csv": f"id,dialogue,summary\n{split},Hi!,A greeting\n" * 20
+                    for split in ("train", "validation", "test")})
+ARCHIVE_SHA256 = hashlib.sha256(ARCHIVE).hexdigest()
+
+
+@pytest.fixture
+def ingestion(server, make_config):
+    server.files["/data.zip"] = ARCHIVE
+    def make(**overrides):
+        return DataIngestion(make_config(DataIngestionConfig, source_URL=url(server, "/data.zip"), **overrides))
+    return make
+
+
+def downloaded(ingestion):
+    with open(ingestion.config.local_data_file, "rb") as f:
+        return f.read()
+
+
+def test_interrupted_download_resumes_with_a_range_request(server, ingestion):
+    server.faults = ["cut"]
+    data_ingestion = ingestion(sha256=ARCHIVE_SHA256)
+
+    data_ingestion.download_data()
+
+    half = len(ARCHIVE) // 2
+    assert server.requests == [("/data.zip", None), ("/data.zip", f"bytes={half}-")]
+    assert downloaded(data_ingestion) == ARCHIVE
+    assert not os.path.exists(f"{data_ingestion.config.local_data_file}.part")
+
+
+def test_failed_attempts_are_retried(server, ingestion):
+    server.faults = ["error", "error"]
+    data_ingestion = ingestion(retries=3)
+
+    data_ingestion.download_data()
+
+    assert len(server.requests) == 3
+    assert downloaded(data_ingestion) == ARCHIVE
+
+
+def test_gives_up_after_the_last_retry(server, ingestion):
+    server.faults = ["error", "error"]
+
+    with pytest.raises(RuntimeError, match="500"):
+        ingestion(retries=2).download_data()
+    assert len(server.requests) == 2
+
+
+def test_unreachable_mirror_falls_back_to_the_source(server, ingestion):
+    data_ingestion = ingestion(mirrors=[url(server, "/missing.zip")], retries=1, sha256=ARCHIVE_SHA256)
+
+    data_ingestion.download_data()
+
+    assert [path for path, _ in server.requests] == ["/missing.zip", "/data.zip"]
+    assert downloaded(data_ingestion) == ARCHIVE
+
+
+def test_mirror_with_a_bad_checksum_is_skipped(server, ingestion):
+    server.files["/stale.zip"] = make_zip({"samsum/train.csv": "id,dialogue,summary\n"})
+    data_ingestion = ingestion(mirrors=[url(server, "/stale.zip")], sha256=ARCHIVE_SHA256)
+
+    data_ingestion.download_data()
+
+    assert downloaded(data_ingestion) == ARCHIVE
+
+
+def test_checksum_mismatch_everywhere_fails(ingestion):
+    data_ingestion = ingestion(sha256="0" * 64)
+
+    with pytest.raises(RuntimeError, match="checksum mismatch"):
+        data_ingestion.download_data()
+    assert not os.path.exists(data_ingestion.config.local_data_file)
+    assert not os.path.exists(f"{data_ingestion.config.local_data_file}.part")
+
+
+def test_verified_archive_is_not_downloaded_again(server, ingestion):
+    data_ingestion = ingestion(sha256=ARCHIVE_SHA256)
+    data_ingestion.download_data()
+
+    data_ingestion.download_data()
+
+    assert len(server.requests) == 1
+
+
+def test_only_changed_members_are_extracted_again(ingestion):
+    data_ingestion = ingestion()
+    data_ingestion.download_data()
+    data_ingestion.extract_zip_file()
+    unzip_dir = data_ingestion.config.unzip_dir
+    files = {split: os.path.join(unzip_dir, "samsum", f"{split}.csv") for split in ("train", "validation", "test")}
+    with open(files["train"], "rb") as f:
+        train = f.read()
+    # Same size, different bytes: only the CRC tells them apart
+    with open(files["train"], "wb") as f:
+        f.write(train.replace(b"Hi!", b"Yo!"))
+    os.remove(files["validation"])
+    os.utime(files["test"], ns=(0, 0))
+
+    data_ingestion.extract_zip_file()
+
+    with open(files["train"], "rb") as f:
+        assert f.read() == train
+    assert os.path.exists(files["validation"])
+    assert os.stat(files["test"]).st_mtime_ns == 0
+
+
+def test_members_outside_the_target_directory_are_refused(tmp_path, ingestion):
+    data_ingestion = ingestion()
+    with open(data_ingestion.config.local_data_file, "wb") as f:
+        f.write(make_zip({"samsum/train.csv": "ok", "../../escaped.txt": "owned"}))
+
+    with pytest.raises(ValueError, match="Refusing to extract ../../escaped.txt"):
+        data_ingestion.extract_zip_file()
+    assert not (tmp_path.parent / "escaped.txt").exists()
@@ -0,0 +1,70 @@
+import json
+import shutil
+import pytest
+from datasets import load_from_disk
+from text_summarizer.entity import DataTransformationConfig
+from text_summarizer.components import data_transformation
+from text_summarizer.components.data_transformation import DataTransformation
+from tests.conftest import DIALOGUES
+
+
+@pytest.fixture
+def config(tmp_path, tiny_model, samsum_dataset, make_config):
+    # A copy of the tokenizer files, so a test may change them
+    tokenizer = shutil.copytree(tiny_model, tmp_path / "tokenizer",
+                                ignore=shutil.ignore_patterns("*.safetensors"))
+    return make_config(DataTransformationConfig, data_path=samsum_dataset, tokenizer_name=str(tokenizer))
+
+
+def converted(config):
+    """Run the stage; True if it tokenized the data, False if it skipped the run."""
+    with open(config.manifest_file) as f:
+        before = f.read()
+    DataTransformation(config).convert()
+    with open(config.manifest_file) as f:
+        return f.read() != before
+
+
+@pytest.fixture
+def transformed(config):
+    DataTransformation(config).convert()
+    return config
+
+
+def test_convert_tokenizes_every_split(transformed):
+    output = load_from_disk(f"{transformed.root_dir}/samsum_dataset")
+
+    assert sorted(output) == ["test", "train", "validation"]
+    assert len(output["train"]) == len(DIALOGUES)
+    assert max(len(ids) for ids in output["train"]["input_ids"]) <= transformed.max_input_length
+    with open(transformed.manifest_file) as f:
+        assert json.load(f)["stats"]["train"]["input_tokens"]["count"] == len(DIALOGUES)
+
+
+def test_unchanged_run_is_skipped(transformed, monkeypatch):
+    monkeypatch.setattr(data_transformation, "DatasetDict", lambda *args: pytest.fail("tokenized again"))
+
+    assert not converted(transformed)
+
+
+def test_using_the_shared_tokenizer_does_not_force_a_rerun(transformed, monkeypatch):
+    # The registry hands this tokenizer to every stage; calls change its truncation/padding state
+    tokenizer = DataTransformation(transformed).tokenizer
+    tokenizer(DIALOGUES, max_length=8, truncation=True, padding="max_length")
+    monkeypatch.setattr(data_transformation, "DatasetDict", lambda *args: pytest.fail("tokenized again"))
+
+    assert not converted(transformed)
+
+
+def test_changed_max_length_reruns(transformed):
+    assert converted(DataTransformationConfig(**{**vars(transformed), "max_input_length": 8}))
+
+
+def test_changed_tokenizer_files_rerun(transformed):
+    tokenizer_config = f"{transformed.tokenizer_name}/tokenizer_config.json"
+    with open(tokenizer_config) as f:
+        values = json.load(f)
+    with open(tokenizer_config, "w") as f:
+        json.dump({**values, "model_max_length": 16}, f)
+
+    assert converted(transformed)
@@ -0,0 +1,125 @@
+import pytest
+from transformers import AutoTokenizer
+from text_summarizer.entity import LongDocumentConfig
+from text_summarizer.pipeline.long_document import LongDocumentSummarizer
+
+
+class FakePipeline:
+    """Tokenizer of the tiny model, with `summarize_many` replaced by `summarize_fn` per text."""
+
+    def __init__(self, tokenizer, summarize_fn=lambda text: text):
+        self.tokenizer = tokenizer
+        self.summarize_fn = summarize_fn
+        self.calls = []
+
+    def resolve_gen_kwargs(self):
+        return {}
+
+    def summarize_many(self, texts, gen_kwargs_list, batch_size, adapter):
+        self.calls.append(list(texts))
+        return [self.summarize_fn(text) for text in texts]
+
+
+@pytest.fixture(scope="module")
+def tokenizer(tiny_model):
+    return AutoTokenizer.from_pretrained(tiny_model)
+
+
+@pytest.fixture
+def summarizer(tokenizer, make_config):
+    def make(summarize_fn=lambda text: text, **config):
+        return LongDocumentSummarizer(FakePipeline(tokenizer, summarize_fn),
+                                      make_config(LongDocumentConfig, **config))
+    return make
+
+
+def spans(text, chunks):
+    return [text[start:end] for start, end, _ in chunks]
+
+
+def test_empty_input_has_no_chunks(summarizer):
+    assert summarizer().chunk("") == []
+    assert summarizer().chunk("\n \n") == []
+
+
+def test_lines_are_packed_up_to_the_window(summarizer):
+    # Four tokens per line ("a b c ."), so two lines per window of 10
+    text = "\n".join(f"{word} b c ." for word in "abcde")
+
+    chunks = summarizer().chunk(text)
+
+    assert spans(text, chunks) == ["a b c .\nb b c .", "c b c .\nd b c .", "e b c ."]
+    assert [tokens for _, _, tokens in chunks] == [8, 8, 4]
+
+
+def test_long_line_falls_back_to_sentences(summarizer):
+    text = "one two three four. five six seven! eight nine ten eleven?"
+
+    chunks = summarizer().chunk(text)
+
+    assert [chunk.strip() for chunk in spans(text, chunks)] == [
+        "one two three four. five six seven!", "eight nine ten eleven?"]
+
+
+def test_long_sentence_falls_back_to_tokens(summarizer):
+    words = [f"w{i}" for i in range(25)]
+    text = " ".join(words)
+
+    chunks = summarizer().chunk(text)
+
+    assert [tokens for _, _, tokens in chunks] == [10, 10, 5]
+    assert " ".join(spans(text, chunks)).split() == words
+
+
+def test_windows_overlap_by_whole_lines(summarizer):
+    text = "\n".join(f"{word} b c ." for word in "abcde")
+
+    chunks = summarizer(overlap_tokens=4).chunk(text)
+
+    # Each window starts with the last line of the previous one
+    assert spans(text, chunks) == ["a b c .\nb b c .", "b b c .\nc b c .", "c b c .\nd b c .",
+                                   "d b c .\ne b c ."]
+
+
+def test_no_window_exceeds_max_tokens(summarizer):
+    text = "\n".join(" ".join(f"w{i}" for i in range(length)) + "." for length in (3, 17, 1, 9, 12, 30, 2))
+    long_document = summarizer(max_chunk_tokens=8, overlap_tokens=3)
+
+    chunks = long_document.chunk(text)
+
+    assert chunks and all(0 < tokens <= 8 for _, _, tokens in chunks)
+    assert all(long_document.count_tokens(chunk) == tokens
+               for chunk, (_, _, tokens) in zip(spans(text, chunks), chunks))
+    # Every word of the text is in some window
+    assert set(text.split()) <= set(" ".join(spans(text, chunks)).split())
+
+
+def test_reduce_rounds_run_until_the_text_fits(summarizer):
+    text = "\n".join(f"{word} b c ." for word in "abcdefghijklmnop")
+    # Each summary keeps the first word of its window
+    long_document = summarizer(lambda chunk: chunk.split()[0] + " .")
+
+    result = long_document.summarize(text)
+
+    assert [stage["stage"] for stage in result["stages"]] == ["map", "reduce", "final"]
+    assert long_document.prediction_pipeline.calls[1:] == [
+        ["a .\nc .\ne .\ng .\ni .", "k .\nm .\no ."], ["a .\nk ."]]
+    assert result["summary"] == "a ."
+    assert result["input_tokens"] == 64
+
+
+def test_reduce_stops_when_summaries_do_not_shrink(summarizer):
+    text = "\n".join(f"{word} b c ." for word in "abcde")
+    long_document = summarizer(max_depth=10)
+
+    result = long_document.summarize(text)
+
+    # Echoed summaries are as long as the input: a final pass over the head instead of ten rounds
+    assert [stage["stage"] for stage in result["stages"]] == ["map", "final"]
+    assert len(long_document.prediction_pipeline.calls) == 2
+    assert result["summary"] == "a b c .\nb b c ."
+
+
+def test_text_over_the_input_limit_is_rejected(summarizer):
+    with pytest.raises(ValueError, match="more than the 5 allowed"):
+        summarizer(max_input_tokens=5).summarize("one two three four five six")
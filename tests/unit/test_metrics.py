@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+from fastapi import FastAPI
+from text_summarizer.logging import JsonFormatter, RequestIdFilter, logging_str, request_id
+from text_summarizer.pipeline.metrics import REQUESTS, Counter, Gauge, Histogram, MetricsRegistry
+from text_summarizer.pipeline.metrics import RequestMetricsMiddleware
+
+
+def render(*metrics):
+    registry = MetricsRegistry()
+    for metric in metrics:
+        registry.register(metric)
+    return registry.render().splitlines()
+
+
+def test_counter_exposition():
+    requests = Counter("requests", "Requests by route", ["route", "status"])
+    requests.inc(route="/predict", status=200)
+    requests.inc(2, route="/predict", status=200)
+    requests.inc(route="/predict", status=504)
+
+    assert render(requests) == [
+        "# HELP requests Requests by route",
+        "# TYPE requests counter",
+        'requests_total{route="/predict",status="200"} 3.0',
+        'requests_total{route="/predict",status="504"} 1.0',
+    ]
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    latency = Histogram("latency", "Latency", buckets=(1, 2))
+    for value in (0.5, 1, 1.5, 5):
+        latency.observe(value)
+
+    assert render(latency) == [
+        "# HELP latency Latency",
+        "# TYPE latency histogram",
+        'latency_bucket{le="1"} 2.0',
+        'latency_bucket{le="2"} 3.0',
+        'latency_bucket{le="+Inf"} 4.0',
+        "latency_sum 8.0",
+        "latency_count 4.0",
+    ]
+
+
+def test_gauges_are_read_when_rendered():
+    values = {"rss": 10}
+    memory = Gauge("memory", "Memory by kind", lambda: values, "kind")
+    ready = Gauge("ready", "Model ready", lambda: None)
+    values["pss"] = 4
+
+    assert render(memory, ready) == [
+        "# HELP memory Memory by kind",
+        "# TYPE memory gauge",
+        'memory{kind="rss"} 10.0',
+        'memory{kind="pss"} 4.0',
+        "# HELP ready Model ready",
+        "# TYPE ready gauge",
+    ]
+
+
+def test_failing_metric_is_left_out():
+    broken = Gauge("broken", "Raises", lambda: 1 / 0)
+    ready = Gauge("ready", "Model ready", lambda: 1)
+
+    assert render(broken, ready) == ["# HELP ready Model ready", "# TYPE ready gauge", "ready 1.0"]
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/predict")
+    async def predict():
+        return {"request_id": request_id.get()}
+
+    return RequestMetricsMiddleware(app)
+
+
+def call(app, path, headers=()):
+    """Send one GET through the ASGI app; returns status, response headers and body."""
+    scope = {"type": "http", "http_version": "1.1", "method": "GET", "scheme": "http", "path": path,
+             "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": list(headers),
+             "server": ("testserver", 80), "client": ("testclient", 50000)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return messages[0]["status"], dict(messages[0]["headers"]), body
+
+
+def request_counts():
+    return {labels: value for _, labels, value in REQUESTS.samples()}
+
+
+def test_requests_are_counted_by_route_and_unmatched_paths_share_a_label():
+    app, before = make_app(), request_counts()
+
+    call(app, "/predict")
+    call(app, "/wp-login.php")
+    call(app, "/.env")
+
+    after = request_counts()
+    counted = {labels: after[labels] - before.get(labels, 0) for labels in after}
+    assert counted['{route="/predict",status="200"}'] == 1
+    assert counted['{route="unmatched",status="404"}'] == 2
+    assert not any("wp-login" in labels or ".env" in labels for labels in after)
+
+
+def test_request_id_is_echoed_and_visible_while_handling():
+    app = make_app()
+
+    status, headers, body = call(app, "/predict", [(b"x-request-id", b"abc-123")])
+
+    assert status == 200
+    assert headers[b"x-request-id"] == b"abc-123"
+    assert json.loads(body) == {"request_id": "abc-123"}
+
+
+def test_request_id_is_generated_when_missing():
+    _, first, _ = call(make_app(), "/predict")
+    _, second, _ = call(make_app(), "/predict")
+
+    assert len(first[b"x-request-id"]) == 32
+    assert first[b"x-request-id"] != second[b"x-request-id"]
+
+
+def format_record(formatter, rid=None):
+    record = logging.LogRecord("text_summarizer", logging.INFO, __file__, 1, "Model ready", None, None)
+    token = request_id.set(rid)
+    try:
+        RequestIdFilter().filter(record)
+    finally:
+        request_id.reset(token)
+    return formatter.format(record)
+
+
+def test_text_logs_tag_the_request_id_only_inside_requests():
+    formatter = logging.Formatter(logging_str[0])
+
+    assert format_record(formatter).endswith(": INFO: test_metrics: Model ready")
+    assert format_record(formatter, "abc-123").endswith(": INFO: test_metrics: [abc-123] Model ready")
+
+
+def test_json_logs_carry_the_request_id_as_a_field():
+    entry = json.loads(format_record(JsonFormatter(), "abc-123"))
+
+    assert entry["request_id"] == "abc-123"
+    assert "request_tag" not in entry
@@ -0,0 +1,39 @@
+import os
+import pytest
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from text_summarizer.utils.mmap_weights import load_mmap_model
+from tests.conftest import DIALOGUES
+
+
+def test_mapped_model_matches_from_pretrained(tiny_model):
+    tokenizer = AutoTokenizer.from_pretrained(tiny_model)
+    expected = AutoModelForSeq2SeqLM.from_pretrained(tiny_model).eval()
+    model = load_mmap_model(tiny_model)
+    inputs = tokenizer(DIALOGUES, padding=True, return_tensors="pt")
+    gen_kwargs = dict(num_beams=1, do_sample=False, max_new_tokens=16)
+
+    with torch.inference_mode():
+        assert torch.equal(model(**inputs, decoder_input_ids=inputs["input_ids"]).logits,
+                           expected(**inputs, decoder_input_ids=inputs["input_ids"]).logits)
+        assert torch.equal(model.generate(**inputs, **gen_kwargs), expected.generate(**inputs, **gen_kwargs))
+    assert model.generation_config.to_dict() == expected.generation_config.to_dict()
+
+
+def test_weights_view_the_file_and_tied_weights_share_storage(tiny_model):
+    model = load_mmap_model(tiny_model)
+
+    # Every parameter is a view into the one mapping of the whole file, none a private copy
+    storages = {parameter.untyped_storage().data_ptr(): parameter.untyped_storage()
+                for parameter in model.parameters()}
+    assert len(storages) == 1
+    assert next(iter(storages.values())).nbytes() == os.path.getsize(f"{tiny_model}/model.safetensors")
+    shared = model.get_input_embeddings().weight
+    assert model.get_output_embeddings().weight.data_ptr() == shared.data_ptr()
+    assert model.model.encoder.embed_tokens.weight.data_ptr() == shared.data_ptr()
+    assert model.model.decoder.embed_tokens.weight.data_ptr() == shared.data_ptr()
+
+
+def test_directory_without_safetensors_is_rejected(tmp_path):
+    with pytest.raises(FileNotFoundError, match="No .safetensors"):
+        load_mmap_model(tmp_path)
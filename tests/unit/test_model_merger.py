@@ -0,0 +1,54 @@
+import pytest
+import torch
+from pathlib import Path
+from peft import LoraConfig, PeftModel, get_peft_model
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from text_summarizer.entity import ModelMergerConfig
+from text_summarizer.components import model_merger
+from text_summarizer.components.model_merger import ModelMerger
+from text_summarizer.utils.common import hash_path
+
+
+@pytest.fixture
+def merger(tmp_path, tiny_model, make_config):
+    config = make_config(ModelMergerConfig, tokenizer_path=tiny_model)
+    # Random (not zero) LoRA weights, so the merge visibly changes the base weights
+    lora = LoraConfig(r=4, lora_alpha=8, target_modules=["q_proj", "v_proj"], init_lora_weights=False)
+    with torch.random.fork_rng():
+        torch.manual_seed(0)
+        adapter = get_peft_model(AutoModelForSeq2SeqLM.from_pretrained(tiny_model), lora)
+    adapter.save_pretrained(config.adapter_path)
+    return ModelMerger(config)
+
+
+def logits(model, tokenizer):
+    inputs = tokenizer(["Amanda: I baked cookies. Do you want some?"], return_tensors="pt")
+    with torch.inference_mode():
+        return model(**inputs, decoder_input_ids=torch.tensor([[1, 5, 6]])).logits
+
+
+def test_merged_model_equals_base_plus_adapter(merger, tiny_model):
+    manifest = merger.merge()
+
+    tokenizer = AutoTokenizer.from_pretrained(merger.config.merged_model_path)
+    merged = AutoModelForSeq2SeqLM.from_pretrained(merger.config.merged_model_path).eval()
+    base = AutoModelForSeq2SeqLM.from_pretrained(tiny_model).eval()
+    expected = logits(PeftModel.from_pretrained(AutoModelForSeq2SeqLM.from_pretrained(tiny_model),
+                                                merger.config.adapter_path).eval(), tokenizer)
+
+    assert not any("lora" in name for name, _ in merged.named_parameters())
+    assert torch.allclose(logits(merged, tokenizer), expected, atol=1e-5)
+    assert not torch.allclose(logits(base, tokenizer), expected, atol=1e-3)
+    assert manifest["base_model"] == tiny_model
+    assert manifest["merged_model_hash"] == hash_path(Path(merger.config.merged_model_path))
+
+
+def test_unchanged_adapter_is_not_merged_again(merger, monkeypatch):
+    first = merger.merge()
+    monkeypatch.setattr(model_merger, "load_peft_model", lambda *args: pytest.fail("merged again"))
+
+    assert merger.merge() == first
+
+
+def test_missing_adapter_is_skipped(tmp_path, make_config):
+    assert ModelMerger(make_config(ModelMergerConfig, adapter_path=str(tmp_path / "none"))).merge() is None
@@ -0,0 +1,49 @@
+import json
+import os
+from pathlib import Path
+import torch
+from text_summarizer.entity import ModelQuantizationConfig
+from text_summarizer.components.model_quantizer import ModelQuantizer, load_quantized_model
+from text_summarizer.components.model_scoring import ROUGE_NAMES
+from text_summarizer.utils.common import hash_path
+
+
+def quantizer(make_config, tiny_model, samsum_dataset, **overrides):
+    return ModelQuantizer(make_config(ModelQuantizationConfig, merged_model_path=tiny_model,
+                                      tokenizer_path=tiny_model, data_path=samsum_dataset, **overrides))
+
+
+def test_export_manifest_and_reload(make_config, tiny_model, samsum_dataset):
+    model_quantizer = quantizer(make_config, tiny_model, samsum_dataset)
+
+    fp32_model, int8_model = model_quantizer.export()
+
+    path = model_quantizer.config.quantized_model_path
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    assert manifest["source_model_path"] == tiny_model
+    assert manifest["source_model_hash"] == hash_path(Path(tiny_model))
+    assert manifest["int8_size_mb"] < manifest["fp32_size_mb"]
+    # The exported copy decodes exactly like the in-memory int8 model
+    input_ids = torch.tensor([[5, 6, 7, 8, 1]])
+    reloaded = load_quantized_model(path)
+    with torch.inference_mode():
+        assert torch.equal(reloaded.generate(input_ids=input_ids, num_beams=1, max_new_tokens=8),
+                           int8_model.generate(input_ids=input_ids, num_beams=1, max_new_tokens=8))
+    assert isinstance(fp32_model.model.encoder.layers[0].fc1, torch.nn.Linear)
+    assert not isinstance(reloaded.model.encoder.layers[0].fc1, torch.nn.Linear)
+
+
+def test_rouge_drop_gate(make_config, tiny_model, samsum_dataset):
+    report = quantizer(make_config, tiny_model, samsum_dataset, max_rouge_drop=1.0).quantize()
+
+    assert report["samples"] == 4
+    assert report["rouge_drop"] == {name: report["fp32"][name] - report["int8"][name] for name in ROUGE_NAMES}
+    assert report["passed"]
+    # The same drop fails a bound it exceeds
+    strict = quantizer(make_config, tiny_model, samsum_dataset,
+                       max_rouge_drop=max(report["rouge_drop"].values()) - 0.01)
+    strict_report = strict.check_accuracy(*strict.export())
+    assert not strict_report["passed"]
+    with open(strict.config.report_file) as f:
+        assert json.load(f)["passed"] is False
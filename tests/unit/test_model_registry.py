@@ -0,0 +1,150 @@
+import os
+import pytest
+from text_summarizer.utils import common, model_registry
+from text_summarizer.utils.model_registry import ModelRegistry
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return object()
+
+
+def checkpoint(tmp_path, name="model", content="weights"):
+    path = tmp_path / name
+    path.mkdir(exist_ok=True)
+    (path / "model.safetensors").write_text(content)
+    return path
+
+
+def test_same_checkpoint_is_loaded_once(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+
+    first = registry.get("model", path, loader)
+    # A relative or unresolved spelling of the same directory is the same entry
+    second = registry.get("model", str(path / ".." / "model"), loader)
+
+    assert first is second
+    assert loader.calls == 1
+    assert registry.counters["hits"] == 1
+
+
+def test_kind_and_options_are_part_of_the_key(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+
+    model = registry.get("model", path, loader)
+
+    assert registry.get("tokenizer", path, loader) is not model
+    assert registry.get("model", path, loader, mmap=True) is not model
+    assert loader.calls == 3
+
+
+def test_rewritten_checkpoint_is_loaded_afresh(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+    old = registry.get("model", path, loader)
+
+    checkpoint(tmp_path, content="retrained weights")
+
+    assert registry.get("model", path, loader) is not old
+    assert loader.calls == 2
+
+
+def test_replaced_checkpoint_with_the_same_size_and_mtime_is_loaded_afresh(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+    old = registry.get("model", path, loader)
+    stat = os.stat(path / "model.safetensors")
+
+    # Written elsewhere and moved into place: only the inode differs
+    (tmp_path / "new.safetensors").write_text("WEIGHTS")
+    os.utime(tmp_path / "new.safetensors", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path / "new.safetensors", path / "model.safetensors")
+
+    assert registry.get("model", path, loader) is not old
+
+
+def test_checkpoint_files_are_not_read_to_build_a_key(tmp_path, monkeypatch):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+
+    def guarded_open(file, *args, **kwargs):
+        if str(file).startswith(str(path)):
+            pytest.fail(f"read {file}")
+        return open(file, *args, **kwargs)
+    for module in (common, model_registry):
+        monkeypatch.setattr(module, "open", guarded_open, raising=False)
+
+    assert registry.get("model", path, loader) is registry.get("model", path, loader)
+
+
+def test_manifest_hash_is_the_identity_when_given(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+    model = registry.get("model", path, loader, identity="a" * 64)
+
+    # Same manifest hash: the files are the ones already loaded, whatever their stat says
+    os.utime(path / "model.safetensors", ns=(0, 0))
+    assert registry.get("model", path, loader, identity="a" * 64) is model
+    assert registry.get("model", path, loader, identity="b" * 64) is not model
+    assert loader.calls == 2
+
+
+def test_hub_ids_are_keyed_by_name():
+    registry, loader = ModelRegistry(), CountingLoader()
+
+    model = registry.get("model", "google/pegasus-cnn_dailymail", loader)
+
+    assert registry.get("model", "google/pegasus-cnn_dailymail", loader) is model
+    assert loader.calls == 1
+
+
+def test_detach_stops_sharing(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+    model = registry.get("model", path, loader)
+
+    registry.detach(model)
+
+    assert registry.get("model", path, loader) is not model
+
+
+def test_put_registers_a_model_built_in_process(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+    trained = object()
+
+    registry.put("peft", path, trained)
+
+    assert registry.get("peft", path, loader) is trained
+    assert loader.calls == 0
+
+
+def test_release_by_path_and_kind(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    first, second = checkpoint(tmp_path, "first"), checkpoint(tmp_path, "second")
+    for kind in ["model", "tokenizer"]:
+        registry.get(kind, first, loader)
+        registry.get(kind, second, loader)
+
+    assert registry.release(first, kind="tokenizer") == 1
+    assert registry.release(first) == 1
+    assert registry.stats()["entries"] == [f"model:{second.resolve()}", f"tokenizer:{second.resolve()}"]
+    assert registry.release() == 2
+    assert registry.stats()["released"] == 4
+
+
+def test_retain_keeps_only_the_named_sources(tmp_path):
+    registry, loader = ModelRegistry(), CountingLoader()
+    path = checkpoint(tmp_path)
+    registry.get("model", path, loader)
+    registry.get("tokenizer", "google/pegasus-cnn_dailymail", loader)
+    registry.get("model", "google/pegasus-cnn_dailymail", loader)
+
+    assert registry.retain([str(path), "t5-small"]) == 2
+    assert registry.stats()["entries"] == [f"model:{path.resolve()}"]
@@ -0,0 +1,71 @@
+import json
+import pandas as pd
+import pytest
+from text_summarizer.entity import ModelScoringConfig
+from text_summarizer.components import model_scoring
+from text_summarizer.components.model_scoring import PREDICTION_COLUMNS, ModelScoring, rouge_scores
+
+
+def write_part(predictions_dir, name, rows):
+    predictions_dir.mkdir(exist_ok=True)
+    frame = pd.DataFrame([{"id": row_id, "source": "", "reference": reference, "prediction": prediction,
+                           "gen_params": "{}", "latency_ms": 1.0} for row_id, prediction, reference in rows],
+                         columns=PREDICTION_COLUMNS)
+    frame.to_parquet(predictions_dir / f"part-0-{name}.parquet", index=False)
+
+
+@pytest.fixture
+def scored(make_config, monkeypatch):
+    config = make_config(ModelScoringConfig)
+    calls = []
+
+    def counting_rouge_scores(predictions, references):
+        calls.extend(predictions)
+        return rouge_scores(predictions, references)
+
+    monkeypatch.setattr(model_scoring, "rouge_scores", counting_rouge_scores)
+    write_part(config.predictions_dir, "1", [(0, "the cat sat", "the cat sat down"),
+                                             (1, "a dog barked", "the dog barked"),
+                                             (2, "birds sing", "birds sing loudly")])
+    return config, calls
+
+
+def test_rescoring_only_scores_new_and_changed_rows(scored):
+    config, calls = scored
+    ModelScoring(config).score()
+    assert sorted(calls) == ["a dog barked", "birds sing", "the cat sat"]
+
+    calls.clear()
+    # A later part regenerates row 1 and adds row 3; rows 0 and 2 are unchanged
+    write_part(config.predictions_dir, "2", [(1, "the dog barked", "the dog barked"),
+                                             (3, "fish swim", "fish swim fast")])
+    rouge = ModelScoring(config).score()
+
+    assert sorted(calls) == ["fish swim", "the dog barked"]
+    scores = pd.read_parquet(config.scores_file)
+    assert sorted(scores["id"]) == [0, 1, 1, 2, 3]
+    expected = pd.DataFrame(rouge_scores(["the cat sat", "the dog barked", "birds sing", "fish swim"],
+                                         ["the cat sat down", "the dog barked", "birds sing loudly",
+                                          "fish swim fast"])).mean()
+    assert rouge == pytest.approx(expected.to_dict())
+
+
+def test_unchanged_predictions_are_not_rescored(scored):
+    config, calls = scored
+    first = ModelScoring(config).score()
+    calls.clear()
+
+    assert ModelScoring(config).score() == first
+    assert calls == []
+
+
+def test_metrics_cover_the_latest_selection_only(scored):
+    config, calls = scored
+    with open(config.predictions_dir / "selection.json", "w") as f:
+        json.dump([0, 2], f)
+
+    rouge = ModelScoring(config).score()
+
+    expected = pd.DataFrame(rouge_scores(["the cat sat", "birds sing"],
+                                         ["the cat sat down", "birds sing loudly"])).mean()
+    assert rouge == pytest.approx(expected.to_dict())
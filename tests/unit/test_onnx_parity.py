@@ -0,0 +1,81 @@
+import json
+import pytest
+import yaml
+from text_summarizer.benchmark.suite import relocate
+from text_summarizer.config.configuration import ConfigurationManager
+from text_summarizer.constants import CONFIG_FILE_PATH, PARAMS_FILE_PATH
+from text_summarizer.entity import OnnxExportConfig
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum.onnxruntime")
+from text_summarizer.components.onnx_exporter import OnnxExporter
+from text_summarizer.pipeline.prediction import PredictionPipeline
+from tests.conftest import DIALOGUES
+
+
+@pytest.fixture(scope="module")
+def exporter(tmp_path_factory, tiny_model, samsum_dataset):
+    root = tmp_path_factory.mktemp("onnx")
+    config = OnnxExportConfig(
+        root_dir=root, merged_model_path=tiny_model, tokenizer_path=tiny_model,
+        onnx_model_path=str(root / "onnx"), opset=14, optimize=None,
+        data_path=samsum_dataset,
+        gen_kwargs={"num_beams": 1, "do_sample": False, "max_new_tokens": 24},
+        num_samples=len(DIALOGUES), atol=1e-4, min_exact_match=1.0,
+        report_file=str(root / "onnx_parity_report.json"))
+    exporter = OnnxExporter(config)
+    exporter.export()
+    return exporter
+
+
+@pytest.fixture(scope="module")
+def parity_report(exporter):
+    report = exporter.check_parity()
+    with open(exporter.config.report_file) as f:
+        assert json.load(f) == json.loads(json.dumps(report))
+    return report
+
+
+def serving_pipeline(tmp_path, export_config, merged_model_hash):
+    """PredictionPipeline on the ONNX backend, with the merge manifest at `merged_model_hash`."""
+    with open(CONFIG_FILE_PATH) as f:
+        config = relocate(yaml.safe_load(f), tmp_path)
+    manifest_file = tmp_path / "merged_model_manifest.json"
+    with open(manifest_file, "w") as f:
+        json.dump({"merged_model_hash": merged_model_hash}, f)
+    config["model_merger"].update(merged_model_path=export_config.merged_model_path,
+                                  manifest_file=str(manifest_file))
+    config["model_evaluation"]["tokenizer_path"] = export_config.tokenizer_path
+    config["onnx_export"]["onnx_model_path"] = export_config.onnx_model_path
+    config["serving"].update(backend="onnx", quantization="none", mmap_weights=False)
+    config["adapters"]["enabled"] = False
+    with open(tmp_path / "config.yaml", "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return PredictionPipeline(ConfigurationManager(tmp_path / "config.yaml", PARAMS_FILE_PATH))
+
+
+def test_greedy_output_matches_pytorch_exactly(parity_report):
+    assert parity_report["samples"] == len(DIALOGUES)
+    assert parity_report["exact_match_rate"] == 1.0
+
+
+def test_encoder_states_match_within_tolerance(parity_report):
+    assert parity_report["encoder_max_abs_diff"] <= 1e-4
+    assert parity_report["passed"]
+
+
+def test_export_of_the_current_merged_model_is_served(tmp_path, exporter):
+    with open(f"{exporter.config.onnx_model_path}/manifest.json") as f:
+        source_model_hash = json.load(f)["source_model_hash"]
+
+    pipeline = serving_pipeline(tmp_path, exporter.config, source_model_hash)
+
+    assert pipeline.model_id.startswith("onnx@")
+
+
+def test_stale_export_falls_back_to_the_merged_model(tmp_path, exporter, capsys):
+    # A later merge changed the model the export was built from
+    pipeline = serving_pipeline(tmp_path, exporter.config, "0" * 64)
+
+    assert "ONNX export" in capsys.readouterr().out
+    assert pipeline.model_id == "model@" + "0" * 16
@@ -0,0 +1,18 @@
+import pytest
+from text_summarizer.pipeline.prediction import check_gen_params
+
+
+def test_generation_params_are_type_checked():
+    assert check_gen_params({"max_new_tokens": 32, "do_sample": False, "top_p": 0.9}) == {
+        "max_new_tokens": 32, "do_sample": False, "top_p": 0.9}
+    for params in [{"max_new_tokens": "abc"}, {"num_beams": 2.5}, {"num_beams": True},
+                   {"do_sample": 1}, {"temperature": "hot"}]:
+        with pytest.raises(ValueError, match="must be"):
+            check_gen_params(params)
+    with pytest.raises(ValueError, match="Unsupported generation params"):
+        check_gen_params({"output_scores": True})
+
+
+def test_integer_float_params_give_the_same_kwargs():
+    assert check_gen_params({"length_penalty": 1}) == check_gen_params({"length_penalty": 1.0})
+    assert isinstance(check_gen_params({"length_penalty": 1})["length_penalty"], float)
@@ -0,0 +1,60 @@
+import json
+import os
+import pytest
+from text_summarizer.entity import ProfilingConfig
+from text_summarizer.utils.profiling import MODES, Profiler, ProfileLimiter, call_profiled, parse_modes
+
+
+def test_parse_modes():
+    assert parse_modes("both") == MODES
+    assert parse_modes("", default="torch") == ("torch",)
+    assert parse_modes("1", default="both") == MODES
+    assert parse_modes(" Python , torch ") == ("python", "torch")
+    assert parse_modes("off") == ()
+    assert parse_modes(None, default="python") == ("python",)
+    with pytest.raises(ValueError, match="Unknown profiler cuda"):
+        parse_modes("torch,cuda")
+
+
+def test_limiter_admits_one_profile_per_interval(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("text_summarizer.utils.profiling.time.monotonic", lambda: now[0])
+    limiter = ProfileLimiter(min_interval_s=60)
+
+    assert limiter.acquire()
+    # Busy until released, then rate limited until the interval has passed
+    assert not limiter.acquire()
+    limiter.release()
+    now[0] += 30
+    assert not limiter.acquire()
+    now[0] += 31
+    assert limiter.acquire()
+
+
+def test_profiler_profiles_only_the_first_call(make_config):
+    profiler = Profiler("request-1", make_config(ProfilingConfig))
+    calls = []
+
+    assert call_profiled(profiler, calls.append, "first") is None
+    seconds = profiler.seconds
+    call_profiled(profiler, calls.append, "second")
+
+    assert calls == ["first", "second"]
+    assert profiler.seconds == seconds
+    with open(profiler.output_dir / "summary.json") as f:
+        assert json.load(f)["name"] == "request-1"
+    with pytest.raises(RuntimeError, match="already used"):
+        with profiler:
+            pass
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path, make_config):
+    for i in range(3):
+        old = tmp_path / f"20240101-00000{i}-stage"
+        old.mkdir()
+        os.utime(old, (i, i))
+
+    with Profiler("new", make_config(ProfilingConfig, max_profiles=2)) as profiler:
+        pass
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["20240101-000002-stage", profiler.output_dir.name]
@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+import pytest
+from text_summarizer.entity import ServingConfig
+from text_summarizer.pipeline.serving import MicroBatcher, ModelLoader, ModelNotReadyError, ServiceBusyError
+
+
+class RecordingModel:
+    """Stand-in `predict_fn` that records each batch it is given."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, texts, gen_kwargs, adapter):
+        self.calls.append((list(texts), gen_kwargs, adapter))
+        time.sleep(self.delay)
+        return [f"{adapter}:{text.upper()}" for text in texts]
+
+
+def run_with_batcher(predict_fn, config, body):
+    async def main():
+        batcher = MicroBatcher(predict_fn, config)
+        await batcher.start()
+        try:
+            return await asyncio.wait_for(body(batcher), 10)
+        finally:
+            await batcher.stop()
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_share_one_batch(make_config):
+    model = RecordingModel()
+
+    async def body(batcher):
+        return await asyncio.gather(*(batcher.submit(text) for text in ["a", "b", "c"]))
+
+    summaries = run_with_batcher(model, make_config(ServingConfig), body)
+
+    assert summaries == ["None:A", "None:B", "None:C"]
+    assert [texts for texts, _, _ in model.calls] == [["a", "b", "c"]]
+
+
+def test_batches_are_split_by_generation_kwargs_and_adapter(make_config):
+    model = RecordingModel()
+
+    async def body(batcher):
+        return await asyncio.gather(batcher.submit("a", {"num_beams": 1}),
+                                    batcher.submit("b", {"num_beams": 4}),
+                                    batcher.submit("c", {"num_beams": 1}, "legal"),
+                                    batcher.submit("d", {"num_beams": 1}))
+
+    summaries = run_with_batcher(model, make_config(ServingConfig), body)
+
+    assert summaries == ["None:A", "None:B", "legal:C", "None:D"]
+    assert sorted((texts, kwargs["num_beams"], adapter) for texts, kwargs, adapter in model.calls) == [
+        (["a", "d"], 1, None), (["b"], 4, None), (["c"], 1, "legal")]
+
+
+def test_batch_size_is_capped(make_config):
+    model = RecordingModel()
+
+    async def body(batcher):
+        return await asyncio.gather(*(batcher.submit(str(i)) for i in range(5)))
+
+    run_with_batcher(model, make_config(ServingConfig, max_batch_size=2), body)
+
+    assert [len(texts) for texts, _, _ in model.calls] == [2, 2, 1]
+
+
+def test_full_queue_is_rejected(make_config):
+    release = threading.Event()
+
+    def blocked(texts, gen_kwargs, adapter):
+        release.wait(5)
+        return texts
+
+    async def body(batcher):
+        first = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.1)
+        with pytest.raises(ServiceBusyError):
+            await batcher.submit("b")
+        release.set()
+        return await first
+
+    assert run_with_batcher(blocked, make_config(ServingConfig, max_queue_depth=1), body) == "a"
+
+
+def test_slow_request_times_out(make_config):
+    async def body(batcher):
+        with pytest.raises(asyncio.TimeoutError):
+            await batcher.submit("a")
+        return batcher.pending
+
+    config = make_config(ServingConfig, request_timeout_s=0.1)
+    assert run_with_batcher(RecordingModel(delay=0.5), config, body) == 0
+
+
+def test_run_does_not_wait_for_the_idle_batch_loop(make_config):
+    # With one executor worker the batch loop must not hold the only slot while idle
+    async def body(batcher):
+        before = await batcher.run(lambda texts: [text * 2 for text in texts], ["ab"])
+        summary = await batcher.submit("c")
+        after = await batcher.run(sum, [1, 2])
+        return before, summary, after
+
+    config = make_config(ServingConfig, executor_workers=1)
+    assert run_with_batcher(RecordingModel(), config, body) == (["abab"], "None:C", 3)
+
+
+def test_stream_yields_items_on_a_single_worker(make_config):
+    def count(n, stop):
+        yield from range(n)
+
+    async def body(batcher):
+        items = [item async for item in batcher.stream(count, 3)]
+        return items, await batcher.submit("a"), batcher.pending
+
+    config = make_config(ServingConfig, executor_workers=1)
+    assert run_with_batcher(RecordingModel(), config, body) == ([0, 1, 2], "None:A", 0)
+
+
+def test_stream_rejected_when_queue_is_full(make_config):
+    release = threading.Event()
+
+    def blocked(texts, gen_kwargs, adapter):
+        release.wait(5)
+        return texts
+
+    async def body(batcher):
+        first = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.1)
+        with pytest.raises(ServiceBusyError):
+            await batcher.stream(iter, []).__anext__()
+        release.set()
+        return await first
+
+    assert run_with_batcher(blocked, make_config(ServingConfig, max_queue_depth=1), body) == "a"
+
+
+def test_disconnected_stream_stops_generation_before_freeing_its_slot(make_config):
+    events = []
+
+    def generate(stop):
+        try:
+            yield "first"
+            # Decoding goes on until the stream is cancelled
+            while not stop.wait(0.01):
+                pass
+            events.append("stopped")
+            yield "late"
+        finally:
+            events.append("closed")
+
+    def predict(texts, gen_kwargs, adapter):
+        events.append("batch")
+        return texts
+
+    async def body(batcher):
+        pieces = batcher.stream(generate)
+        first = await pieces.__anext__()
+        # The client disconnects while the second item is being produced
+        consumer = asyncio.ensure_future(pieces.__anext__())
+        await asyncio.sleep(0.1)
+        consumer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await consumer
+        # The only executor slot frees up once the generator has wound down
+        summary = await batcher.submit("a")
+        return first, summary, batcher.pending
+
+    config = make_config(ServingConfig, executor_workers=1)
+    assert run_with_batcher(predict, config, body) == ("first", "a", 0)
+    assert events == ["stopped", "closed", "batch"]
+
+
+def test_model_loader_is_not_ready_until_loaded_and_warmed_up():
+    loaded, warm = threading.Event(), threading.Event()
+    loader = ModelLoader(lambda: loaded.wait(5) and "pipeline", lambda pipeline: warm.wait(5))
+    assert loader.describe() == {"status": "pending", "seconds": None, "error": None}
+
+    loader.start()
+    assert loader.status == "loading" and not loader.ready
+    with pytest.raises(ModelNotReadyError, match="Model is loading"):
+        loader.get()
+    loaded.set()
+    while loader.status == "loading":
+        time.sleep(0.01)
+    # Loaded but still warming up: /readyz keeps answering 503
+    assert loader.status == "warming_up" and not loader.ready
+    with pytest.raises(ModelNotReadyError, match="warming_up"):
+        loader.get()
+    warm.set()
+
+    assert loader.wait(5)
+    assert loader.get() == "pipeline"
+    described = loader.describe()
+    assert described["status"] == "ready" and described["error"] is None
+    assert described["seconds"] == loader.describe()["seconds"] > 0
+
+
+def test_model_loader_reports_a_failed_load():
+    def factory():
+        raise FileNotFoundError("no checkpoint at /models/merged")
+
+    loader = ModelLoader(factory)
+    loader.start()
+
+    assert not loader.wait(5)
+    assert loader.describe()["status"] == "failed"
+    assert loader.describe()["error"] == "no checkpoint at /models/merged"
+    with pytest.raises(ModelNotReadyError, match="Model is failed: no checkpoint at /models/merged"):
+        loader.get()
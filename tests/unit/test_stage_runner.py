@@ -0,0 +1,135 @@
+import pytest
+import yaml
+from text_summarizer.pipeline import stage_runner
+from text_summarizer.pipeline.stage_runner import Stage, StageRunner
+from text_summarizer.utils import model_registry
+from text_summarizer.utils.model_registry import ModelRegistry
+
+
+def copy_stage(key, config_file, calls):
+    """A stage that upper-cases its `input` file into its `output` file."""
+    class Pipeline:
+        def main(self):
+            calls.append(key)
+            with open(config_file) as f:
+                config = yaml.safe_load(f)[key]
+            with open(config["input"]) as src, open(config["output"], "w") as dst:
+                dst.write(src.read().upper())
+
+    return Stage(key, key.title(), lambda: Pipeline, config=[key], params=[key.title()],
+                 inputs=[f"{key}.input"], outputs=[f"{key}.output"])
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    config_file = tmp_path / "config.yaml"
+    config = {
+        "artifacts_root": str(tmp_path / "artifacts"),
+        "produce": {"input": str(tmp_path / "source.txt"), "output": str(tmp_path / "produced.txt")},
+        "consume": {"input": str(tmp_path / "produced.txt"), "output": str(tmp_path / "consumed.txt")},
+    }
+    config_file.write_text(yaml.safe_dump(config))
+    (tmp_path / "params.yaml").write_text(yaml.safe_dump({"Produce": {"lr": 1}, "Consume": {"lr": 1}}))
+    (tmp_path / "source.txt").write_text("hello")
+
+    calls = []
+    stages = [copy_stage("produce", config_file, calls), copy_stage("consume", config_file, calls)]
+    monkeypatch.setattr(stage_runner, "STAGES", stages)
+    monkeypatch.setattr(stage_runner, "STAGE_KEYS", [stage.key for stage in stages])
+
+    def runner():
+        return StageRunner(config_file, tmp_path / "params.yaml")
+    return tmp_path, runner, calls
+
+
+def test_unchanged_stages_are_skipped(project):
+    root, runner, calls = project
+
+    assert runner().run() == {"produce": "ran", "consume": "ran"}
+    assert (root / "consumed.txt").read_text() == "HELLO"
+    assert runner().run() == {"produce": "skipped", "consume": "skipped"}
+    assert calls == ["produce", "consume"]
+
+
+def test_changed_input_reruns_the_stage_and_its_consumers(project):
+    root, runner, calls = project
+    runner().run()
+
+    (root / "source.txt").write_text("hello again")
+
+    assert runner().run() == {"produce": "ran", "consume": "ran"}
+    assert (root / "consumed.txt").read_text() == "HELLO AGAIN"
+
+
+def test_same_output_does_not_rerun_consumers(project):
+    root, runner, calls = project
+    runner().run()
+
+    # Different input, identical output: the consumer's input hash is unchanged
+    (root / "source.txt").write_text("HELLO")
+
+    assert runner().run() == {"produce": "ran", "consume": "skipped"}
+
+
+def test_changed_params_rerun_only_that_stage(project):
+    root, runner, calls = project
+    runner().run()
+
+    (root / "params.yaml").write_text(yaml.safe_dump({"Produce": {"lr": 1}, "Consume": {"lr": 2}}))
+
+    assert runner().run() == {"produce": "skipped", "consume": "ran"}
+
+
+def test_missing_output_reruns_the_stage(project):
+    root, runner, calls = project
+    runner().run()
+
+    (root / "consumed.txt").unlink()
+
+    assert runner().run() == {"produce": "skipped", "consume": "ran"}
+
+
+def test_only_force_and_from_stage(project):
+    root, runner, calls = project
+    runner().run()
+
+    assert runner().run(only=["consume"]) == {"consume": "ran"}
+    assert runner().run(from_stage="produce") == {"produce": "ran", "consume": "skipped"}
+    assert runner().run(force=True) == {"produce": "ran", "consume": "ran"}
+
+
+def test_clean_removes_artifacts_and_state(project):
+    root, runner, calls = project
+    runner().run()
+    assert (root / "artifacts" / ".stage_state.json").exists()
+
+    assert runner().run(clean=True) == {"produce": "ran", "consume": "ran"}
+    assert calls == ["produce", "consume", "produce", "consume"]
+
+
+def test_cached_models_are_released_after_their_last_stage(project, monkeypatch):
+    root, runner, calls = project
+    registry = ModelRegistry()
+    monkeypatch.setattr(model_registry, "registry", registry)
+    seen = {}
+
+    class Produce:
+        def main(self):
+            (root / "produced.txt").write_text("model")
+            # One model only this stage reads, one the next stage reuses
+            registry.put("model", root / "source.txt", object())
+            registry.put("model", root / "produced.txt", object())
+
+    class Consume:
+        def main(self):
+            seen["entries"] = registry.stats()["entries"]
+            (root / "consumed.txt").write_text("done")
+
+    stages = [stage._replace(pipeline=lambda cls=cls: cls)
+              for stage, cls in zip(stage_runner.STAGES, [Produce, Consume])]
+    monkeypatch.setattr(stage_runner, "STAGES", stages)
+
+    runner().run()
+
+    assert seen["entries"] == [f"model:{(root / 'produced.txt').resolve()}"]
+    assert registry.stats()["entries"] == []